@@ -1,12 +1,45 @@
 const { Article, Category } = require('../models');
 const { Op } = require('sequelize');
 
+// Point de départ de la prochaine synchronisation (voir syncWatermark dans soapServer.js) :
+// updatedAt est un DATETIME MySQL à la seconde, on recule à la seconde entière précédente
+const syncWatermark = (date) => new Date(Math.floor(date.getTime() / 1000) * 1000 - 1000);
+
+// Curseur de pagination par clé `<updatedAt ISO>_<id>` (null si invalide)
+const parseCursor = (value) => {
+  const separator = value.lastIndexOf('_');
+  const updatedAt = new Date(value.slice(0, separator));
+  const id = parseInt(value.slice(separator + 1), 10);
+  return separator > 0 && !isNaN(updatedAt.getTime()) && !isNaN(id) ? { updatedAt, id } : null;
+};
+
 // Récupérer la liste de tous les articles (format XML ou JSON selon le choix)
+// Avec updatedSince (date ISO 8601), seuls les articles modifiés depuis cette
+// date sont renvoyés, du plus ancien au plus récent : synchronisation
+// incrémentale d'un index local à partir de serverTime. Les pages suivantes
+// se demandent alors avec `cursor` (valeur nextCursor de la page précédente) :
+// un article modifié pendant la synchronisation passe en fin de liste sans
+// décaler les pages restantes, contrairement à la pagination par offset
 const getAllArticles = async (req, res) => {
   try {
-    const { page = 1, limit = 10, category, search } = req.query;
+    const { page = 1, limit = 10, category, search, updatedSince, cursor } = req.query;
     const offset = (page - 1) * limit;
     
+    const since = updatedSince ? new Date(updatedSince) : null;
+    if (since && isNaN(since.getTime())) {
+      return res.status(400).sendFormatted({
+        success: false,
+        error: 'Paramètre updatedSince invalide'
+      });
+    }
+    const after = since && cursor ? parseCursor(String(cursor)) : null;
+    if (since && cursor && !after) {
+      return res.status(400).sendFormatted({
+        success: false,
+        error: 'Paramètre cursor invalide'
+      });
+    }
+    
     // Construire les conditions de recherche
     const where = {};
     if (category) {
@@ -18,6 +51,21 @@ const getAllArticles = async (req, res) => {
         { content: { [Op.like]: `%${search}%` } }
       ];
     }
+    const filters = { ...where };
+    if (since) {
+      where.updatedAt = { [Op.gte]: since };
+    }
+    if (after) {
+      where[Op.and] = [{
+        [Op.or]: [
+          { updatedAt: { [Op.gt]: after.updatedAt } },
+          { updatedAt: after.updatedAt, id: { [Op.gt]: after.id } }
+        ]
+      }];
+    }
+    
+    // Horodatage pris avant la requête : point de départ de la prochaine synchronisation
+    const serverTime = syncWatermark(new Date());
     
     const articles = await Article.findAndCountAll({
       where,
@@ -26,12 +74,13 @@ const getAllArticles = async (req, res) => {
         as: 'category',
         attributes: ['id', 'name']
       }],
-      order: [['createdAt', 'DESC']],
+      // id départage les articles publiés dans la même seconde : l'ordre des pages reste stable
+      order: since ? [['updatedAt', 'ASC'], ['id', 'ASC']] : [['createdAt', 'DESC'], ['id', 'DESC']],
       limit: parseInt(limit),
-      offset: parseInt(offset)
+      offset: after ? 0 : parseInt(offset)
     });
     
-    res.sendFormatted({
+    const response = {
       success: true,
       data: articles.rows,
       pagination: {
@@ -40,7 +89,23 @@ const getAllArticles = async (req, res) => {
         total: articles.count,
         totalPages: Math.ceil(articles.count / limit)
       }
-    });
+    };
+    
+    if (since) {
+      response.serverTime = serverTime.toISOString();
+      // Chaîne vide : dernière page
+      const last = articles.rows[articles.rows.length - 1];
+      response.nextCursor = last && articles.rows.length === parseInt(limit)
+        ? `${last.updatedAt.toISOString()}_${last.id}`
+        : '';
+      // Identifiants existants (première page) pour détecter les suppressions côté client
+      if (!after && parseInt(page) === 1) {
+        const ids = await Article.findAll({ where: filters, attributes: ['id'], order: [['id', 'ASC']], raw: true });
+        response.articleIds = ids.map(article => article.id);
+      }
+    }
+    
+    res.sendFormatted(response);
   } catch (error) {
     console.error('Erreur lors de la récupération des articles:', error);
     res.status(500).sendFormatted({
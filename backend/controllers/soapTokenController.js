@@ -1,5 +1,6 @@
 const { SoapToken, User } = require('../models');
 const crypto = require('crypto');
+const { tokenCache } = require('../services/soap/tokenCache');
 
 // Lister tous les tokens SOAP (ADMIN uniquement)
 const getAllSoapTokens = async (req, res) => {
@@ -96,6 +97,8 @@ const revokeSoapToken = async (req, res) => {
     
     // Supprimer complètement le token
     await soapToken.destroy();
+    // Le token ne doit plus être accepté par le service SOAP
+    tokenCache.invalidate({ id: soapToken.id, token: soapToken.token });
     
     res.sendFormatted({
       success: true,
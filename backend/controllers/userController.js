@@ -1,16 +1,54 @@
+const { Op } = require('sequelize');
 const { User } = require('../models');
 
+// Taille de page maximale de GET /api/users lorsque la pagination est utilisée
+const MAX_USERS_LIMIT = 1000;
+
 // Obtenir tous les utilisateurs
+// Filtres optionnels (comme listUsers en SOAP) : role, usernamePrefix,
+// createdAfter, et pagination offset/limit ; `total` compte les utilisateurs
+// correspondant aux filtres
 const getAllUsers = async (req, res) => {
   try {
-    const users = await User.findAll({
-      attributes: ['id', 'username', 'role', 'createdAt', 'updatedAt']
+    const { role, usernamePrefix, createdAfter, offset, limit } = req.query;
+    
+    const where = {};
+    if (role) where.role = role;
+    if (usernamePrefix) where.username = { [Op.like]: `${String(usernamePrefix).replace(/[\\%_]/g, '\\$&')}%` };
+    if (createdAfter) {
+      const createdAfterDate = new Date(createdAfter);
+      if (isNaN(createdAfterDate.getTime())) {
+        return res.status(400).sendFormatted({
+          success: false,
+          error: 'Paramètre de date invalide'
+        });
+      }
+      where.createdAt = { [Op.gt]: createdAfterDate };
+    }
+    
+    // Pagination (sans limit, tous les utilisateurs sont renvoyés)
+    const pageOffset = offset !== undefined ? parseInt(offset, 10) : 0;
+    const pageLimit = limit !== undefined ? parseInt(limit, 10) : null;
+    if (isNaN(pageOffset) || pageOffset < 0 || (pageLimit !== null && (isNaN(pageLimit) || pageLimit < 1))) {
+      return res.status(400).sendFormatted({
+        success: false,
+        error: 'Paramètres de pagination invalides'
+      });
+    }
+    
+    const { rows: users, count } = await User.findAndCountAll({
+      where,
+      attributes: ['id', 'username', 'role', 'createdAt', 'updatedAt'],
+      order: [['id', 'ASC']],
+      offset: pageOffset,
+      ...(pageLimit !== null && { limit: Math.min(pageLimit, MAX_USERS_LIMIT) })
     });
     
     res.sendFormatted({
       success: true,
       data: users,
-      count: users.length
+      count: users.length,
+      total: count
     });
   } catch (error) {
     console.error('Erreur lors de la récupération des utilisateurs:', error);
@@ -0,0 +1,108 @@
+const zlib = require('zlib');
+
+// Taille minimale (octets) d'une réponse compressée : en dessous, le gain ne
+// compense pas l'en-tête gzip/brotli ni le temps de compression
+const COMPRESSION_THRESHOLD = parseInt(process.env.COMPRESSION_THRESHOLD, 10) || 1024;
+
+// Brotli au niveau 11 (par défaut) est trop lent pour des réponses dynamiques
+const BROTLI_QUALITY = 5;
+
+// Encodages proposés, par ordre de préférence à qualité égale
+const ENCODINGS = ['br', 'gzip', 'deflate'];
+
+const COMPRESSIBLE_TYPE = /^(text\/|application\/([\w.-]+\+)?(json|xml))/i;
+
+const compressors = {
+  br: (body, callback) => zlib.brotliCompress(body, {
+    params: {
+      [zlib.constants.BROTLI_PARAM_MODE]: zlib.constants.BROTLI_MODE_TEXT,
+      [zlib.constants.BROTLI_PARAM_QUALITY]: BROTLI_QUALITY,
+      [zlib.constants.BROTLI_PARAM_SIZE_HINT]: body.length
+    }
+  }, callback),
+  gzip: (body, callback) => zlib.gzip(body, callback),
+  deflate: (body, callback) => zlib.deflate(body, callback)
+};
+
+// Choisir l'encodage d'après l'en-tête Accept-Encoding (null = pas de compression)
+// Ex: "gzip, deflate, br" -> br ; "gzip;q=1, br;q=0.5" -> gzip ; "br;q=0" -> null
+const negotiateEncoding = (acceptEncoding) => {
+  if (!acceptEncoding) {
+    return null;
+  }
+  const qualities = {};
+  for (const part of acceptEncoding.split(',')) {
+    const [name, ...params] = part.trim().toLowerCase().split(';');
+    const qParam = params.map(param => param.trim()).find(param => param.startsWith('q='));
+    const quality = qParam ? parseFloat(qParam.slice(2)) : 1;
+    qualities[name] = Number.isNaN(quality) ? 0 : quality;
+  }
+  let best = null;
+  let bestQuality = 0;
+  for (const encoding of ENCODINGS) {
+    const quality = encoding in qualities ? qualities[encoding] : (qualities['*'] || 0);
+    if (quality > bestQuality) {
+      best = encoding;
+      bestQuality = quality;
+    }
+  }
+  return best;
+};
+
+const shouldCompress = (res) => {
+  if (res.headersSent || res.statusCode === 204 || res.statusCode === 304) {
+    return false;
+  }
+  if (res.getHeader('Content-Encoding') || /no-transform/.test(res.getHeader('Cache-Control') || '')) {
+    return false;
+  }
+  return COMPRESSIBLE_TYPE.test(res.getHeader('Content-Type') || '');
+};
+
+// Middleware de compression des réponses (br, gzip ou deflate selon Accept-Encoding)
+// Les réponses de ce serveur sont envoyées d'un bloc (res.send, res.json,
+// res.end) : le corps complet est compressé de façon asynchrone, sans
+// bloquer la boucle d'événements, et Content-Length est conservé. Une
+// réponse écrite par morceaux (res.write) est envoyée telle quelle.
+const compressResponses = ({ threshold = COMPRESSION_THRESHOLD } = {}) => (req, res, next) => {
+  res.vary('Accept-Encoding');
+  const encoding = negotiateEncoding(req.headers['accept-encoding']);
+  if (!encoding || req.method === 'HEAD') {
+    return next();
+  }
+
+  const { write, end } = res;
+  let streamed = false;
+  res.write = function (...args) {
+    streamed = true;
+    return write.apply(this, args);
+  };
+  res.end = function (chunk, chunkEncoding, callback) {
+    res.write = write;
+    res.end = end;
+    if (typeof chunkEncoding === 'function') {
+      callback = chunkEncoding;
+      chunkEncoding = undefined;
+    }
+    if (streamed || typeof chunk === 'function' || chunk == null || !shouldCompress(res)) {
+      return end.call(this, chunk, chunkEncoding, callback);
+    }
+    const body = Buffer.isBuffer(chunk) ? chunk : Buffer.from(chunk, chunkEncoding || 'utf8');
+    if (body.length < threshold) {
+      return end.call(this, body, callback);
+    }
+    compressors[encoding](body, (error, compressed) => {
+      if (error) {
+        // Échec (peu probable) : réponse envoyée sans compression
+        return end.call(res, body, callback);
+      }
+      res.setHeader('Content-Encoding', encoding);
+      res.setHeader('Content-Length', compressed.length);
+      end.call(res, compressed, callback);
+    });
+    return this;
+  };
+  next();
+};
+
+module.exports = { compressResponses, negotiateEncoding, COMPRESSION_THRESHOLD };
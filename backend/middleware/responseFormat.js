@@ -1,5 +1,12 @@
 const xml2js = require('xml2js');
 
+// XML compact : l'indentation gonflait les réponses sans rien apporter aux clients
+const xmlBuilder = new xml2js.Builder({
+  rootName: 'response',
+  headless: true,
+  renderOpts: { pretty: false }
+});
+
 // Middleware pour gérer le format de réponse
 const formatResponse = (req, res, next) => {
   const acceptHeader = req.headers.accept || '';
@@ -8,13 +15,9 @@ const formatResponse = (req, res, next) => {
   res.sendFormatted = (data, statusCode = 200) => {
     if (acceptHeader.includes('application/xml') || acceptHeader.includes('text/xml')) {
       // Convertir en XML
-      const builder = new xml2js.Builder({
-        rootName: 'response',
-        headless: true,
-        renderOpts: { pretty: true, indent: '  ' }
-      });
-      
-      const xml = builder.buildObject(data);
+      // Les instances Sequelize sont converties comme pour res.json (toJSON),
+      // sinon leurs propriétés internes (dataValues, _options...) seraient sérialisées
+      const xml = xmlBuilder.buildObject(JSON.parse(JSON.stringify(data)));
       res.setHeader('Content-Type', 'application/xml');
       res.status(statusCode).send(xml);
     } else {
@@ -0,0 +1,253 @@
+// Benchmark du traitement des requêtes POST /soap (un seul processus Node)
+//
+// Compare l'ancien traitement (express.raw + xml2js, détection de
+// l'opération par if/else, journalisation de chaque requête, réponse sans
+// échappement) au nouveau (analyse SAX en flux, registre d'opérations,
+// journalisation échantillonnée, réponse échappée). Les opérations sont
+// simulées en mémoire : seul le coût du protocole est mesuré, sans base de
+// données.
+//
+// Usage : node scripts/bench-soap.js [--duration 10] [--concurrency 32]
+//                                    [--users 200] [--operation mix]
+const { fork } = require('child_process');
+const fs = require('fs');
+const http = require('http');
+const os = require('os');
+const util = require('util');
+
+const PIPELINES = ['legacy', 'stream'];
+const OPERATIONS = ['authenticateUser', 'listUsers', 'addUser', 'updateUser', 'deleteUser'];
+
+const parseArgs = (argv) => {
+  const options = { duration: 10, concurrency: 32, users: 200, operation: 'mix', serve: null };
+  for (let index = 0; index < argv.length; index += 2) {
+    const name = argv[index].replace(/^--/, '');
+    if (!(name in options)) {
+      throw new Error(`Option inconnue: ${argv[index]}`);
+    }
+    options[name] = typeof options[name] === 'number' ? Number(argv[index + 1]) : argv[index + 1];
+  }
+  return options;
+};
+
+// Opérations simulées, identiques pour les deux traitements
+const createStubOperations = (userCount) => {
+  const users = JSON.stringify(Array.from({ length: userCount }, (_, index) => ({
+    id: index + 1,
+    username: `utilisateur_${index + 1}`,
+    role: index % 10 === 0 ? 'ADMIN' : 'VISITEUR',
+    createdAt: new Date(Date.UTC(2024, 0, 1, 0, 0, index)).toISOString()
+  })));
+  let nextId = userCount + 1;
+  return new Map([
+    ['authenticateUser', async () => ({ success: true, message: 'Authentification réussie', role: 'ADMIN', token: 'jwt.simulé.bench' })],
+    ['listUsers', async () => ({ success: true, message: `${userCount} utilisateur(s) trouvé(s)`, users, serverTime: new Date().toISOString(), total: userCount })],
+    ['addUser', async () => ({ success: true, message: 'Utilisateur créé avec succès', userId: nextId++ })],
+    ['updateUser', async () => ({ success: true, message: 'Utilisateur mis à jour avec succès' })],
+    ['deleteUser', async () => ({ success: true, message: 'Utilisateur supprimé avec succès' })]
+  ]);
+};
+
+// Ancien traitement de POST /soap (avant l'analyse en flux), pour comparaison
+const createLegacySoapResponse = (operation, result) => {
+  const responseTag = `${operation}Response`;
+  let bodyContent = '';
+  if (result.success !== undefined) bodyContent += `<success>${result.success}</success>`;
+  if (result.message !== undefined) bodyContent += `<message>${result.message}</message>`;
+  if (result.role !== undefined) bodyContent += `<role>${result.role}</role>`;
+  if (result.token !== undefined) bodyContent += `<token>${result.token}</token>`;
+  if (result.userId !== undefined) bodyContent += `<userId>${result.userId}</userId>`;
+  if (result.users !== undefined) bodyContent += `<users>${result.users}</users>`;
+  if (result.serverTime !== undefined) bodyContent += `<serverTime>${result.serverTime}</serverTime>`;
+  if (result.userIds !== undefined) bodyContent += `<userIds>${result.userIds}</userIds>`;
+  if (result.total !== undefined) bodyContent += `<total>${result.total}</total>`;
+  if (result.results !== undefined) bodyContent += `<results>${result.results}</results>`;
+  return `<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" xmlns:soap="http://newschronicle.com/soap">
+   <soapenv:Header/>
+   <soapenv:Body>
+      <${responseTag}>
+        ${bodyContent}
+      </${responseTag}>
+   </soapenv:Body>
+</soapenv:Envelope>`;
+};
+
+const createLegacyHandler = (operations) => {
+  const xml2js = require('xml2js');
+  return async (req, res) => {
+    try {
+      const xmlData = req.body.toString();
+      console.log('Requête SOAP reçue:', xmlData.substring(0, 200) + '...');
+      const parser = new xml2js.Parser({ explicitArray: false });
+      const result = await parser.parseStringPromise(xmlData);
+      const envelope = result['soapenv:Envelope'] || result['soap:Envelope'];
+      const body = envelope['soapenv:Body'] || envelope['soap:Body'];
+      let operation = null;
+      let args = {};
+      if (body['soap:authenticateUser']) {
+        operation = 'authenticateUser';
+        args = body['soap:authenticateUser'];
+      } else if (body['soap:listUsers']) {
+        operation = 'listUsers';
+        args = body['soap:listUsers'];
+      } else if (body['soap:addUser']) {
+        operation = 'addUser';
+        args = body['soap:addUser'];
+      } else if (body['soap:updateUser']) {
+        operation = 'updateUser';
+        args = body['soap:updateUser'];
+      } else if (body['soap:deleteUser']) {
+        operation = 'deleteUser';
+        args = body['soap:deleteUser'];
+      }
+      if (!operation) {
+        throw new Error('Opération SOAP non reconnue');
+      }
+      console.log(`Opération SOAP: ${operation}`, args);
+      const response = await operations.get(operation)(args);
+      res.set('Content-Type', 'text/xml; charset=utf-8');
+      res.send(createLegacySoapResponse(operation, response));
+    } catch (error) {
+      console.error('Erreur lors du traitement SOAP:', error);
+      res.set('Content-Type', 'text/xml; charset=utf-8');
+      res.status(500).send(createLegacySoapResponse('error', { success: false, message: 'Erreur interne du serveur: ' + error.message }));
+    }
+  };
+};
+
+// Processus serveur : une application Express avec le traitement demandé
+const serve = (options) => {
+  const express = require('express');
+  const app = express();
+  const operations = createStubOperations(options.users);
+  if (options.serve === 'legacy') {
+    // La journalisation synchrone de chaque requête fait partie du coût mesuré,
+    // mais elle est écrite dans le périphérique nul plutôt qu'à l'écran
+    const devNull = fs.openSync(os.devNull, 'w');
+    console.log = (...args) => fs.writeSync(devNull, util.format(...args) + '\n');
+    app.post('/soap', express.raw({ type: 'text/xml', limit: '10mb' }), createLegacyHandler(operations));
+  } else {
+    const { createSoapRequestHandler } = require('../services/soap/requestHandler');
+    app.post('/soap', createSoapRequestHandler(operations, { logSampleRate: 0 }));
+  }
+  const server = app.listen(0, '127.0.0.1', () => process.send({ port: server.address().port }));
+  process.on('disconnect', () => process.exit(0));
+};
+
+const ENVELOPE_ARGS = {
+  authenticateUser: '<username>admin</username><password>admin123</password>',
+  listUsers: '<token>bench-token</token>',
+  addUser: '<token>bench-token</token><username>bench_user</username><password>password123</password><role>VISITEUR</role>',
+  updateUser: '<token>bench-token</token><userId>1</userId><role>EDITEUR</role>',
+  deleteUser: '<token>bench-token</token><userId>1</userId>'
+};
+
+const buildEnvelope = operation => Buffer.from(`<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" xmlns:soap="http://newschronicle.com/soap">
+   <soapenv:Header/>
+   <soapenv:Body>
+      <soap:${operation}>${ENVELOPE_ARGS[operation]}</soap:${operation}>
+   </soapenv:Body>
+</soapenv:Envelope>`);
+
+const percentile = (sorted, fraction) => (sorted.length ? sorted[Math.min(sorted.length - 1, Math.floor(fraction * sorted.length))] : 0);
+
+// Charge à concurrence fixe pendant `durationMs` ; renvoie { requests, errors, latencies }
+const runLoad = (port, envelopes, concurrency, durationMs) => new Promise((resolve) => {
+  const agent = new http.Agent({ keepAlive: true, maxSockets: concurrency });
+  const stats = { requests: 0, errors: 0, latencies: [] };
+  const deadline = Date.now() + durationMs;
+  let active = concurrency;
+  let sent = 0;
+
+  const next = () => {
+    if (Date.now() >= deadline) {
+      if (--active === 0) {
+        agent.destroy();
+        resolve(stats);
+      }
+      return;
+    }
+    const body = envelopes[sent++ % envelopes.length];
+    const startedAt = process.hrtime.bigint();
+    const req = http.request({
+      host: '127.0.0.1',
+      port,
+      path: '/soap',
+      method: 'POST',
+      agent,
+      headers: { 'Content-Type': 'text/xml; charset=utf-8', 'Content-Length': body.length }
+    }, (res) => {
+      res.on('data', () => {});
+      res.on('end', () => {
+        stats.requests++;
+        if (res.statusCode !== 200) {
+          stats.errors++;
+        }
+        stats.latencies.push(Number(process.hrtime.bigint() - startedAt) / 1e6);
+        next();
+      });
+    });
+    req.on('error', () => {
+      stats.errors++;
+      next();
+    });
+    req.end(body);
+  };
+
+  for (let index = 0; index < concurrency; index++) {
+    next();
+  }
+});
+
+const benchmark = async (pipeline, options, envelopes) => {
+  const child = fork(__filename, ['--serve', pipeline, '--users', String(options.users)]);
+  const { port } = await new Promise((resolve, reject) => {
+    child.once('message', resolve);
+    child.once('exit', code => reject(new Error(`Serveur ${pipeline} arrêté (code ${code})`)));
+  });
+  try {
+    // Échauffement (compilation JIT, connexions keep-alive)
+    await runLoad(port, envelopes, options.concurrency, 1000);
+    const stats = await runLoad(port, envelopes, options.concurrency, options.duration * 1000);
+    stats.latencies.sort((a, b) => a - b);
+    return {
+      pipeline,
+      rps: stats.requests / options.duration,
+      errors: stats.errors,
+      p50: percentile(stats.latencies, 0.5),
+      p99: percentile(stats.latencies, 0.99)
+    };
+  } finally {
+    child.disconnect();
+  }
+};
+
+const main = async () => {
+  const options = parseArgs(process.argv.slice(2));
+  if (options.serve) {
+    serve(options);
+    return;
+  }
+  const operations = options.operation === 'mix' ? OPERATIONS : [options.operation];
+  if (!operations.every(operation => OPERATIONS.includes(operation))) {
+    throw new Error(`Opération inconnue: ${options.operation} (${OPERATIONS.join(', ')} ou mix)`);
+  }
+  const envelopes = operations.map(buildEnvelope);
+
+  console.log(`🚀 Benchmark POST /soap — ${operations.join(', ')}, concurrence ${options.concurrency}, ${options.duration}s par traitement, listUsers: ${options.users} utilisateurs`);
+  const results = [];
+  for (const pipeline of PIPELINES) {
+    const result = await benchmark(pipeline, options, envelopes);
+    results.push(result);
+    console.log(`   ${pipeline.padEnd(8)} ${result.rps.toFixed(0).padStart(8)} req/s   p50 ${result.p50.toFixed(2)} ms   p99 ${result.p99.toFixed(2)} ms   erreurs ${result.errors}`);
+  }
+  const [legacy, stream] = results;
+  console.log(`📊 Rapport de débit (stream / legacy): x${(stream.rps / legacy.rps).toFixed(2)}`);
+};
+
+main().catch((error) => {
+  console.error('❌ Erreur lors du benchmark:', error.message);
+  process.exit(1);
+});
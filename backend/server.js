@@ -9,6 +9,7 @@ const { syncModels } = require('./models');
 
 // Import des middlewares
 const formatResponse = require('./middleware/responseFormat');
+const { compressResponses } = require('./middleware/compression');
 
 // Import des routes
 const routes = require('./routes');
@@ -31,6 +32,9 @@ app.use(bodyParser.urlencoded({ extended: true, limit: '10mb' }));
 // Middleware de format de réponse (JSON/XML)
 app.use(formatResponse);
 
+// Compression des réponses volumineuses (SOAP et API REST publique)
+app.use(['/soap', '/api/rest'], compressResponses());
+
 // Routes API
 app.use('/api', routes);
 
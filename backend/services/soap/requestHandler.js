@@ -0,0 +1,57 @@
+const { parseSoapRequest, decodeRequestBody, discardRequestBody } = require('./requestParser');
+const { sendSoapResponse } = require('./responseWriter');
+
+// Proportion des requêtes SOAP journalisées (0 = aucune, 1 = toutes)
+// Les paramètres ne sont jamais journalisés : ils contiennent des mots de passe
+const LOG_SAMPLE_RATE = Math.min(Math.max(parseFloat(process.env.SOAP_LOG_SAMPLE_RATE) || 0, 0), 1);
+
+// Journal des requêtes échantillonnées, écrit par lots hors du traitement de la requête
+let pendingLogLines = [];
+const logSoapRequest = (line) => {
+  if (pendingLogLines.length === 0) {
+    setImmediate(() => {
+      const lines = pendingLogLines;
+      pendingLogLines = [];
+      process.stdout.write(lines.join(''));
+    });
+  }
+  pendingLogLines.push(`${new Date().toISOString()} ${line}\n`);
+};
+
+// Traiter une requête SOAP : analyse en flux, gestionnaire du registre, réponse échappée
+// `operations` associe le nom de l'élément de requête à son gestionnaire.
+// Un corps compressé (Content-Encoding gzip, deflate ou br) est décompressé au fil de l'analyse.
+const createSoapRequestHandler = (operations, { logSampleRate = LOG_SAMPLE_RATE } = {}) => async (req, res) => {
+  const startedAt = logSampleRate > 0 && Math.random() < logSampleRate ? process.hrtime.bigint() : null;
+  let operation = 'error';
+  let statusCode = 200;
+  let body = req;
+  try {
+    body = decodeRequestBody(req);
+    const request = await parseSoapRequest(body);
+    const handler = operations.get(request.operation);
+    if (!handler) {
+      throw new Error('Opération SOAP non reconnue');
+    }
+    operation = request.operation;
+    sendSoapResponse(res, statusCode, operation, await handler(request.args));
+  } catch (error) {
+    console.error('Erreur lors du traitement SOAP:', error.message);
+    if (!body.readableEnded) {
+      discardRequestBody(req, body);
+    }
+    operation = 'error';
+    statusCode = error.statusCode || 500;
+    // Réponse d'erreur générique
+    sendSoapResponse(res, statusCode, operation, {
+      success: false,
+      message: 'Erreur interne du serveur: ' + error.message
+    });
+  }
+  if (startedAt !== null) {
+    const durationMs = Number(process.hrtime.bigint() - startedAt) / 1e6;
+    logSoapRequest(`SOAP ${operation} ${statusCode} ${durationMs.toFixed(1)}ms`);
+  }
+};
+
+module.exports = { createSoapRequestHandler, LOG_SAMPLE_RATE };
@@ -0,0 +1,260 @@
+const sax = require('sax');
+const { StringDecoder } = require('string_decoder');
+const zlib = require('zlib');
+
+// Taille maximale d'une requête SOAP (même limite que l'ancien express.raw)
+const MAX_REQUEST_BYTES = parseInt(process.env.SOAP_MAX_REQUEST_BYTES, 10) || 10 * 1024 * 1024;
+// Analyseurs conservés pour les requêtes suivantes
+const MAX_IDLE_PARSERS = 64;
+
+// Erreur d'analyse d'une requête SOAP, avec le code HTTP à renvoyer
+class SoapRequestError extends Error {
+  constructor(message, statusCode = 500) {
+    super(message);
+    this.name = 'SoapRequestError';
+    this.statusCode = statusCode;
+  }
+}
+
+const localName = (name) => {
+  const index = name.indexOf(':');
+  return index === -1 ? name : name.slice(index + 1);
+};
+
+// Analyseur SAX d'une requête SOAP
+// Seuls l'opération (premier élément de soap:Body) et le texte de ses
+// éléments enfants sont conservés : pas d'arbre intermédiaire comme avec
+// xml2js. Un analyseur est réutilisé d'une requête à l'autre (reset).
+class SoapRequestParser {
+  constructor() {
+    this.parser = sax.parser(true, { trim: false, normalize: false, position: false });
+    this.parser.onopentag = node => this.openTag(node.name);
+    this.parser.onclosetag = () => this.closeTag();
+    this.parser.ontext = text => this.text(text);
+    this.parser.oncdata = text => this.text(text);
+    this.parser.ondoctype = () => {
+      this.error = this.error || new SoapRequestError('DOCTYPE non autorisé dans une requête SOAP', 400);
+    };
+    this.parser.onerror = error => {
+      this.error = this.error || new SoapRequestError(`XML invalide: ${error.message.split('\n')[0]}`, 400);
+    };
+    this.reset();
+  }
+
+  reset() {
+    this.depth = 0;
+    this.inEnvelope = false;
+    this.inBody = false;
+    this.operation = null;
+    this.operationDepth = 0;
+    this.args = Object.create(null);
+    this.argName = null;
+    this.argValue = '';
+    this.error = null;
+  }
+
+  openTag(name) {
+    this.depth++;
+    const local = localName(name);
+    if (this.depth === 1) {
+      this.inEnvelope = local === 'Envelope';
+    } else if (this.depth === 2 && this.inEnvelope && local === 'Body') {
+      this.inBody = true;
+    } else if (this.depth === 3 && this.inBody && this.operation === null) {
+      this.operation = local;
+      this.operationDepth = 3;
+    } else if (this.depth === 4 && this.operationDepth === 3) {
+      this.argName = local;
+      this.argValue = '';
+    }
+  }
+
+  closeTag() {
+    if (this.depth === 4 && this.argName !== null) {
+      this.args[this.argName] = this.argValue;
+      this.argName = null;
+    } else if (this.depth === 3) {
+      this.operationDepth = 0;
+    } else if (this.depth === 2) {
+      this.inBody = false;
+    }
+    this.depth--;
+  }
+
+  text(text) {
+    // Texte d'un paramètre (y compris celui d'éventuels éléments imbriqués)
+    if (this.argName !== null) {
+      this.argValue += text;
+    }
+  }
+
+  write(text) {
+    if (!this.error) {
+      this.parser.write(text);
+    }
+  }
+
+  // Terminer l'analyse ; renvoie { operation, args } ou lève une SoapRequestError
+  finish() {
+    if (!this.error) {
+      this.parser.close();
+    }
+    if (this.error) {
+      throw this.error;
+    }
+    if (!this.inEnvelope) {
+      throw new SoapRequestError('Enveloppe SOAP manquante', 400);
+    }
+    if (this.operation === null) {
+      throw new SoapRequestError('Opération SOAP non reconnue');
+    }
+    return { operation: this.operation, args: this.args };
+  }
+}
+
+const idleParsers = [];
+
+const acquireParser = () => {
+  const parser = idleParsers.pop() || new SoapRequestParser();
+  parser.reset();
+  return parser;
+};
+
+const releaseParser = (parser) => {
+  // Un analyseur en erreur n'est pas réutilisé (état sax incohérent)
+  if (!parser.error && idleParsers.length < MAX_IDLE_PARSERS) {
+    idleParsers.push(parser);
+  }
+};
+
+// Analyser une requête SOAP complète (chaîne ou Buffer)
+const parseSoapXml = (xml) => {
+  const parser = acquireParser();
+  try {
+    parser.write(Buffer.isBuffer(xml) ? xml.toString('utf8') : xml);
+    return parser.finish();
+  } finally {
+    releaseParser(parser);
+  }
+};
+
+// Analyser le corps d'une requête HTTP au fil de sa réception
+// Le texte est décodé par morceaux (caractères UTF-8 coupés entre deux
+// morceaux compris) et donné à l'analyseur sans jamais être concaténé.
+const parseSoapRequest = (stream, { limit = MAX_REQUEST_BYTES } = {}) => new Promise((resolve, reject) => {
+  const parser = acquireParser();
+  const decoder = new StringDecoder('utf8');
+  let received = 0;
+  let settled = false;
+
+  const settle = (error, result) => {
+    if (settled) {
+      return;
+    }
+    settled = true;
+    stream.removeListener('data', onData);
+    stream.removeListener('end', onEnd);
+    stream.removeListener('error', onError);
+    stream.removeListener('close', onClose);
+    if (error) {
+      // Laisser le reste du corps s'écouler pour pouvoir répondre
+      stream.resume();
+      reject(error);
+    } else {
+      // Seul un analyseur arrivé au bout du document est réutilisable
+      releaseParser(parser);
+      resolve(result);
+    }
+  };
+
+  const onData = (chunk) => {
+    received += chunk.length;
+    if (received > limit) {
+      settle(new SoapRequestError('Requête SOAP trop volumineuse', 413));
+      return;
+    }
+    parser.write(decoder.write(chunk));
+    if (parser.error) {
+      settle(parser.error);
+    }
+  };
+
+  const onEnd = () => {
+    try {
+      parser.write(decoder.end());
+      settle(null, parser.finish());
+    } catch (error) {
+      settle(error instanceof SoapRequestError ? error : new SoapRequestError(error.message));
+    }
+  };
+
+  const onError = error => settle(error instanceof SoapRequestError
+    ? error
+    : new SoapRequestError(`Corps de requête illisible: ${error.message}`, 400));
+  // Connexion fermée par le client avant la fin du corps
+  const onClose = () => settle(new SoapRequestError('Requête SOAP interrompue', 400));
+
+  stream.on('data', onData);
+  stream.on('end', onEnd);
+  stream.on('error', onError);
+  stream.on('close', onClose);
+});
+
+// Décompresseurs des corps de requête (en-tête Content-Encoding)
+const decompressors = {
+  gzip: () => zlib.createGunzip(),
+  'x-gzip': () => zlib.createGunzip(),
+  deflate: () => zlib.createInflate(),
+  br: () => zlib.createBrotliDecompress()
+};
+
+// Corps d'une requête HTTP, décompressé au fil de la réception si besoin
+// La limite de parseSoapRequest porte sur le XML décompressé ; les octets
+// reçus sont aussi limités ici, avant décompression.
+const decodeRequestBody = (req, { limit = MAX_REQUEST_BYTES } = {}) => {
+  const contentEncoding = (req.headers['content-encoding'] || 'identity').trim().toLowerCase();
+  if (contentEncoding === 'identity') {
+    return req;
+  }
+  const createDecompressor = decompressors[contentEncoding];
+  if (!createDecompressor) {
+    throw new SoapRequestError(`Encodage de requête non supporté: ${contentEncoding}`, 415);
+  }
+  const decompressor = createDecompressor();
+  // Les erreurs sont traitées par parseSoapRequest ; celles survenant après
+  // l'abandon du corps ne doivent pas arrêter le processus
+  decompressor.on('error', () => {});
+  let received = 0;
+  req.on('data', (chunk) => {
+    received += chunk.length;
+    if (received > limit) {
+      decompressor.destroy(new SoapRequestError('Requête SOAP trop volumineuse', 413));
+    }
+  });
+  // Sans cela, une connexion fermée en cours d'envoi laisserait le décompresseur en attente
+  req.on('close', () => {
+    if (!req.complete) {
+      decompressor.destroy(new SoapRequestError('Requête SOAP interrompue', 400));
+    }
+  });
+  return req.pipe(decompressor);
+};
+
+// Abandonner le corps d'une requête en erreur (décompression arrêtée, reste ignoré)
+const discardRequestBody = (req, body) => {
+  if (body !== req) {
+    req.unpipe(body);
+    body.destroy();
+  }
+  req.resume();
+};
+
+module.exports = {
+  SoapRequestError,
+  SoapRequestParser,
+  parseSoapXml,
+  parseSoapRequest,
+  decodeRequestBody,
+  discardRequestBody,
+  MAX_REQUEST_BYTES
+};
@@ -0,0 +1,45 @@
+// Champs d'une réponse SOAP, dans l'ordre d'écriture
+const RESPONSE_FIELDS = ['success', 'message', 'role', 'token', 'userId', 'users', 'serverTime', 'userIds', 'total', 'results'];
+
+const XML_ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', '\'': '&apos;' };
+const XML_SPECIAL_CHARS = /[&<>"']/;
+const XML_SPECIAL_CHARS_GLOBAL = /[&<>"']/g;
+
+// Échapper une valeur pour le contenu d'un élément XML
+// (la plupart des valeurs n'ont rien à échapper : pas de remplacement dans ce cas)
+const escapeXml = (value) => {
+  const text = String(value);
+  return XML_SPECIAL_CHARS.test(text) ? text.replace(XML_SPECIAL_CHARS_GLOBAL, char => XML_ESCAPES[char]) : text;
+};
+
+const ENVELOPE_START = '<?xml version="1.0" encoding="UTF-8"?>'
+  + '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" xmlns:soap="http://newschronicle.com/soap">'
+  + '<soapenv:Header/><soapenv:Body>';
+const ENVELOPE_END = '</soapenv:Body></soapenv:Envelope>';
+
+// Créer une réponse SOAP avec la bonne balise (ex: authenticateUserResponse)
+// Les valeurs sont échappées : un nom d'utilisateur ou un JSON contenant
+// & ou < ne produit plus un document invalide
+const createSoapResponse = (operation, result) => {
+  const responseTag = `${operation}Response`;
+  let bodyContent = '';
+  for (const field of RESPONSE_FIELDS) {
+    const value = result[field];
+    if (value !== undefined) {
+      bodyContent += `<${field}>${escapeXml(value)}</${field}>`;
+    }
+  }
+  return `${ENVELOPE_START}<${responseTag}>${bodyContent}</${responseTag}>${ENVELOPE_END}`;
+};
+
+// Envoyer une réponse SOAP
+// res.end directement : pas de calcul d'ETag sur le corps comme avec res.send
+const sendSoapResponse = (res, statusCode, operation, result) => {
+  const xml = createSoapResponse(operation, result);
+  res.statusCode = statusCode;
+  res.setHeader('Content-Type', 'text/xml; charset=utf-8');
+  res.setHeader('Content-Length', Buffer.byteLength(xml));
+  res.end(xml);
+};
+
+module.exports = { RESPONSE_FIELDS, escapeXml, createSoapResponse, sendSoapResponse };
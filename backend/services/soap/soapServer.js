@@ -1,7 +1,9 @@
-const express = require('express');
-const xml2js = require('xml2js');
-const { User, SoapToken } = require('../../models');
+const { Op, ValidationError } = require('sequelize');
+const { sequelize } = require('../../config/database');
+const { User } = require('../../models');
 const { generateToken } = require('../../config/jwt');
+const { tokenCache } = require('./tokenCache');
+const { createSoapRequestHandler } = require('./requestHandler');
 
 // WSDL pour le service SOAP
 const wsdl = `<?xml version="1.0" encoding="UTF-8"?>
@@ -26,12 +28,21 @@ const wsdl = `<?xml version="1.0" encoding="UTF-8"?>
 
   <message name="ListUsersRequest">
     <part name="token" type="xsd:string"/>
+    <part name="updatedSince" type="xsd:dateTime"/>
+    <part name="offset" type="xsd:integer"/>
+    <part name="limit" type="xsd:integer"/>
+    <part name="role" type="xsd:string"/>
+    <part name="usernamePrefix" type="xsd:string"/>
+    <part name="createdAfter" type="xsd:dateTime"/>
   </message>
 
   <message name="ListUsersResponse">
     <part name="users" type="xsd:string"/>
     <part name="success" type="xsd:boolean"/>
     <part name="message" type="xsd:string"/>
+    <part name="serverTime" type="xsd:dateTime"/>
+    <part name="userIds" type="xsd:string"/>
+    <part name="total" type="xsd:integer"/>
   </message>
 
   <message name="AddUserRequest">
@@ -70,6 +81,17 @@ const wsdl = `<?xml version="1.0" encoding="UTF-8"?>
     <part name="message" type="xsd:string"/>
   </message>
 
+  <message name="BatchUsersRequest">
+    <part name="token" type="xsd:string"/>
+    <part name="operations" type="xsd:string"/>
+  </message>
+
+  <message name="BatchUsersResponse">
+    <part name="success" type="xsd:boolean"/>
+    <part name="message" type="xsd:string"/>
+    <part name="results" type="xsd:string"/>
+  </message>
+
   <portType name="NewsChroniclePortType">
     <operation name="authenticateUser">
       <input message="tns:AuthenticateUserRequest"/>
@@ -91,6 +113,10 @@ const wsdl = `<?xml version="1.0" encoding="UTF-8"?>
       <input message="tns:DeleteUserRequest"/>
       <output message="tns:DeleteUserResponse"/>
     </operation>
+    <operation name="batchUsers">
+      <input message="tns:BatchUsersRequest"/>
+      <output message="tns:BatchUsersResponse"/>
+    </operation>
   </portType>
 
   <binding name="NewsChronicleBinding" type="tns:NewsChroniclePortType">
@@ -120,6 +146,11 @@ const wsdl = `<?xml version="1.0" encoding="UTF-8"?>
       <input><soap:body use="literal"/></input>
       <output><soap:body use="literal"/></output>
     </operation>
+    <operation name="batchUsers">
+      <soap:operation soapAction="batchUsers"/>
+      <input><soap:body use="literal"/></input>
+      <output><soap:body use="literal"/></output>
+    </operation>
   </binding>
 
   <service name="NewsChronicleService">
@@ -129,49 +160,38 @@ const wsdl = `<?xml version="1.0" encoding="UTF-8"?>
   </service>
 </definitions>`;
 
+// Nombre maximal d'opérations dans un appel batchUsers
+const MAX_BATCH_SIZE = 1000;
+
+// Taille de page maximale pour listUsers lorsque la pagination est utilisée
+const MAX_LIST_USERS_LIMIT = 1000;
+
+// Échapper les caractères spéciaux d'un motif LIKE
+const escapeLike = (value) => value.replace(/[\\%_]/g, '\\$&');
+
+// Point de départ de la prochaine actualisation différentielle
+// createdAt/updatedAt sont des DATETIME MySQL à la seconde (valeur arrondie) :
+// une modification faite dans la même seconde que l'instantané peut être
+// enregistrée avec une date antérieure à celui-ci. On recule donc à la
+// seconde entière précédente ; les utilisateurs renvoyés deux fois sont
+// simplement fusionnés à nouveau par le client.
+const syncWatermark = (date) => new Date(Math.floor(date.getTime() / 1000) * 1000 - 1000);
+
+// Convertir un paramètre SOAP en date (null si absent, NaN si invalide)
+const parseDateParam = (value) => (value ? new Date(value) : null);
+
 // Fonction pour vérifier un token SOAP
+// Les tokens validés sont mis en cache et la date de dernière utilisation est
+// écrite par lots (voir tokenCache.js) : pas d'aller-retour en base par appel
 const verifySoapToken = async (token) => {
   try {
-    const soapToken = await SoapToken.findValidToken(token);
-    if (!soapToken) {
-      return null;
-    }
-    
-    // Mettre à jour la date de dernière utilisation
-    await soapToken.updateLastUsed();
-    
-    return soapToken;
+    return await tokenCache.verify(token);
   } catch (error) {
     console.error('Erreur lors de la vérification du token SOAP:', error);
     return null;
   }
 };
 
-// Fonction pour créer une réponse SOAP avec la bonne balise
-const createSoapResponse = (operation, result) => {
-  // Nom de la balise de réponse, ex: authenticateUserResponse
-  const responseTag = `${operation}Response`;
-  let bodyContent = '';
-  // Générer le contenu selon les champs présents
-  if (result.success !== undefined) bodyContent += `<success>${result.success}</success>`;
-  if (result.message !== undefined) bodyContent += `<message>${result.message}</message>`;
-  if (result.role !== undefined) bodyContent += `<role>${result.role}</role>`;
-  if (result.token !== undefined) bodyContent += `<token>${result.token}</token>`;
-  if (result.userId !== undefined) bodyContent += `<userId>${result.userId}</userId>`;
-  if (result.users !== undefined) bodyContent += `<users>${result.users}</users>`;
-
-  const response = `<?xml version="1.0" encoding="UTF-8"?>
-<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" xmlns:soap="http://newschronicle.com/soap">
-   <soapenv:Header/>
-   <soapenv:Body>
-      <${responseTag}>
-        ${bodyContent}
-      </${responseTag}>
-   </soapenv:Body>
-</soapenv:Envelope>`;
-  return response;
-};
-
 // Initialiser le serveur SOAP
 const initSoapServer = (app) => {
   // Route pour servir le WSDL
@@ -180,93 +200,17 @@ const initSoapServer = (app) => {
     res.send(wsdl);
   });
 
-  // Route pour traiter les requêtes SOAP
-  app.post('/soap', express.raw({ type: 'text/xml', limit: '10mb' }), async (req, res) => {
-    try {
-      const xmlData = req.body.toString();
-      console.log('Requête SOAP reçue:', xmlData.substring(0, 200) + '...');
-
-      // Parser le XML
-      const parser = new xml2js.Parser({ explicitArray: false });
-      const result = await parser.parseStringPromise(xmlData);
-
-      // Extraire l'opération et les paramètres
-      const envelope = result['soapenv:Envelope'] || result['soap:Envelope'];
-      const body = envelope['soapenv:Body'] || envelope['soap:Body'];
-      
-      let operation = null;
-      let args = {};
-
-      // Détecter l'opération
-      if (body['soap:authenticateUser']) {
-        operation = 'authenticateUser';
-        args = body['soap:authenticateUser'];
-      } else if (body['soap:listUsers']) {
-        operation = 'listUsers';
-        args = body['soap:listUsers'];
-      } else if (body['soap:addUser']) {
-        operation = 'addUser';
-        args = body['soap:addUser'];
-      } else if (body['soap:updateUser']) {
-        operation = 'updateUser';
-        args = body['soap:updateUser'];
-      } else if (body['soap:deleteUser']) {
-        operation = 'deleteUser';
-        args = body['soap:deleteUser'];
-      }
-
-      if (!operation) {
-        throw new Error('Opération SOAP non reconnue');
-      }
-
-      console.log(`Opération SOAP: ${operation}`, args);
-
-      // Exécuter l'opération
-      let response;
-      switch (operation) {
-        case 'authenticateUser':
-          response = await handleAuthenticateUser(args);
-          break;
-        case 'listUsers':
-          response = await handleListUsers(args);
-          break;
-        case 'addUser':
-          response = await handleAddUser(args);
-          break;
-        case 'updateUser':
-          response = await handleUpdateUser(args);
-          break;
-        case 'deleteUser':
-          response = await handleDeleteUser(args);
-          break;
-        default:
-          response = { success: false, message: 'Opération non supportée' };
-      }
-
-      // Envoyer la réponse SOAP avec la bonne balise
-      const soapResponse = createSoapResponse(operation, response);
-      res.set('Content-Type', 'text/xml; charset=utf-8');
-      res.send(soapResponse);
-
-    } catch (error) {
-      console.error('Erreur lors du traitement SOAP:', error);
-      // Réponse d'erreur générique
-      const soapResponse = createSoapResponse('error', {
-        success: false,
-        message: 'Erreur interne du serveur: ' + error.message
-      });
-      res.set('Content-Type', 'text/xml; charset=utf-8');
-      res.status(500).send(soapResponse);
-    }
-  });
+  // Route pour traiter les requêtes SOAP (corps lu et analysé en flux)
+  app.post('/soap', createSoapRequestHandler(soapOperations));
 
   console.log('✅ Serveur SOAP initialisé sur /soap');
   console.log('📋 Méthodes disponibles:');
   console.log('   - authenticateUser(username, password)');
-  console.log('   - listUsers(token) - ADMIN uniquement (token SOAP requis)');
+  console.log('   - listUsers(token, offset, limit, role, usernamePrefix, createdAfter, updatedSince) - ADMIN uniquement (token SOAP requis)');
   console.log('   - addUser(token, username, password, role) - ADMIN uniquement (token SOAP requis)');
   console.log('   - updateUser(token, userId, username, password, role) - ADMIN uniquement (token SOAP requis)');
   console.log('   - deleteUser(token, userId) - ADMIN uniquement (token SOAP requis)');
+  console.log('   - batchUsers(token, operations) - ADMIN uniquement (token SOAP requis)');
 };
 
 // Gestionnaires d'opérations SOAP
@@ -331,7 +275,7 @@ const handleAuthenticateUser = async (args) => {
 
 const handleListUsers = async (args) => {
   try {
-    const { token } = args;
+    const { token, updatedSince, offset, limit, role, usernamePrefix, createdAfter } = args;
     
     if (!token) {
       return {
@@ -351,9 +295,46 @@ const handleListUsers = async (args) => {
       };
     }
     
-    // Récupérer tous les utilisateurs
-    const users = await User.findAll({
-      attributes: ['id', 'username', 'role', 'createdAt']
+    // Filtres
+    const filters = {};
+    if (role) filters.role = role;
+    if (usernamePrefix) filters.username = { [Op.like]: `${escapeLike(usernamePrefix)}%` };
+    const createdAfterDate = parseDateParam(createdAfter);
+    const since = parseDateParam(updatedSince);
+    if ((createdAfterDate && isNaN(createdAfterDate.getTime())) || (since && isNaN(since.getTime()))) {
+      return {
+        success: false,
+        message: 'Paramètre de date invalide',
+        users: ''
+      };
+    }
+    if (createdAfterDate) filters.createdAt = { [Op.gt]: createdAfterDate };
+    
+    // Pagination (sans limit, tous les utilisateurs sont renvoyés)
+    const pageOffset = offset !== undefined ? parseInt(offset, 10) : 0;
+    const pageLimit = limit !== undefined ? parseInt(limit, 10) : null;
+    if (isNaN(pageOffset) || pageOffset < 0 || (pageLimit !== null && (isNaN(pageLimit) || pageLimit < 1))) {
+      return {
+        success: false,
+        message: 'Paramètres de pagination invalides',
+        users: ''
+      };
+    }
+    
+    // Actualisation différentielle : seulement les utilisateurs modifiés depuis updatedSince
+    const where = { ...filters };
+    if (since) where.updatedAt = { [Op.gte]: since };
+    
+    // Horodatage pris avant la requête : point de départ de la prochaine actualisation
+    const serverTime = syncWatermark(new Date());
+    
+    // Récupérer les utilisateurs
+    const { rows: users, count } = await User.findAndCountAll({
+      where,
+      attributes: ['id', 'username', 'role', 'createdAt'],
+      order: [['id', 'ASC']],
+      offset: pageOffset,
+      ...(pageLimit !== null && { limit: Math.min(pageLimit, MAX_LIST_USERS_LIMIT) })
     });
     
     const usersJson = JSON.stringify(users.map(user => ({
@@ -363,11 +344,21 @@ const handleListUsers = async (args) => {
       createdAt: user.createdAt
     })));
     
-    return {
+    const response = {
       success: true,
       message: `${users.length} utilisateur(s) trouvé(s)`,
-      users: usersJson
+      users: usersJson,
+      serverTime: serverTime.toISOString(),
+      total: count
     };
+    
+    // Liste des identifiants existants pour détecter les suppressions côté client
+    if (since) {
+      const ids = await User.findAll({ where: filters, attributes: ['id'], raw: true });
+      response.userIds = JSON.stringify(ids.map(user => user.id));
+    }
+    
+    return response;
   } catch (error) {
     console.error('Erreur SOAP listUsers:', error);
     return {
@@ -560,4 +551,146 @@ const handleDeleteUser = async (args) => {
   }
 };
 
-module.exports = { initSoapServer };
\ No newline at end of file
+// Appliquer une opération d'un lot batchUsers dans la transaction en cours.
+// Les erreurs fonctionnelles sont renvoyées dans le résultat de l'opération ;
+// les autres erreurs remontent et annulent tout le lot.
+const applyBatchOperation = async (operation, index, transaction) => {
+  const { action, userId, username, password, role } = operation || {};
+  const fail = (message) => ({ index, action, success: false, message });
+  
+  try {
+    switch (action) {
+      case 'add': {
+        if (!username || !password) {
+          return fail('Nom d\'utilisateur et mot de passe requis');
+        }
+        const existingUser = await User.findOne({ where: { username }, transaction });
+        if (existingUser) {
+          return fail('Ce nom d\'utilisateur existe déjà');
+        }
+        const user = await User.create({ username, password, role: role || 'VISITEUR' }, { transaction });
+        return { index, action, success: true, userId: user.id };
+      }
+      case 'update': {
+        if (!userId) {
+          return fail('ID utilisateur requis');
+        }
+        const user = await User.findByPk(userId, { transaction });
+        if (!user) {
+          return fail('Utilisateur non trouvé');
+        }
+        if (username && username !== user.username) {
+          const existingUser = await User.findOne({ where: { username }, transaction });
+          if (existingUser) {
+            return fail('Ce nom d\'utilisateur existe déjà');
+          }
+        }
+        const updateData = {};
+        if (username) updateData.username = username;
+        if (password) updateData.password = password;
+        if (role) updateData.role = role;
+        await user.update(updateData, { transaction });
+        return { index, action, success: true, userId: user.id };
+      }
+      case 'delete': {
+        if (!userId) {
+          return fail('ID utilisateur requis');
+        }
+        const user = await User.findByPk(userId, { transaction });
+        if (!user) {
+          return fail('Utilisateur non trouvé');
+        }
+        await user.destroy({ transaction });
+        return { index, action, success: true, userId: user.id };
+      }
+      default:
+        return fail('Action inconnue (add, update ou delete attendu)');
+    }
+  } catch (error) {
+    // Erreurs de validation Sequelize (longueur, rôle invalide, unicité...)
+    if (error instanceof ValidationError) {
+      return fail(error.errors && error.errors.length ? error.errors[0].message : error.message);
+    }
+    throw error;
+  }
+};
+
+const handleBatchUsers = async (args) => {
+  try {
+    const { token, operations } = args;
+    
+    if (!token) {
+      return {
+        success: false,
+        message: 'Token requis',
+        results: ''
+      };
+    }
+    
+    // Une seule vérification du token SOAP pour tout le lot
+    const soapToken = await verifySoapToken(token);
+    if (!soapToken) {
+      return {
+        success: false,
+        message: 'Token invalide ou expiré',
+        results: ''
+      };
+    }
+    
+    let items;
+    try {
+      items = JSON.parse(operations || '[]');
+    } catch (error) {
+      items = null;
+    }
+    if (!Array.isArray(items)) {
+      return {
+        success: false,
+        message: 'Liste d\'opérations invalide (tableau JSON attendu)',
+        results: ''
+      };
+    }
+    if (items.length > MAX_BATCH_SIZE) {
+      return {
+        success: false,
+        message: `Trop d'opérations (maximum ${MAX_BATCH_SIZE} par lot)`,
+        results: ''
+      };
+    }
+    
+    // Toutes les opérations dans une seule transaction
+    const results = await sequelize.transaction(async (transaction) => {
+      const batchResults = [];
+      for (let index = 0; index < items.length; index++) {
+        batchResults.push(await applyBatchOperation(items[index], index, transaction));
+      }
+      return batchResults;
+    });
+    
+    const succeeded = results.filter(result => result.success).length;
+    return {
+      success: true,
+      message: `${succeeded}/${results.length} opération(s) réussie(s)`,
+      results: JSON.stringify(results)
+    };
+  } catch (error) {
+    console.error('Erreur SOAP batchUsers:', error);
+    return {
+      success: false,
+      message: 'Erreur interne du serveur, aucune opération appliquée',
+      results: ''
+    };
+  }
+};
+
+// Registre des opérations SOAP : nom de l'élément de requête -> gestionnaire
+const soapOperations = new Map([
+  ['authenticateUser', handleAuthenticateUser],
+  ['listUsers', handleListUsers],
+  ['addUser', handleAddUser],
+  ['updateUser', handleUpdateUser],
+  ['deleteUser', handleDeleteUser],
+  ['batchUsers', handleBatchUsers]
+]);
+
+module.exports = { initSoapServer, soapOperations };
\ No newline at end of file
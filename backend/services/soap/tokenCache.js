@@ -0,0 +1,148 @@
+const { SoapToken } = require('../../models');
+const { sequelize } = require('../../config/database');
+
+// Durée de vie d'un token validé en cache : borne le délai de prise en compte
+// d'une révocation effectuée par un autre processus
+const TOKEN_CACHE_TTL_MS = parseInt(process.env.SOAP_TOKEN_CACHE_TTL_MS, 10) || 30000;
+const TOKEN_CACHE_MAX_ENTRIES = parseInt(process.env.SOAP_TOKEN_CACHE_MAX_ENTRIES, 10) || 1000;
+// Intervalle d'écriture groupée des dates de dernière utilisation
+const LAST_USED_FLUSH_INTERVAL_MS = parseInt(process.env.SOAP_TOKEN_LAST_USED_FLUSH_MS, 10) || 5000;
+
+// Cache LRU + TTL des tokens SOAP validés
+// Un token valide n'est relu en base qu'à l'expiration de son entrée ; les
+// dates de dernière utilisation sont mises en attente puis écrites par lots
+// en une seule requête UPDATE.
+class SoapTokenCache {
+  constructor({ ttlMs = TOKEN_CACHE_TTL_MS, maxEntries = TOKEN_CACHE_MAX_ENTRIES, flushIntervalMs = LAST_USED_FLUSH_INTERVAL_MS } = {}) {
+    this.ttlMs = ttlMs;
+    this.maxEntries = maxEntries;
+    this.flushIntervalMs = flushIntervalMs;
+    this.entries = new Map(); // token -> { soapToken, expiresAt } (ordre d'insertion = ordre LRU)
+    this.pending = new Map(); // chaînes token en cours de lecture -> Promise
+    this.lastUsed = new Map(); // id du token -> date de dernière utilisation à écrire
+    this.timer = null;
+  }
+
+  // Renvoie le token SOAP valide correspondant, ou null
+  async verify(tokenString) {
+    const now = Date.now();
+    const entry = this.entries.get(tokenString);
+    if (entry) {
+      this.entries.delete(tokenString);
+      if (entry.expiresAt > now && !entry.soapToken.isExpired()) {
+        this.entries.set(tokenString, entry);
+        this.touch(entry.soapToken);
+        return entry.soapToken;
+      }
+    }
+
+    // Une seule lecture en base pour les requêtes simultanées portant le même token
+    let lookup = this.pending.get(tokenString);
+    if (!lookup) {
+      lookup = SoapToken.findValidToken(tokenString).finally(() => this.pending.delete(tokenString));
+      this.pending.set(tokenString, lookup);
+    }
+    const soapToken = await lookup;
+    if (!soapToken) {
+      return null;
+    }
+
+    this.store(tokenString, soapToken);
+    this.touch(soapToken);
+    return soapToken;
+  }
+
+  store(tokenString, soapToken) {
+    // Une entrée ne survit pas à l'expiration du token lui-même
+    const expiresAt = Math.min(Date.now() + this.ttlMs, new Date(soapToken.expiresAt).getTime());
+    this.entries.delete(tokenString);
+    this.entries.set(tokenString, { soapToken, expiresAt });
+    while (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+    }
+  }
+
+  // Note l'utilisation du token ; l'écriture a lieu au prochain flush
+  touch(soapToken) {
+    const usedAt = new Date();
+    soapToken.lastUsedAt = usedAt;
+    this.lastUsed.set(soapToken.id, usedAt);
+    this.scheduleFlush();
+  }
+
+  scheduleFlush() {
+    if (this.timer || this.flushIntervalMs <= 0) {
+      return;
+    }
+    this.timer = setTimeout(() => {
+      this.timer = null;
+      this.flush().catch(error => {
+        console.error('Erreur lors de l\'enregistrement des dates d\'utilisation des tokens SOAP:', error);
+      });
+    }, this.flushIntervalMs);
+    // Le minuteur ne doit pas empêcher l'arrêt du processus
+    this.timer.unref();
+  }
+
+  // Écrit toutes les dates de dernière utilisation en attente en une requête
+  async flush() {
+    if (this.lastUsed.size === 0) {
+      return 0;
+    }
+    const batch = this.lastUsed;
+    this.lastUsed = new Map();
+
+    const queryInterface = sequelize.getQueryInterface();
+    const idColumn = queryInterface.quoteIdentifier('id');
+    const cases = [...batch]
+      .map(([id, usedAt]) => `WHEN ${sequelize.escape(id)} THEN ${sequelize.escape(usedAt)}`)
+      .join(' ');
+
+    try {
+      await SoapToken.update(
+        { lastUsedAt: sequelize.literal(`CASE ${idColumn} ${cases} END`) },
+        { where: { id: [...batch.keys()] }, silent: true }
+      );
+    } catch (error) {
+      // Remettre les dates en attente sans écraser une utilisation plus récente
+      for (const [id, usedAt] of batch) {
+        if (!this.lastUsed.has(id)) {
+          this.lastUsed.set(id, usedAt);
+        }
+      }
+      this.scheduleFlush();
+      throw error;
+    }
+    return batch.size;
+  }
+
+  // Retire un token du cache (révocation)
+  invalidate({ id, token } = {}) {
+    if (token !== undefined) {
+      this.entries.delete(token);
+    }
+    if (id !== undefined) {
+      for (const [tokenString, entry] of this.entries) {
+        if (entry.soapToken.id === id) {
+          this.entries.delete(tokenString);
+        }
+      }
+      this.lastUsed.delete(id);
+    }
+  }
+
+  clear() {
+    this.entries.clear();
+  }
+}
+
+const tokenCache = new SoapTokenCache();
+
+// Dernière écriture des dates en attente lorsque le processus se termine normalement
+process.once('beforeExit', () => {
+  tokenCache.flush().catch(error => {
+    console.error('Erreur lors de l\'enregistrement des dates d\'utilisation des tokens SOAP:', error);
+  });
+});
+
+module.exports = { SoapTokenCache, tokenCache };
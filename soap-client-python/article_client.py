@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Client de collecte des articles via l'API REST (GET /api/rest/articles)
+News Chronicle Online - Client SOAP
+
+La première page donne le nombre total de pages ; les suivantes sont
+téléchargées en parallèle par un pool borné de threads et les articles sont
+restitués dans l'ordre des pages, au fil de l'eau.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Formats acceptés par le middleware sendFormatted (en-tête Accept)
+ACCEPT_HEADERS = {"json": "application/json", "xml": "application/xml"}
+
+# Champs numériques convertis lorsque la réponse est en XML (le JSON est déjà typé)
+INTEGER_FIELDS = frozenset({"id", "categoryId", "authorId", "page", "limit", "total", "totalPages", "articleIds"})
+
+# Champs booléens convertis en XML ; un titre ou un contenu valant "true" reste du texte, comme en JSON
+BOOLEAN_FIELDS = frozenset({"success"})
+
+# Champs de la réponse qui sont toujours des tableaux (xml2js n'écrit pas de tableau vide ou à un élément distinct)
+ARRAY_FIELDS = ("data", "articleIds")
+
+# Codes HTTP transitoires justifiant une nouvelle tentative (GET est idempotent)
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+
+# updatedSince antérieur à tous les articles : la première page donne serverTime et articleIds
+EPOCH = "1970-01-01T00:00:00.000Z"
+
+def _xml_value(element):
+    """Convertit un élément XML (xml2js Builder) en valeur Python"""
+    children = list(element)
+    if not children:
+        text = element.text
+        if text is None:
+            return None
+        if element.tag in INTEGER_FIELDS and text.lstrip("-").isdigit():
+            return int(text)
+        if element.tag in BOOLEAN_FIELDS and text in ("true", "false"):
+            return text == "true"
+        return text
+    result = {}
+    for child in children:
+        value = _xml_value(child)
+        if child.tag in result:
+            # Élément répété : xml2js sérialise les tableaux en éléments frères
+            if not isinstance(result[child.tag], list):
+                result[child.tag] = [result[child.tag]]
+            result[child.tag].append(value)
+        else:
+            result[child.tag] = value
+    return result
+
+def parse_xml_page(content: bytes) -> Dict:
+    """Analyse une page XML (`<response><data>...</data>...<pagination>`) vers la forme JSON"""
+    import xml.etree.ElementTree as ET
+    root = ET.fromstring(content)
+    body = _xml_value(root) or {}
+    for field in ARRAY_FIELDS:
+        if field in body and not isinstance(body[field], list):
+            body[field] = [body[field]]
+    body.setdefault("data", [])
+    return body
+
+class ArticleClient:
+    """Client REST de lecture des articles
+
+    Les pages sont demandées avec `page`/`limit` ; `category` et `search`
+    sont transmis tels quels au serveur. Une session HTTP persistante est
+    partagée par les threads de téléchargement.
+    """
+
+    def __init__(self, base_url: str = "http://localhost:3000", response_format: str = "json",
+                 workers: int = 8, page_size: int = 100, connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0, max_retries: int = 3, backoff_factor: float = 0.5):
+        if response_format not in ACCEPT_HEADERS:
+            raise ValueError(f"Format inconnu: {response_format} (json ou xml)")
+        self.articles_url = f"{base_url}/api/rest/articles"
+        self.format = response_format
+        self.workers = workers
+        self.page_size = page_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept": ACCEPT_HEADERS[response_format], "Connection": "keep-alive"})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Ferme la session HTTP"""
+        self.session.close()
+
+    def _get(self, params: Optional[Dict] = None, url: Optional[str] = None) -> requests.Response:
+        """GET avec nouvelles tentatives (backoff exponentiel)"""
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.get(url or self.articles_url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if last_attempt:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                    return response
+            time.sleep(self.backoff_factor * (2 ** attempt))
+
+    def fetch_page(self, page: int, category: Optional[int] = None, search: Optional[str] = None,
+                   updated_since: Optional[str] = None, fields: Optional[Dict] = None,
+                   cursor: Optional[str] = None) -> Tuple[List[Dict], Dict]:
+        """Télécharge une page ; renvoie (articles, pagination)
+
+        Les autres champs de la réponse (serverTime, nextCursor, articleIds
+        avec `updated_since`) sont recopiés dans `fields` s'il est fourni.
+        Avec `cursor` (nextCursor de la page précédente), `page` est ignoré.
+        """
+        params = {"page": page, "limit": self.page_size}
+        if category is not None:
+            params["category"] = category
+        if search:
+            params["search"] = search
+        if updated_since:
+            params["updatedSince"] = updated_since
+        if cursor:
+            params["cursor"] = cursor
+        response = self._get(params)
+        body = self._read_body(response)
+        if response.status_code != 200 or not body.get("success"):
+            raise RuntimeError(body.get("error") or f"Erreur HTTP {response.status_code} (page {page})")
+        if fields is not None:
+            fields.update((key, value) for key, value in body.items() if key not in ("data", "pagination"))
+        return body.get("data") or [], body.get("pagination") or {}
+
+    def _read_body(self, response: requests.Response) -> Dict:
+        if self.format == "xml":
+            return parse_xml_page(response.content) if response.content else {}
+        try:
+            return response.json()
+        except ValueError:
+            return {}
+
+    def fetch_article(self, article_id: int) -> Optional[Dict]:
+        """Télécharge un article (GET /api/rest/articles/:id) ; None s'il n'existe plus"""
+        response = self._get(url=f"{self.articles_url}/{article_id}")
+        if response.status_code == 404:
+            return None
+        body = self._read_body(response)
+        if response.status_code != 200 or not body.get("success"):
+            raise RuntimeError(body.get("error") or f"Erreur HTTP {response.status_code} (article {article_id})")
+        data = body.get("data")
+        if isinstance(data, list):
+            # Réponse XML : `data` est toujours lu comme un tableau
+            data = data[0] if data else None
+        return data
+
+    def iter_articles(self, category: Optional[int] = None, search: Optional[str] = None,
+                      updated_since: Optional[str] = None, fields: Optional[Dict] = None) -> Iterator[Dict]:
+        """Parcourt tous les articles, dans l'ordre des pages
+
+        Au plus `2 × workers` pages sont en cours ou en attente de lecture :
+        la mémoire reste bornée même si l'appelant consomme lentement. Les
+        articles déjà vus sont ignorés (un article publié pendant la collecte
+        décale les pages suivantes). Avec `updated_since` (date ISO 8601),
+        seuls les articles modifiés depuis cette date sont renvoyés ; `fields`
+        reçoit alors `serverTime` et `articleIds` (voir fetch_page), et les
+        pages sont parcourues par curseur (voir _iter_cursor_pages).
+        """
+        page_fields: Dict = {}
+        articles, pagination = self.fetch_page(1, category, search, updated_since, page_fields)
+        if fields is not None:
+            fields.update(page_fields)
+        if updated_since and "nextCursor" in page_fields:
+            yield from articles
+            yield from self._iter_cursor_pages(page_fields["nextCursor"], category, search, updated_since)
+            return
+        total_pages = int(pagination.get("totalPages") or 1)
+        seen = set()
+
+        def fresh(page_articles: List[Dict]) -> Iterator[Dict]:
+            for article in page_articles:
+                article_id = article.get("id")
+                if article_id in seen:
+                    continue
+                seen.add(article_id)
+                yield article
+
+        yield from fresh(articles)
+        if total_pages <= 1:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="article-page") as executor:
+            pages = iter(range(2, total_pages + 1))
+            pending = deque()
+            try:
+                for page in pages:
+                    pending.append(executor.submit(self.fetch_page, page, category, search, updated_since))
+                    if len(pending) >= 2 * self.workers:
+                        break
+                while pending:
+                    page_articles, _ = pending.popleft().result()
+                    next_page = next(pages, None)
+                    if next_page is not None:
+                        pending.append(executor.submit(self.fetch_page, next_page, category, search, updated_since))
+                    yield from fresh(page_articles)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def iter_snapshot(self, category: Optional[int] = None, search: Optional[str] = None,
+                      fields: Optional[Dict] = None) -> Iterator[Dict]:
+        """Parcourt tous les articles pour une synchronisation complète
+
+        `serverTime` et `articleIds` (copiés dans `fields`) sont demandés
+        avant la collecte, qui passe ensuite par les pages en parallèle de
+        iter_articles (ordre de publication, inchangé par une modification).
+        Une suppression pendant la collecte décale les pages suivantes : les
+        articles de `articleIds` non reçus sont donc redemandés un par un
+        (ceux qui n'existent plus sont ignorés).
+        """
+        snapshot: Dict = {}
+        first_page, _ = self.fetch_page(1, category, search, EPOCH, snapshot)
+        if fields is not None:
+            fields.update((key, snapshot[key]) for key in ("serverTime", "articleIds") if key in snapshot)
+        received = set()
+        for article in chain(first_page, self.iter_articles(category, search)):
+            if article.get("id") in received:
+                continue
+            received.add(article.get("id"))
+            yield article
+        for article_id in sorted(set(snapshot.get("articleIds") or ()) - received):
+            article = self.fetch_article(article_id)
+            if article is not None:
+                yield article
+
+    def _iter_cursor_pages(self, cursor: Optional[str], category: Optional[int], search: Optional[str],
+                           updated_since: str) -> Iterator[Dict]:
+        """Pages suivantes d'une collecte incrémentale, par curseur (updatedAt, id)
+
+        Avec des offsets, un article modifié pendant la collecte passe en fin
+        de liste et l'article suivant recule sur une page déjà téléchargée :
+        il serait perdu. Le curseur évite ce décalage ; un article modifié
+        pendant la collecte peut seulement être renvoyé deux fois, sa
+        dernière version en dernier. Chaque page dépend de la précédente :
+        la suivante est demandée en arrière-plan pendant la lecture de la
+        page courante.
+        """
+        def fetch(page_cursor: str) -> Tuple[List[Dict], Optional[str]]:
+            page_fields: Dict = {}
+            page_articles, _ = self.fetch_page(1, category, search, updated_since, page_fields, cursor=page_cursor)
+            return page_articles, page_fields.get("nextCursor")
+
+        if not cursor:
+            return
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="article-page") as executor:
+            future = executor.submit(fetch, cursor)
+            try:
+                while future is not None:
+                    page_articles, cursor = future.result()
+                    future = executor.submit(fetch, cursor) if cursor else None
+                    yield from page_articles
+            finally:
+                if future is not None:
+                    future.cancel()
+
+    def write_jsonl(self, path: str, category: Optional[int] = None, search: Optional[str] = None) -> int:
+        """Écrit tous les articles dans un fichier JSONL au fil de la collecte ; renvoie leur nombre"""
+        count = 0
+        with open(path, "w", encoding="utf-8") as handle:
+            for article in self.iter_articles(category, search):
+                handle.write(json.dumps(article, ensure_ascii=False))
+                handle.write("\n")
+                count += 1
+        return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collecte de tous les articles via l'API REST")
+    parser.add_argument("output", help="Fichier JSONL de sortie (- pour la sortie standard)")
+    parser.add_argument("--url", default=os.environ.get("SOAP_URL", "http://localhost:3000"),
+                        help="URL du serveur backend (défaut: $SOAP_URL ou http://localhost:3000)")
+    parser.add_argument("--format", choices=sorted(ACCEPT_HEADERS), default="json",
+                        help="Format demandé au serveur (en-tête Accept)")
+    parser.add_argument("--workers", type=int, default=8, help="Pages téléchargées en parallèle")
+    parser.add_argument("--page-size", type=int, default=100, help="Articles par page")
+    parser.add_argument("--category", type=int, help="Filtrer par catégorie")
+    parser.add_argument("--search", help="Filtrer par texte (titre ou contenu)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    with ArticleClient(args.url, args.format, args.workers, args.page_size) as client:
+        try:
+            if args.output == "-":
+                count = 0
+                for article in client.iter_articles(args.category, args.search):
+                    sys.stdout.write(json.dumps(article, ensure_ascii=False) + "\n")
+                    count += 1
+            else:
+                count = client.write_jsonl(args.output, args.category, args.search)
+        except (requests.RequestException, RuntimeError, ValueError, OSError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+    print(f"✅ {count} article(s) collecté(s) en {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
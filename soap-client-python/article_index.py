@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Index plein texte local des articles (SQLite FTS5, classement BM25)
+News Chronicle Online - Client SOAP
+
+L'index est construit à partir de l'API REST (article_client) puis tenu à
+jour de manière incrémentale : seuls les articles modifiés depuis la
+dernière synchronisation sont téléchargés. Les recherches sont locales et
+n'ajoutent aucune charge à la base de production.
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+# Pondération BM25 des colonnes indexées (titre, contenu)
+TITLE_WEIGHT = 5.0
+CONTENT_WEIGHT = 1.0
+
+# Articles écrits par transaction pendant une synchronisation
+SYNC_BATCH_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    category_id INTEGER,
+    category_name TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS articles_category ON articles (category_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5 (
+    title, content,
+    content='articles', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    INSERT INTO articles_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+UPSERT = """
+INSERT INTO articles (id, title, content, category_id, category_name, created_at, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    title = excluded.title, content = excluded.content, category_id = excluded.category_id,
+    category_name = excluded.category_name, created_at = excluded.created_at, updated_at = excluded.updated_at
+WHERE excluded.updated_at IS NOT articles.updated_at
+    -- updatedAt est à la seconde : deux versions d'une même seconde ont la même date
+    OR excluded.title IS NOT articles.title OR excluded.content IS NOT articles.content
+    OR excluded.category_id IS NOT articles.category_id OR excluded.category_name IS NOT articles.category_name
+"""
+
+# Classement par la colonne `rank` (configurée en BM25 pondéré) : FTS5 ne
+# trie que les meilleurs résultats, les articles ne sont lus qu'ensuite
+SEARCH = """
+SELECT a.id, a.title, a.category_name, a.updated_at, hits.rank
+FROM (SELECT rowid, rank FROM articles_fts WHERE articles_fts MATCH ? ORDER BY rank LIMIT ?) AS hits
+JOIN articles a ON a.id = hits.rowid
+ORDER BY hits.rank
+"""
+
+SEARCH_IN_CATEGORY = """
+SELECT a.id, a.title, a.category_name, a.updated_at, articles_fts.rank
+FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid
+WHERE articles_fts MATCH ? AND a.category_id = ?
+ORDER BY articles_fts.rank
+LIMIT ?
+"""
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+@dataclass(frozen=True)
+class SearchResult:
+    """Article trouvé (score BM25 : plus il est faible, plus l'article est pertinent)"""
+    __slots__ = ("id", "title", "category", "updated_at", "score")
+
+    id: int
+    title: str
+    category: Optional[str]
+    updated_at: Optional[str]
+    score: float
+
+def to_match_query(text: str, prefix: bool = False) -> str:
+    """Convertit une saisie libre en requête FTS5 (tous les mots requis)
+
+    Les mots sont mis entre guillemets : la ponctuation saisie ne peut pas
+    produire une erreur de syntaxe FTS5. Avec `prefix`, le dernier mot est
+    recherché en préfixe (saisie en cours) ; les préfixes de 2 et 3
+    caractères sont indexés.
+    """
+    words = WORD_PATTERN.findall(text)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    if prefix:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+def _article_row(article: Dict) -> tuple:
+    category = article.get("category") or {}
+    return (
+        article["id"],
+        article.get("title") or "",
+        article.get("content") or "",
+        article.get("categoryId"),
+        category.get("name"),
+        article.get("createdAt"),
+        article.get("updatedAt"),
+    )
+
+class ArticleIndex:
+    """Index plein texte persistant des articles
+
+    La table `articles` conserve les champs utiles ; la table virtuelle FTS5
+    (à contenu externe) est maintenue par des déclencheurs. La date de
+    dernière synchronisation (`serverTime` renvoyé par le serveur) est
+    enregistrée dans `sync_state`.
+    """
+
+    def __init__(self, path: str = "articles.db"):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript("PRAGMA journal_mode = WAL; PRAGMA synchronous = NORMAL;"
+                                      "PRAGMA mmap_size = 268435456;")
+        self.connection.executescript(SCHEMA)
+        rank = f"bm25({TITLE_WEIGHT}, {CONTENT_WEIGHT})"
+        configured = self.connection.execute("SELECT v FROM articles_fts_config WHERE k = 'rank'").fetchone()
+        if configured is None or configured[0] != rank:
+            with self.connection:
+                self.connection.execute("INSERT INTO articles_fts (articles_fts, rank) VALUES ('rank', ?)", (rank,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    @property
+    def watermark(self) -> Optional[str]:
+        """Horodatage serveur de la dernière synchronisation (None : jamais synchronisé)"""
+        row = self.connection.execute("SELECT value FROM sync_state WHERE key = 'updated_since'").fetchone()
+        return row[0] if row else None
+
+    def _set_watermark(self, value: str):
+        self.connection.execute("INSERT INTO sync_state (key, value) VALUES ('updated_since', ?) "
+                                "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (value,))
+
+    def upsert(self, articles: Iterable[Dict]) -> int:
+        """Ajoute ou met à jour des articles par lots ; renvoie le nombre d'articles reçus"""
+        count = 0
+        batch = []
+        for article in articles:
+            batch.append(_article_row(article))
+            if len(batch) >= SYNC_BATCH_SIZE:
+                with self.connection:
+                    self.connection.executemany(UPSERT, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            with self.connection:
+                self.connection.executemany(UPSERT, batch)
+            count += len(batch)
+        return count
+
+    def retain(self, article_ids: Iterable[int]) -> int:
+        """Supprime les articles absents de `article_ids` ; renvoie le nombre de suppressions"""
+        with self.connection:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS current_ids (id INTEGER PRIMARY KEY)")
+            self.connection.execute("DELETE FROM current_ids")
+            self.connection.executemany("INSERT OR IGNORE INTO current_ids (id) VALUES (?)",
+                                        ((article_id,) for article_id in article_ids))
+            deleted = self.connection.execute(
+                "DELETE FROM articles WHERE id NOT IN (SELECT id FROM current_ids)").rowcount
+            self.connection.execute("DELETE FROM current_ids")
+        return deleted
+
+    def sync(self, client, full: bool = False) -> Dict[str, int]:
+        """Synchronise l'index avec le serveur via un ArticleClient
+
+        Sans `full`, seuls les articles modifiés depuis la dernière
+        synchronisation sont téléchargés (page après page, par curseur) et
+        les articles supprimés côté serveur sont retirés. La première
+        synchronisation est complète : ses pages sont téléchargées en
+        parallèle (`workers` du client, voir ArticleClient.iter_snapshot).
+        """
+        since = None if full else self.watermark
+        fields: Dict = {}
+        started = time.perf_counter()
+        if since is None:
+            articles = client.iter_snapshot(fields=fields)
+        else:
+            articles = client.iter_articles(updated_since=since, fields=fields)
+        received = self.upsert(articles)
+        deleted = 0
+        if fields.get("articleIds") is not None:
+            deleted = self.retain(fields["articleIds"])
+        with self.connection:
+            if fields.get("serverTime"):
+                self._set_watermark(fields["serverTime"])
+        return {"received": received, "deleted": deleted, "total": len(self),
+                "elapsed_ms": int((time.perf_counter() - started) * 1000)}
+
+    def search(self, text: str, limit: int = 10, category: Optional[int] = None,
+               raw: bool = False, prefix: bool = False) -> List[SearchResult]:
+        """Recherche plein texte classée par BM25 (titre pondéré plus fortement)
+
+        `text` est une saisie libre (tous les mots requis, voir
+        to_match_query) ; avec `raw`, c'est une requête FTS5 (OR, NEAR,
+        "phrase"...).
+        """
+        query = text if raw else to_match_query(text, prefix)
+        if not query:
+            return []
+        if category is None:
+            rows = self.connection.execute(SEARCH, (query, limit))
+        else:
+            rows = self.connection.execute(SEARCH_IN_CATEGORY, (query, category, limit))
+        return [SearchResult(*row) for row in rows]
+
+    def optimize(self):
+        """Fusionne les segments FTS5 (après une synchronisation volumineuse)"""
+        with self.connection:
+            self.connection.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index plein texte local des articles")
+    parser.add_argument("--db", default=os.environ.get("ARTICLE_INDEX", "articles.db"),
+                        help="Fichier de l'index (défaut: $ARTICLE_INDEX ou articles.db)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = subparsers.add_parser("sync", help="Synchroniser l'index avec le serveur")
+    sync_parser.add_argument("--url", default=os.environ.get("SOAP_URL", "http://localhost:3000"),
+                             help="URL du serveur backend (défaut: $SOAP_URL ou http://localhost:3000)")
+    sync_parser.add_argument("--full", action="store_true", help="Tout retélécharger")
+    sync_parser.add_argument("--workers", type=int, default=8,
+                             help="Pages téléchargées en parallèle (synchronisation complète)")
+    sync_parser.add_argument("--page-size", type=int, default=500, help="Articles par page")
+
+    search_parser = subparsers.add_parser("search", help="Rechercher dans l'index")
+    search_parser.add_argument("query")
+    search_parser.add_argument("-n", "--limit", type=int, default=10)
+    search_parser.add_argument("--category", type=int, help="Filtrer par catégorie")
+    search_parser.add_argument("--raw", action="store_true", help="Requête en syntaxe FTS5")
+    search_parser.add_argument("--prefix", action="store_true", help="Dernier mot recherché en préfixe")
+    args = parser.parse_args(argv)
+
+    with ArticleIndex(args.db) as index:
+        if args.command == "sync":
+            from article_client import ArticleClient
+            import requests
+            with ArticleClient(args.url, workers=args.workers, page_size=args.page_size) as client:
+                try:
+                    stats = index.sync(client, full=args.full)
+                except (requests.RequestException, RuntimeError) as e:
+                    print(f"❌ {e}", file=sys.stderr)
+                    return 1
+            if args.full:
+                index.optimize()
+            print(f"✅ {stats['received']} article(s) reçu(s), {stats['deleted']} supprimé(s), "
+                  f"{stats['total']} dans l'index ({stats['elapsed_ms']} ms)")
+            return 0
+
+        try:
+            started = time.perf_counter()
+            results = index.search(args.query, args.limit, args.category, args.raw, args.prefix)
+            elapsed = (time.perf_counter() - started) * 1000
+        except sqlite3.OperationalError as e:
+            print(f"❌ Requête invalide: {e}", file=sys.stderr)
+            return 1
+        for result in results:
+            print(f"{result.id:<7} {result.score:8.2f}  {result.title}  [{result.category or '-'}]")
+        print(f"🔎 {len(results)} résultat(s) en {elapsed:.2f} ms", file=sys.stderr)
+        return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
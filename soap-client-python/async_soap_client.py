@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Client SOAP asynchrone (asyncio) pour la gestion des utilisateurs
+News Chronicle Online - Client SOAP
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Iterable, List, Optional
+
+from soap_user_manager import SoapClient, User
+
+class AsyncSoapClient:
+    """Équivalent asyncio de SoapClient
+
+    Les appels SOAP sont exécutés dans un pool de threads dédié qui partage la
+    session HTTP persistante de SoapClient : le nombre de requêtes en vol est
+    borné par `max_concurrency`, qui dimensionne aussi le pool de connexions.
+    """
+
+    def __init__(self, base_url: str = "http://localhost:3000", max_concurrency: int = 32,
+                 verbose: bool = False, **client_options):
+        self.max_concurrency = max_concurrency
+        self._client = SoapClient(base_url, pool_size=max_concurrency, verbose=verbose, **client_options)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="soap")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Attend la fin des appels en cours puis ferme la session HTTP"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self._executor.shutdown, wait=True))
+        self._client.close()
+
+    @property
+    def auth_token(self) -> Optional[str]:
+        return self._client.auth_token
+
+    @property
+    def soap_token(self) -> Optional[str]:
+        return self._client.soap_token
+
+    def set_soap_token(self, token: str):
+        """Définit le token SOAP pour les opérations d'administration"""
+        self._client.set_soap_token(token)
+
+    async def _run(self, func, *args, **kwargs):
+        """Exécute un appel bloquant de SoapClient dans le pool de threads"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def authenticate_user(self, username: str, password: str) -> bool:
+        """Authentifie un utilisateur"""
+        return await self._run(self._client.authenticate_user, username, password)
+
+    async def list_users(self) -> List[User]:
+        """Liste tous les utilisateurs"""
+        return await self._run(self._client.list_users)
+
+    async def add_user(self, username: str, password: str, role: str = "VISITEUR") -> bool:
+        """Ajoute un nouvel utilisateur"""
+        return await self._run(self._client.add_user, username, password, role)
+
+    async def update_user(self, user_id: int, username: str = None, password: str = None, role: str = None) -> bool:
+        """Met à jour un utilisateur"""
+        return await self._run(self._client.update_user, user_id, username, password, role)
+
+    async def delete_user(self, user_id: int) -> bool:
+        """Supprime un utilisateur"""
+        return await self._run(self._client.delete_user, user_id)
+
+    async def gather(self, calls: Iterable[Awaitable], concurrency: Optional[int] = None,
+                     return_exceptions: bool = True) -> List[Any]:
+        """Exécute plusieurs opérations en parallèle, au plus `concurrency` à la fois
+
+        Les résultats sont renvoyés dans l'ordre des appels. Avec
+        `return_exceptions`, une exception est renvoyée à la place du résultat
+        de l'appel qui l'a levée au lieu d'interrompre les autres.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.max_concurrency)
+
+        async def bounded(call: Awaitable):
+            async with semaphore:
+                return await call
+
+        return await asyncio.gather(*(bounded(call) for call in calls), return_exceptions=return_exceptions)
+
+async def _demo():
+    """Exemple : création concurrente de quelques utilisateurs"""
+    async with AsyncSoapClient(max_concurrency=8, verbose=True) as client:
+        client.set_soap_token(input("Token SOAP: ").strip())
+        results = await client.gather(
+            client.add_user(f"demo_async_{i}", "motdepasse123") for i in range(10)
+        )
+        print(f"✅ {sum(1 for r in results if r is True)}/{len(results)} utilisateur(s) créé(s)")
+
+if __name__ == "__main__":
+    asyncio.run(_demo())
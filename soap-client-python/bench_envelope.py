@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de la construction des enveloppes SOAP
+News Chronicle Online - Client SOAP
+
+Compare l'ancienne construction (f-string + concaténation `+=`) aux
+gabarits précompilés de soap_envelope.
+"""
+
+import argparse
+import time
+from typing import Dict
+from xml.sax.saxutils import escape
+
+from soap_envelope import ENVELOPES
+
+PARAMS = {
+    "token": "3f1c9a7e5b2d4c6e8f0a1b3c5d7e9f1a3b5c7d9e1f3a5b7c9d1e3f5a7b9c1d3e",
+    "username": "nouvel_utilisateur",
+    "password": "m0t<de>passe&sûr",
+    "role": "EDITEUR",
+}
+
+def legacy_envelope(method: str, params: Dict, escape_values: bool = False) -> bytes:
+    """Construction d'origine de SoapClient._make_soap_request
+
+    Avec `escape_values`, les valeurs sont échappées naïvement (saxutils) pour
+    comparer à coût fonctionnel égal.
+    """
+    soap_params = ""
+    for key, value in params.items():
+        if value is not None:
+            if escape_values:
+                value = escape(str(value))
+            soap_params += f"<{key}>{value}</{key}>"
+    soap_body = f"""<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" xmlns:soap="http://newschronicle.com/soap">
+   <soapenv:Header/>
+   <soapenv:Body>
+      <soap:{method}>
+         {soap_params}
+      </soap:{method}>
+   </soapenv:Body>
+</soapenv:Envelope>"""
+    return soap_body.encode("utf-8")
+
+def run(label: str, build, iterations: int) -> float:
+    """Exécute `iterations` constructions et affiche le débit obtenu"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        build()
+    elapsed = time.perf_counter() - started
+    ops_per_second = iterations / elapsed
+    print(f"{label:<32} {elapsed:8.3f}s {ops_per_second:14,.0f} ops/s")
+    return ops_per_second
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de construction des enveloppes SOAP")
+    parser.add_argument("-n", "--iterations", type=int, default=100_000)
+    args = parser.parse_args()
+
+    template = ENVELOPES["addUser"]
+    buffer = bytearray()
+
+    print(f"🧪 {args.iterations:,} enveloppes addUser")
+    print("-" * 60)
+    before = run("Avant (f-string + +=)", lambda: legacy_envelope("addUser", PARAMS), args.iterations)
+    escaped = run("Avant + échappement (saxutils)", lambda: legacy_envelope("addUser", PARAMS, True), args.iterations)
+    after = run("Après (gabarit précompilé)", lambda: template.render(PARAMS), args.iterations)
+    buffered = run("Après (tampon réutilisé)", lambda: template.render_into(buffer, PARAMS), args.iterations)
+    print("-" * 60)
+    print(f"Rapport vs. avant: x{after / before:.2f} (x{buffered / before:.2f} avec tampon)")
+    print(f"Rapport vs. avant avec échappement: x{after / escaped:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Générateur de charge et benchmark de latence pour l'endpoint /soap
+News Chronicle Online - Client SOAP
+
+Rejoue un mélange configurable d'opérations SOAP à concurrence fixe (et
+éventuellement à débit cible), puis rapporte le débit et les latences
+p50/p95/p99 par opération. Les résultats JSON peuvent être comparés d'une
+version à l'autre avec --compare.
+
+Avec `--transport both`, la même charge est jouée avec le transport SOAP
+puis avec le transport REST/JSON (voir user_transport.py) et les écarts du
+second sont affichés par rapport au premier. `--fake` lance le serveur de
+substitution en mémoire (fake_backend.py) au lieu de viser --url.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from soap_user_manager import SoapClient
+
+OPERATIONS = ("authenticateUser", "listUsers", "addUser", "updateUser", "deleteUser")
+DEFAULT_MIX = "authenticateUser=1,listUsers=4,addUser=2,updateUser=2,deleteUser=1"
+PERCENTILES = (50, 95, 99)
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Convertit `op=poids,op=poids` en dictionnaire de poids"""
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Opération inconnue dans le mélange: {name}")
+        weights[name] = float(weight or 1)
+    if not any(weights.values()):
+        raise ValueError("Le mélange doit contenir au moins une opération de poids non nul")
+    return weights
+
+def percentile(sorted_values: List[float], rank: float) -> float:
+    """Percentile au rang le plus proche d'une liste triée"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(rank / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+class LoadGenerator:
+    """Exécute le mélange d'opérations sur plusieurs threads et mesure chaque appel
+
+    Les utilisateurs créés par addUser alimentent updateUser et deleteUser ;
+    ceux qui restent à la fin sont supprimés (sauf avec `keep_users`).
+    """
+
+    def __init__(self, client: SoapClient, weights: Dict[str, float], concurrency: int,
+                 credentials: tuple, rate: Optional[float] = None, seed: int = 42):
+        self.client = client
+        self.operations = list(weights)
+        self.weights = [weights[name] for name in self.operations]
+        self.concurrency = concurrency
+        self.credentials = credentials
+        self.rate = rate
+        self.seed = seed
+        self.run_id = f"bench{int(time.time())}"
+        self.created = deque()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def _call(self, operation: str, sequence: int) -> Tuple[str, bool]:
+        """Exécute une opération ; renvoie l'opération réellement jouée et son succès"""
+        if operation in ("updateUser", "deleteUser"):
+            try:
+                user_id = self.created.popleft()
+            except IndexError:
+                # Pas encore d'utilisateur créé : on en crée un à la place
+                operation = "addUser"
+        if operation == "authenticateUser":
+            username, password = self.credentials
+            result = self.client.execute(operation, {"username": username, "password": password})
+        elif operation == "listUsers":
+            # Parcours réel de list_users() (réponse analysée en flux pour SOAP, JSON pour REST)
+            fields = {}
+            for _ in self.client.iter_users(fields=fields):
+                pass
+            result = fields
+        elif operation == "addUser":
+            result = self.client.execute(operation, {"username": f"{self.run_id}_{sequence}",
+                                                     "password": "bench-password", "role": "VISITEUR"})
+            if result.get("success") == "true" and result.get("userId"):
+                self.created.append(int(result["userId"]))
+        elif operation == "updateUser":
+            result = self.client.execute(operation, {"userId": user_id, "role": "EDITEUR"})
+            self.created.append(user_id)
+        else:
+            result = self.client.execute(operation, {"userId": user_id})
+        return operation, result.get("success") == "true"
+
+    def _worker(self, deadline: float, max_requests: Optional[int], started: float):
+        rng = random.Random(f"{self.seed}-{threading.get_ident()}")
+        while True:
+            sequence = next(self._counter)
+            if max_requests is not None and sequence >= max_requests:
+                return
+            if self.rate:
+                # Débit cible : chaque requête a son créneau de départ
+                delay = started + sequence / self.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if time.perf_counter() >= deadline:
+                return
+            operation = rng.choices(self.operations, self.weights)[0]
+            call_started = time.perf_counter()
+            operation, success = self._call(operation, sequence)
+            elapsed = time.perf_counter() - call_started
+            with self._lock:
+                self.latencies[operation].append(elapsed)
+                if not success:
+                    self.errors[operation] += 1
+
+    def run(self, duration: float, max_requests: Optional[int] = None) -> float:
+        """Lance la charge ; renvoie la durée effective en secondes"""
+        started = time.perf_counter()
+        deadline = started + duration
+        threads = [threading.Thread(target=self._worker, args=(deadline, max_requests, started), daemon=True)
+                   for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+    def cleanup(self):
+        """Supprime les utilisateurs créés pendant le benchmark"""
+        while self.created:
+            self.client.execute("deleteUser", {"userId": self.created.popleft()})
+
+    def report(self, elapsed: float) -> Dict:
+        """Construit le rapport (débit et latences en millisecondes)"""
+        operations = {}
+        total = 0
+        for operation in OPERATIONS:
+            samples = sorted(self.latencies.get(operation, []))
+            if not samples:
+                continue
+            total += len(samples)
+            stats = {
+                "count": len(samples),
+                "errors": self.errors.get(operation, 0),
+                "throughput": round(len(samples) / elapsed, 2),
+                "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+                "max_ms": round(samples[-1] * 1000, 3),
+            }
+            for rank in PERCENTILES:
+                stats[f"p{rank}_ms"] = round(percentile(samples, rank) * 1000, 3)
+            operations[operation] = stats
+        return {
+            "total_requests": total,
+            "total_errors": sum(self.errors.values()),
+            "elapsed_s": round(elapsed, 3),
+            "throughput": round(total / elapsed, 2) if elapsed else 0.0,
+            "operations": operations,
+        }
+
+def print_report(report: Dict, baseline: Optional[Dict] = None):
+    """Affiche le rapport, avec l'écart relatif à une référence si fournie"""
+    def delta(current: float, previous: Optional[float]) -> str:
+        if not previous:
+            return ""
+        return f" ({(current - previous) / previous * 100:+.1f}%)"
+
+    base_operations = (baseline or {}).get("results", {}).get("operations", {})
+    print(f"\n📊 {report['total_requests']} requête(s), {report['total_errors']} erreur(s) "
+          f"en {report['elapsed_s']:.1f}s — {report['throughput']:.1f} req/s"
+          f"{delta(report['throughput'], (baseline or {}).get('results', {}).get('throughput'))}")
+    print("-" * 96)
+    print(f"{'Opération':<18} {'Nombre':>7} {'Erreurs':>8} {'req/s':>8} {'p50 ms':>16} {'p95 ms':>16} {'p99 ms':>16}")
+    print("-" * 96)
+    for operation, stats in report["operations"].items():
+        previous = base_operations.get(operation, {})
+        columns = [f"{stats[f'p{rank}_ms']:.1f}{delta(stats[f'p{rank}_ms'], previous.get(f'p{rank}_ms'))}"
+                   for rank in PERCENTILES]
+        print(f"{operation:<18} {stats['count']:>7} {stats['errors']:>8} {stats['throughput']:>8.1f} "
+              f"{columns[0]:>16} {columns[1]:>16} {columns[2]:>16}")
+
+def _prepare_client(client: SoapClient, args) -> bool:
+    """Identifiants du transport : token SOAP fourni ou généré, token JWT ADMIN pour REST"""
+    if client.transport.name == "soap" and args.token:
+        client.soap_token = args.token
+        return True
+    client.verbose = True
+    try:
+        if not client.authenticate_user(args.username, args.password):
+            return False
+        return client.transport.name == "rest" or client.generate_soap_token("Benchmark SOAP") is not None
+    finally:
+        client.verbose = False
+
+def _run_transport(url: str, transport: str, weights: Dict[str, float], args) -> Optional[Dict]:
+    """Joue la charge avec un transport ; renvoie son rapport (None si l'authentification échoue)"""
+    with SoapClient(url, pool_size=args.concurrency, verbose=False, transport=transport) as client:
+        if not _prepare_client(client, args):
+            return None
+        generator = LoadGenerator(client, weights, args.concurrency,
+                                  (args.username, args.password), args.rate, args.seed)
+        print(f"🚀 Benchmark {url} ({transport}) — concurrence {args.concurrency}"
+              f"{f', débit cible {args.rate:g} req/s' if args.rate else ''}, mélange {args.mix}")
+        try:
+            elapsed = generator.run(args.duration, args.requests)
+        finally:
+            if not args.keep_users:
+                generator.cleanup()
+    return generator.report(elapsed)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de charge de l'endpoint SOAP")
+    parser.add_argument("--url", default=os.environ.get("SOAP_URL", "http://localhost:3000"))
+    parser.add_argument("--token", default=os.environ.get("SOAP_TOKEN"),
+                        help="Token SOAP (par défaut, un token est généré avec le compte admin)")
+    parser.add_argument("--username", default=os.environ.get("SOAP_USERNAME", "admin"),
+                        help="Compte utilisé par authenticateUser (défaut: compte admin de seed.js)")
+    parser.add_argument("--password", default=os.environ.get("SOAP_PASSWORD", "admin123"))
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Poids des opérations (défaut: {DEFAULT_MIX})")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Requêtes en parallèle")
+    parser.add_argument("--rate", type=float, help="Débit cible en requêtes/s (défaut: aussi vite que possible)")
+    parser.add_argument("-d", "--duration", type=float, default=30.0, help="Durée maximale en secondes")
+    parser.add_argument("-n", "--requests", type=int, help="Nombre total de requêtes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", help="Fichier JSON de résultats")
+    parser.add_argument("--compare", help="Fichier JSON d'une exécution précédente à comparer")
+    parser.add_argument("--keep-users", action="store_true", help="Ne pas supprimer les utilisateurs créés")
+    parser.add_argument("--transport", choices=("soap", "rest", "both"), default="soap",
+                        help="Transport des opérations utilisateurs (both : SOAP puis REST, même charge)")
+    parser.add_argument("--fake", type=int, metavar="UTILISATEURS",
+                        help="Viser un serveur de substitution en mémoire peuplé de ce nombre d'utilisateurs")
+    args = parser.parse_args(argv)
+
+    try:
+        weights = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    transports = ("soap", "rest") if args.transport == "both" else (args.transport,)
+    backend = None
+    url = args.url
+    if args.fake is not None:
+        from fake_backend import FakeBackend
+        backend = FakeBackend(users=args.fake, seed=args.seed).start()
+        url = backend.url
+    reports = {}
+    try:
+        for transport in transports:
+            report = _run_transport(url, transport, weights, args)
+            if report is None:
+                return 1
+            reports[transport] = report
+    finally:
+        if backend is not None:
+            backend.stop()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+    for transport, report in reports.items():
+        if len(reports) > 1:
+            print(f"\n🔌 Transport {transport}")
+        previous = baseline
+        if baseline is not None and transport in baseline.get("transports", {}):
+            previous = {"results": baseline["transports"][transport]}
+        elif baseline is None and transport != transports[0]:
+            # Écarts du second transport par rapport au premier
+            previous = {"results": reports[transports[0]]}
+        print_report(report, previous)
+
+    if args.output:
+        document = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "config": {"url": url, "mix": weights, "concurrency": args.concurrency,
+                       "rate": args.rate, "duration": args.duration, "requests": args.requests,
+                       "transport": args.transport, "fake_users": args.fake},
+            "results": reports[transports[-1]],
+            "transports": reports,
+        }
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(document, handle, indent=2)
+        print(f"\n📄 Résultats enregistrés dans {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
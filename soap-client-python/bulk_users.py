@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Import et export en masse des utilisateurs via les services SOAP
+News Chronicle Online - Client SOAP
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from soap_user_manager import OUTCOME_UNKNOWN, SoapClient
+
+# Colonnes écrites par l'export
+EXPORT_FIELDS = ("id", "username", "role", "created_at")
+
+# Action batchUsers correspondant à chaque opération SOAP unitaire
+BATCH_ACTIONS = {"addUser": "add", "updateUser": "update", "deleteUser": "delete"}
+
+def _file_format(path: str) -> str:
+    """Détermine le format (csv ou jsonl) d'après l'extension du fichier"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Format de fichier non supporté: {extension or path} (attendu: .csv, .jsonl)")
+
+def iter_rows(path: str, on_error: Optional[Callable[[int, str], None]] = None) -> Iterator[Tuple[int, Dict]]:
+    """Lit le fichier ligne par ligne et renvoie des couples (numéro de ligne, données)
+
+    La lecture est paresseuse : un seul enregistrement est en mémoire à la fois.
+    Les lignes sont numérotées à partir de 1 sans trou (lignes vides JSONL
+    ignorées, en-tête CSV exclu), ce qui permet au point de reprise
+    d'avancer. Une ligne JSONL invalide lève ValueError, sauf si `on_error`
+    est fourni : il reçoit alors (numéro de ligne, message) et la lecture
+    continue.
+    """
+    file_format = _file_format(path)
+    with open(path, newline="", encoding="utf-8") as handle:
+        if file_format == "csv":
+            for row_number, row in enumerate(csv.DictReader(handle), start=1):
+                yield row_number, row
+        else:
+            lines = (line.strip() for line in handle)
+            for row_number, line in enumerate(filter(None, lines), start=1):
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    row, message = None, f"JSON invalide: {e}"
+                else:
+                    message = None if isinstance(row, dict) else "Objet JSON attendu"
+                if message is None:
+                    yield row_number, row
+                elif on_error is None:
+                    raise ValueError(f"Ligne {row_number}: {message}")
+                else:
+                    on_error(row_number, message)
+
+def row_text(row: Dict, column: str, strip: bool = True) -> str:
+    """Valeur texte d'une colonne (chaîne vide si absente)
+
+    Les valeurs JSONL ne sont pas forcément des chaînes : un nombre ou un
+    objet lève ValueError, qui ne concerne que cette ligne.
+    """
+    value = row.get(column)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ValueError(f"Colonne {column}: texte attendu")
+    return value.strip() if strip else value
+
+def row_to_operation(row: Dict) -> Tuple[str, Dict]:
+    """Convertit une ligne d'import en couple (opération SOAP, paramètres)
+
+    La colonne optionnelle `action` vaut `add` (défaut), `update` ou `delete`.
+    """
+    action = (row_text(row, "action") or "add").lower()
+    username = row_text(row, "username") or None
+    password = row_text(row, "password", strip=False) or None
+    role = row_text(row, "role").upper() or None
+    user_id = str(row.get("id") or "").strip() or None
+
+    if action == "add":
+        if not username or not password:
+            raise ValueError("Nom d'utilisateur et mot de passe requis")
+        return "addUser", {"username": username, "password": password, "role": role or "VISITEUR"}
+    if action in ("update", "delete"):
+        if not user_id or not user_id.isdigit():
+            raise ValueError("ID utilisateur valide requis")
+        if action == "delete":
+            return "deleteUser", {"userId": int(user_id)}
+        return "updateUser", {"userId": int(user_id), "username": username, "password": password, "role": role}
+    raise ValueError(f"Action inconnue: {action}")
+
+class Checkpoint:
+    """Point de reprise d'un import
+
+    On enregistre le plus grand numéro de ligne en dessous duquel toutes les
+    lignes ont été traitées : les lignes terminées dans le désordre au-delà de
+    ce seuil seront rejouées à la reprise.
+    """
+
+    def __init__(self, path: str, source: str, flush_every: int = 100):
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.flush_every = flush_every
+        self.row = 0
+        self._pending = set()
+        self._flushed_row = 0
+
+    def load(self) -> int:
+        """Charge le point de reprise existant pour ce fichier source"""
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as handle:
+                data = json.load(handle)
+            if data.get("source") == self.source:
+                self.row = self._flushed_row = int(data.get("row", 0))
+        return self.row
+
+    def mark_done(self, row_number: int):
+        """Marque une ligne comme traitée et fait avancer le seuil contigu"""
+        self._pending.add(row_number)
+        while self.row + 1 in self._pending:
+            self.row += 1
+            self._pending.remove(self.row)
+        if self.row - self._flushed_row >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Écrit le point de reprise de manière atomique"""
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as handle:
+            json.dump({"source": self.source, "row": self.row}, handle)
+        os.replace(temporary_path, self.path)
+        self._flushed_row = self.row
+
+def import_users(client: SoapClient, path: str, log_path: Optional[str] = None, workers: int = 8,
+                 resume: bool = True, batch_size: int = 1) -> Dict[str, int]:
+    """Importe un fichier CSV/JSONL d'utilisateurs via un pool de workers
+
+    Avec `batch_size` > 1, les lignes sont regroupées et envoyées via
+    batchUsers (un aller-retour et une transaction par lot). Chaque ligne
+    produit une entrée JSON dans le journal de résultats, y compris les
+    lignes illisibles. Un point de reprise est maintenu à côté du journal
+    pour redémarrer après une interruption sans rejouer les lignes déjà
+    traitées ; les lots déjà envoyés sont journalisés avant l'arrêt. Une
+    ligne dont la réponse a été perdue (délai dépassé...) a pu être
+    appliquée : elle est journalisée avec `"outcome": "unknown"` et comptée
+    dans `unknown`, pas dans `failed`.
+    """
+    log_path = log_path or f"{path}.results.jsonl"
+    checkpoint = Checkpoint(f"{log_path}.checkpoint", path)
+    start_row = checkpoint.load() if resume else 0
+    if start_row:
+        print(f"🔁 Reprise après la ligne {start_row}")
+
+    stats = {"success": 0, "failed": 0, "unknown": 0}
+    started = time.perf_counter()
+
+    def new_entry(row_number: int, row: Dict) -> Dict:
+        return {"row": row_number, "username": row.get("username"), "action": row.get("action") or "add"}
+
+    def apply_result(entry: Dict, success: bool, message: Optional[str], user_id, outcome=None) -> Dict:
+        entry["success"] = success
+        if not success:
+            entry["error"] = message or "Erreur inconnue"
+            if outcome:
+                entry["outcome"] = outcome
+        elif user_id:
+            entry["userId"] = int(user_id)
+        return entry
+
+    def process(rows: List[Tuple[int, Dict]]) -> List[Dict]:
+        entries = []
+        pending = []
+        for row_number, row in rows:
+            entry = new_entry(row_number, row)
+            try:
+                pending.append((entry, row_to_operation(row)))
+            except ValueError as e:
+                entries.append(apply_result(entry, False, str(e), None))
+
+        if len(pending) == 1 and batch_size == 1:
+            entry, (method, params) = pending[0]
+            result = client.execute(method, params)
+            entries.append(apply_result(entry, result.get("success") == "true",
+                                        result.get("message"), result.get("userId"), result.get("outcome")))
+        elif pending:
+            operations = [{"action": BATCH_ACTIONS[method], **params} for _, (method, params) in pending]
+            for (entry, _), result in zip(pending, client.batch(operations, batch_size=len(operations))):
+                entries.append(apply_result(entry, bool(result.get("success")),
+                                            result.get("message"), result.get("userId"), result.get("outcome")))
+        return entries
+
+    def record(entries: List[Dict]):
+        for entry in entries:
+            log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            if entry["success"]:
+                stats["success"] += 1
+            else:
+                stats["unknown" if entry.get("outcome") == OUTCOME_UNKNOWN else "failed"] += 1
+            checkpoint.mark_done(entry["row"])
+
+    def reject(row_number: int, message: str):
+        if row_number > start_row:
+            record([{"row": row_number, "username": None, "action": None, "success": False, "error": message}])
+
+    def record_done(futures):
+        for future in futures:
+            rows = in_flight.pop(future)
+            try:
+                entries = future.result()
+            except Exception as e:
+                # Erreur inattendue d'un worker : les lignes du lot échouent, l'import continue
+                entries = [apply_result(new_entry(row_number, row), False, str(e), None) for row_number, row in rows]
+            record(entries)
+
+    with open(log_path, "a" if start_row else "w", encoding="utf-8") as log, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        # Nombre borné de lots en vol pour garder une mémoire constante
+        in_flight = {}
+        max_in_flight = workers * 4
+        chunk = []
+        try:
+            for row_number, row in iter_rows(path, on_error=reject):
+                if row_number <= start_row:
+                    continue
+                chunk.append((row_number, row))
+                if len(chunk) < batch_size:
+                    continue
+                in_flight[executor.submit(process, chunk)] = chunk
+                chunk = []
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    record_done(done)
+            if chunk:
+                in_flight[executor.submit(process, chunk)] = chunk
+            record_done(list(in_flight))
+        except BaseException:
+            # Arrêt (lecture impossible, Ctrl+C) : les lots pas encore démarrés sont abandonnés et
+            # seront rejoués à la reprise, ceux déjà envoyés sont attendus et journalisés
+            for future in list(in_flight):
+                if future.cancel():
+                    del in_flight[future]
+            record_done(list(in_flight))
+            raise
+        finally:
+            log.flush()
+            checkpoint.flush()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Import terminé: {stats['success']} succès, {stats['failed']} échec(s) en {elapsed:.1f}s")
+    if stats["unknown"]:
+        print(f"❓ {stats['unknown']} ligne(s) au résultat inconnu (réponse perdue) : "
+              f"à vérifier avant de les rejouer (\"outcome\": \"unknown\" dans le journal)")
+    print(f"📄 Journal des résultats: {log_path}")
+    return stats
+
+def export_users(client: SoapClient, path: str) -> int:
+    """Exporte les utilisateurs au format CSV ou JSONL, au fil de la réception
+
+    Le fichier est écrit à côté de la destination puis renommé : en cas
+    d'échec de listUsers (ValueError), un export existant n'est pas écrasé
+    par un fichier incomplet.
+    """
+    file_format = _file_format(path)
+    temporary_path = f"{path}.tmp"
+    fields = {}
+    count = 0
+    try:
+        with open(temporary_path, "w", newline="", encoding="utf-8") as handle:
+            if file_format == "csv":
+                writer = csv.writer(handle)
+                writer.writerow(EXPORT_FIELDS)
+            for user in client.iter_users(fields=fields):
+                values = (user.id, user.username, user.role, user.created_at)
+                if file_format == "csv":
+                    writer.writerow(values)
+                else:
+                    handle.write(json.dumps(dict(zip(EXPORT_FIELDS, values)), ensure_ascii=False) + "\n")
+                count += 1
+        if fields.get("success") != "true":
+            raise ValueError(f"Export interrompu: {fields.get('message') or 'Erreur inconnue'}")
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+    print(f"✅ {count} utilisateur(s) exporté(s) vers {path}")
+    return count
+
+def main(argv=None):
+    """Point d'entrée des commandes `import` et `export` (voir user_cli)"""
+    import user_cli
+    return user_cli.main(argv)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,826 @@
+#!/usr/bin/env python3
+"""
+Serveur de substitution en mémoire (SOAP + REST) pour les tests hors ligne
+News Chronicle Online - Client SOAP
+
+Reproduit les opérations de soapServer.js (authenticateUser, listUsers,
+addUser, updateUser, deleteUser, batchUsers), /api/users (compte ADMIN),
+/api/health, la génération et la vérification des tokens SOAP,
+GET /api/rest/articles et GET /api/rest/articles/:id, sans Node, base
+de données ni réseau. La latence, le taux d'erreur et la taille des réponses
+sont réglables opération par opération ; les tirages aléatoires sont
+reproductibles (graine fixe).
+
+Utilisation depuis un script :
+
+    with FakeBackend(users=1000, seed=42) as backend:
+        backend.set_profile("listUsers", latency=0.05, error_rate=0.1)
+        client = SoapClient(backend.url)
+        client.set_soap_token(backend.soap_token)
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import random
+import secrets
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from collections import Counter
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+SOAP_ENV_NS = "http://schemas.xmlsoap.org/soap/envelope/"
+SOAP_OPERATIONS = ("authenticateUser", "listUsers", "addUser", "updateUser", "deleteUser", "batchUsers")
+ROLES = ("VISITEUR", "EDITEUR", "ADMIN")
+
+# Limites de soapServer.js
+MAX_BATCH_SIZE = 1000
+MAX_LIST_USERS_LIMIT = 1000
+
+# Taille minimale d'une réponse compressée (COMPRESSION_THRESHOLD du serveur)
+COMPRESSION_THRESHOLD = 1024
+
+# Ordre des champs dans la réponse, comme createSoapResponse
+RESPONSE_FIELDS = ("success", "message", "role", "token", "userId", "users", "serverTime", "userIds", "total", "results")
+
+WSDL = """<?xml version="1.0" encoding="UTF-8"?>
+<definitions name="NewsChronicleService"
+             targetNamespace="http://newschronicle.com/soap"
+             xmlns="http://schemas.xmlsoap.org/wsdl/"
+             xmlns:tns="http://newschronicle.com/soap">
+  <portType name="NewsChroniclePortType">
+{operations}
+  </portType>
+</definitions>""".format(operations="\n".join(f'    <operation name="{name}"/>' for name in SOAP_OPERATIONS))
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _stored_now() -> datetime:
+    """Date enregistrée en base : DATETIME MySQL, arrondi à la seconde"""
+    return (_now() + timedelta(microseconds=500000)).replace(microsecond=0)
+
+def _sync_watermark(value: datetime) -> datetime:
+    """serverTime de soapServer.js : seconde entière précédente (dates en base à la seconde)"""
+    return value.replace(microsecond=0) - timedelta(seconds=1)
+
+def _iso(value: datetime) -> str:
+    """Date au format de Date.toISOString()"""
+    return value.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    """Date ISO 8601 (None si absente) ; ValueError si invalide"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def soap_response(operation: str, result: Dict, padding: int = 0) -> bytes:
+    """Enveloppe de réponse `<operation>Response` (valeurs échappées)"""
+    fields = "".join(
+        f"<{name}>{escape(str(result[name]).lower() if isinstance(result[name], bool) else str(result[name]))}</{name}>"
+        for name in RESPONSE_FIELDS if name in result
+    )
+    filler = f"<!--{'x' * padding}-->" if padding > 0 else ""
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<soapenv:Envelope xmlns:soapenv="{SOAP_ENV_NS}" xmlns:soap="http://newschronicle.com/soap">'
+        f"<soapenv:Header/>{filler}<soapenv:Body><{operation}Response>{fields}</{operation}Response>"
+        "</soapenv:Body></soapenv:Envelope>"
+    ).encode("utf-8")
+
+@dataclass(frozen=True)
+class OperationProfile:
+    """Comportement injecté pour une opération
+
+    - `latency` : délai ajouté avant la réponse (secondes), ± `jitter`
+    - `error_rate` : proportion de réponses HTTP `error_status`
+    - `drop_rate` : proportion de connexions fermées sans réponse
+    - `padding` : octets ajoutés à chaque réponse (commentaire XML ou champ JSON)
+    """
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    drop_rate: float = 0.0
+    padding: int = 0
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Client parti avant la réponse (délai d'attente dépassé) : cas attendu des tests
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+class FakeBackend:
+    """Backend en mémoire servi par un ThreadingHTTPServer local
+
+    Le port 0 choisit un port libre (`url` donne l'adresse effective). Un
+    compte ADMIN (`admin`/`admin123` par défaut) et un token SOAP
+    (`soap_token`) sont créés au démarrage. `calls` compte les requêtes
+    reçues par opération, y compris celles dont l'échec a été injecté.
+    authenticateUser renvoie un token au format JWT (non signé) valable
+    `auth_ttl` secondes.
+
+    Comme le serveur Node, les corps de requête gzip ou deflate sont
+    acceptés et les réponses d'au moins `compress_threshold` octets sont
+    compressées en gzip si le client l'accepte (None : jamais). `traffic`
+    compte les octets reçus (`received`) et envoyés (`sent`) tels qu'ils
+    circulent sur le réseau.
+
+    Avec `capacity`, au plus ce nombre de requêtes subissent leur latence
+    en même temps ; les autres attendent leur tour, comme sur un serveur
+    saturé dont le temps de réponse croît avec la charge.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, users: int = 0, articles: int = 0,
+                 seed: int = 0, admin: Tuple[str, str] = ("admin", "admin123"),
+                 profiles: Optional[Dict[str, OperationProfile]] = None, auth_ttl: float = 24 * 3600,
+                 compress_threshold: Optional[int] = COMPRESSION_THRESHOLD, capacity: Optional[int] = None):
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self.profiles: Dict[str, OperationProfile] = dict(profiles or {})
+        self.calls: Counter = Counter()
+        self.traffic: Counter = Counter()
+        self.compress_threshold = compress_threshold
+        self._capacity = threading.BoundedSemaphore(capacity) if capacity else None
+        self.users: Dict[int, Dict] = {}
+        self.articles: Dict[int, Dict] = {}
+        self.soap_tokens: Dict[str, Dict] = {}
+        self.auth_tokens: Dict[str, Tuple[int, float]] = {}
+        self.auth_ttl = auth_ttl
+        self._next_user_id = 1
+        self._next_token_id = 1
+
+        admin_id = self._create_user(admin[0], admin[1], "ADMIN")
+        self.soap_token = self._create_soap_token("Token de test", admin_id)
+        for index in range(users):
+            self._create_user(f"user{index:06d}", "password123", ROLES[index % 2])
+        for index in range(articles):
+            self._create_article(index + 1)
+
+        self._server = _Server((host, port), _Handler)
+        self._server.backend = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeBackend":
+        """Démarre le serveur dans un thread d'arrière-plan"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-backend", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Arrête le serveur et ferme la socket d'écoute"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def serve_forever(self):
+        """Sert les requêtes sur le thread courant jusqu'à une interruption (Ctrl+C)"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def set_profile(self, operation: str = "*", **settings) -> OperationProfile:
+        """Règle le comportement d'une opération (`*` : opérations sans profil propre)
+
+        Les noms d'opération sont ceux du SOAP, plus `health`, `wsdl`,
+        `soapTokens`, `verifySoapToken` et `articles` pour les routes REST.
+        Les routes /api/users utilisent le profil de l'opération SOAP
+        équivalente (GET : listUsers, POST : addUser, PUT : updateUser,
+        DELETE : deleteUser).
+        """
+        with self._lock:
+            profile = replace(self.profiles.get(operation, OperationProfile()), **settings)
+            self.profiles[operation] = profile
+        return profile
+
+    def _count_traffic(self, direction: str, size: int):
+        with self._lock:
+            self.traffic[direction] += size
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+            self.traffic.clear()
+
+
+    def _create_user(self, username: str, password: str, role: str) -> int:
+        user_id = self._next_user_id
+        self._next_user_id += 1
+        now = _stored_now()
+        self.users[user_id] = {"id": user_id, "username": username, "password": password,
+                               "role": role, "createdAt": now, "updatedAt": now}
+        return user_id
+
+    def _create_soap_token(self, description: str, created_by: int) -> str:
+        token = secrets.token_hex(32)
+        token_id = self._next_token_id
+        self._next_token_id += 1
+        self.soap_tokens[token] = {"id": token_id, "token": token, "description": description,
+                                   "createdBy": created_by, "isActive": True,
+                                   "expiresAt": _now() + timedelta(days=30), "lastUsedAt": None}
+        return token
+
+    def _create_article(self, article_id: int):
+        words = [self._random.choice(("politique", "économie", "sport", "culture", "science", "santé",
+                                      "élection", "marché", "match", "festival", "recherche", "hôpital"))
+                 for _ in range(60)]
+        now = _stored_now()
+        category_id = article_id % 4 + 1
+        self.articles[article_id] = {
+            "id": article_id, "title": f"Article {article_id} : {' '.join(words[:4])}",
+            "content": " ".join(words), "categoryId": category_id, "authorId": 1,
+            "createdAt": now, "updatedAt": now,
+            "category": {"id": category_id, "name": f"Catégorie {category_id}"},
+        }
+
+    def _valid_soap_token(self, token: Optional[str]) -> Optional[Dict]:
+        soap_token = self.soap_tokens.get(token or "")
+        if soap_token is None or not soap_token["isActive"] or soap_token["expiresAt"] <= _now():
+            return None
+        soap_token["lastUsedAt"] = _now()
+        return soap_token
+
+
+    def _inject(self, operation: str) -> Tuple[Optional[str], OperationProfile]:
+        """Compte l'appel, applique la latence et tire l'échec éventuel ("drop" ou "error")"""
+        with self._lock:
+            self.calls[operation] += 1
+            profile = self.profiles.get(operation) or self.profiles.get("*") or OperationProfile()
+            delay = profile.latency + (self._random.uniform(-profile.jitter, profile.jitter) if profile.jitter else 0.0)
+            draw = self._random.random()
+        if delay > 0:
+            if self._capacity is None:
+                time.sleep(delay)
+            else:
+                with self._capacity:
+                    time.sleep(delay)
+        if draw < profile.drop_rate:
+            return "drop", profile
+        if draw < profile.drop_rate + profile.error_rate:
+            return "error", profile
+        return None, profile
+
+
+    def authenticate_user(self, args: Dict) -> Dict:
+        username, password = args.get("username"), args.get("password")
+        if not username or not password:
+            return {"success": False, "message": "Nom d'utilisateur et mot de passe requis", "role": "", "token": ""}
+        user = next((user for user in self.users.values() if user["username"] == username), None)
+        if user is None or user["password"] != password:
+            return {"success": False, "message": "Nom d'utilisateur ou mot de passe incorrect", "role": "", "token": ""}
+        expires_at = time.time() + self.auth_ttl
+        claims = {"id": user["id"], "username": username, "role": user["role"], "exp": int(expires_at)}
+        payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=").decode()
+        token = f"eyJhbGciOiJub25lIn0.{payload}.{secrets.token_urlsafe(16)}"
+        self.auth_tokens[token] = (user["id"], expires_at)
+        return {"success": True, "message": "Authentification réussie", "role": user["role"], "token": token}
+
+    def _select_users(self, args: Dict) -> Tuple[Optional[str], List[Dict], List[Dict], List[Dict]]:
+        """Filtres et pagination de listUsers : (erreur, page, correspondants, sélectionnés)"""
+        try:
+            created_after = _parse_date(args.get("createdAfter"))
+            since = _parse_date(args.get("updatedSince"))
+        except ValueError:
+            return "Paramètre de date invalide", [], [], []
+        try:
+            offset = int(args.get("offset") or 0)
+            limit = int(args["limit"]) if args.get("limit") else None
+        except ValueError:
+            offset = -1
+        if offset < 0 or (limit is not None and limit < 1):
+            return "Paramètres de pagination invalides", [], [], []
+
+        role, prefix = args.get("role"), args.get("usernamePrefix")
+        matching = [
+            user for user in self.users.values()
+            if (not role or user["role"] == role)
+            and (not prefix or user["username"].startswith(prefix))
+            and (created_after is None or user["createdAt"] > created_after)
+        ]
+        selected = [user for user in matching if since is None or user["updatedAt"] >= since]
+        page = selected[offset:offset + min(limit, MAX_LIST_USERS_LIMIT) if limit is not None else None]
+        return None, page, matching, selected
+
+    def list_users(self, args: Dict) -> Dict:
+        server_time = _sync_watermark(_now())
+        error, page, matching, selected = self._select_users(args)
+        if error is not None:
+            return {"success": False, "message": error, "users": ""}
+        since = _parse_date(args.get("updatedSince"))
+        result = {
+            "success": True,
+            "message": f"{len(page)} utilisateur(s) trouvé(s)",
+            "users": json.dumps([{"id": user["id"], "username": user["username"], "role": user["role"],
+                                  "createdAt": _iso(user["createdAt"])} for user in page], ensure_ascii=False),
+            "serverTime": _iso(server_time),
+            "total": len(selected),
+        }
+        if since is not None:
+            result["userIds"] = json.dumps([user["id"] for user in matching])
+        return result
+
+    def _username_taken(self, username: str) -> bool:
+        return any(user["username"] == username for user in self.users.values())
+
+    def add_user(self, args: Dict) -> Dict:
+        username, password = args.get("username"), args.get("password")
+        if not username or not password:
+            return {"success": False, "message": "Nom d'utilisateur et mot de passe requis", "userId": 0}
+        if self._username_taken(username):
+            return {"success": False, "message": "Ce nom d'utilisateur existe déjà", "userId": 0}
+        user_id = self._create_user(username, password, args.get("role") or "VISITEUR")
+        return {"success": True, "message": "Utilisateur créé avec succès", "userId": user_id}
+
+    def update_user(self, args: Dict) -> Dict:
+        if not args.get("userId"):
+            return {"success": False, "message": "ID utilisateur requis"}
+        user = self.users.get(int(args["userId"]))
+        if user is None:
+            return {"success": False, "message": "Utilisateur non trouvé"}
+        username = args.get("username")
+        if username and username != user["username"] and self._username_taken(username):
+            return {"success": False, "message": "Ce nom d'utilisateur existe déjà"}
+        for field in ("username", "password", "role"):
+            if args.get(field):
+                user[field] = args[field]
+        user["updatedAt"] = _stored_now()
+        return {"success": True, "message": "Utilisateur mis à jour avec succès"}
+
+    def delete_user(self, args: Dict) -> Dict:
+        if not args.get("userId"):
+            return {"success": False, "message": "ID utilisateur requis"}
+        if self.users.pop(int(args["userId"]), None) is None:
+            return {"success": False, "message": "Utilisateur non trouvé"}
+        return {"success": True, "message": "Utilisateur supprimé avec succès"}
+
+    def batch_users(self, args: Dict) -> Dict:
+        try:
+            items = json.loads(args.get("operations") or "[]")
+        except ValueError:
+            items = None
+        if not isinstance(items, list):
+            return {"success": False, "message": "Liste d'opérations invalide (tableau JSON attendu)", "results": ""}
+        if len(items) > MAX_BATCH_SIZE:
+            return {"success": False, "message": f"Trop d'opérations (maximum {MAX_BATCH_SIZE} par lot)", "results": ""}
+
+        handlers = {"add": self.add_user, "update": self.update_user, "delete": self.delete_user}
+        results = []
+        for index, operation in enumerate(items):
+            operation = operation if isinstance(operation, dict) else {}
+            action = operation.get("action")
+            handler = handlers.get(action)
+            if handler is None:
+                results.append({"index": index, "action": action, "success": False,
+                                "message": "Action inconnue (add, update ou delete attendu)"})
+                continue
+            outcome = handler({key: value for key, value in operation.items() if value is not None})
+            if outcome["success"]:
+                user_id = outcome.get("userId") or operation.get("userId")
+                results.append({"index": index, "action": action, "success": True, "userId": user_id})
+            else:
+                results.append({"index": index, "action": action, "success": False, "message": outcome["message"]})
+        succeeded = sum(1 for result in results if result["success"])
+        return {"success": True, "message": f"{succeeded}/{len(results)} opération(s) réussie(s)",
+                "results": json.dumps(results, ensure_ascii=False)}
+
+    def handle_soap(self, operation: str, args: Dict) -> Dict:
+        """Exécute une opération SOAP sous le verrou du magasin"""
+        handler = {
+            "authenticateUser": self.authenticate_user,
+            "listUsers": self.list_users,
+            "addUser": self.add_user,
+            "updateUser": self.update_user,
+            "deleteUser": self.delete_user,
+            "batchUsers": self.batch_users,
+        }[operation]
+        with self._lock:
+            if operation != "authenticateUser":
+                # Même forme de réponse d'erreur que soapServer.js pour chaque opération
+                empty = {"listUsers": {"users": ""}, "addUser": {"userId": 0}, "batchUsers": {"results": ""}}
+                if not args.get("token"):
+                    return {"success": False, "message": "Token requis", **empty.get(operation, {})}
+                if self._valid_soap_token(args["token"]) is None:
+                    return {"success": False, "message": "Token invalide ou expiré", **empty.get(operation, {})}
+            return handler(args)
+
+
+    def _admin(self, authorization: Optional[str]) -> Tuple[Optional[Tuple[int, Dict]], Optional[Dict]]:
+        """Compte ADMIN du token JWT (`Bearer ...`), ou la réponse d'erreur de auth.js"""
+        bearer = (authorization or "").partition("Bearer ")[2]
+        user_id, expires_at = self.auth_tokens.get(bearer, (0, 0.0))
+        user = self.users.get(user_id)
+        if user is None or expires_at <= time.time():
+            return (401, {"error": "Token invalide ou expiré"}), None
+        if user["role"] != "ADMIN":
+            return (403, {"error": "Accès refusé. Rôles autorisés: ADMIN"}), None
+        return None, user
+
+    def generate_token(self, authorization: Optional[str], body: Dict) -> Tuple[int, Dict]:
+        """POST /api/admin/soap-tokens"""
+        with self._lock:
+            denied, user = self._admin(authorization)
+            if denied is not None:
+                return denied
+            description = (body.get("description") or "").strip()
+            if not description:
+                return 400, {"success": False, "error": "Description requise"}
+            token = self._create_soap_token(description, user["id"])
+            return 201, {"success": True, "message": "Token SOAP généré avec succès",
+                         "data": self._token_json(self.soap_tokens[token], creator=user)}
+
+    def verify_token(self, body: Dict) -> Tuple[int, Dict]:
+        """POST /api/admin/soap-tokens/verify"""
+        if not body.get("token"):
+            return 400, {"success": False, "error": "Token requis"}
+        with self._lock:
+            soap_token = self._valid_soap_token(body["token"])
+            if soap_token is None:
+                return 401, {"success": False, "error": "Token invalide ou expiré"}
+            data = self._token_json(soap_token)
+        return 200, {"success": True, "message": "Token valide",
+                     "data": {key: data[key] for key in ("id", "description", "expiresAt", "lastUsedAt")}}
+
+    @staticmethod
+    def _token_json(soap_token: Dict, creator: Optional[Dict] = None) -> Dict:
+        data = {key: _iso(value) if isinstance(value, datetime) else value for key, value in soap_token.items()}
+        if creator is not None:
+            data["creator"] = {"id": creator["id"], "username": creator["username"]}
+        return data
+
+    def list_articles(self, query: Dict[str, str]) -> Tuple[int, Dict]:
+        """GET /api/rest/articles (réponse JSON uniquement)"""
+        try:
+            page = int(query.get("page", 1))
+            limit = int(query.get("limit", 10))
+            category = int(query["category"]) if query.get("category") else None
+        except ValueError:
+            return 500, {"success": False, "error": "Erreur interne du serveur"}
+        try:
+            since = _parse_date(query.get("updatedSince"))
+        except ValueError:
+            return 400, {"success": False, "error": "Paramètre updatedSince invalide"}
+        search = query.get("search")
+        after = None
+        if since is not None and query.get("cursor"):
+            updated_at, _, article_id = query["cursor"].rpartition("_")
+            try:
+                after = (_parse_date(updated_at), int(article_id))
+            except ValueError:
+                after = None
+            if after is None or after[0] is None:
+                return 400, {"success": False, "error": "Paramètre cursor invalide"}
+
+        server_time = _sync_watermark(_now())
+        with self._lock:
+            matching = [
+                article for article in self.articles.values()
+                if (category is None or article["categoryId"] == category)
+                and (not search or search in article["title"] or search in article["content"])
+            ]
+            if since is not None:
+                selected = sorted((a for a in matching if a["updatedAt"] >= since), key=lambda a: (a["updatedAt"], a["id"]))
+            else:
+                selected = sorted(matching, key=lambda a: (a["createdAt"], a["id"]), reverse=True)
+            if after is not None:
+                rows = [a for a in selected if (a["updatedAt"], a["id"]) > after][:limit]
+            else:
+                rows = selected[(page - 1) * limit:page * limit]
+            data = [{key: _iso(value) if isinstance(value, datetime) else value for key, value in article.items()}
+                    for article in rows]
+            body = {"success": True, "data": data,
+                    "pagination": {"page": page, "limit": limit, "total": len(selected),
+                                   "totalPages": -(-len(selected) // limit) if limit else 0}}
+            if since is not None:
+                body["serverTime"] = _iso(server_time)
+                body["nextCursor"] = (f"{_iso(rows[-1]['updatedAt'])}_{rows[-1]['id']}"
+                                      if rows and len(rows) == limit else "")
+                if page == 1 and after is None:
+                    body["articleIds"] = sorted(article["id"] for article in matching)
+        return 200, body
+
+    def get_article(self, article_id: str) -> Tuple[int, Dict]:
+        """GET /api/rest/articles/:id"""
+        with self._lock:
+            article = self.articles.get(int(article_id)) if article_id.isdigit() else None
+            if article is None:
+                return 404, {"success": False, "error": "Article non trouvé"}
+            data = {key: _iso(value) if isinstance(value, datetime) else value for key, value in article.items()}
+        return 200, {"success": True, "data": data}
+
+    def rest_users(self, operation: str, authorization: Optional[str], user_id: Optional[str],
+                   query: Dict[str, str], body: Dict) -> Tuple[int, Dict]:
+        """/api/users (userController.js) : mêmes opérations que le SOAP, en JSON, pour un compte ADMIN"""
+        with self._lock:
+            denied, _ = self._admin(authorization)
+            if denied is not None:
+                return denied
+            if operation == "listUsers":
+                error, page, _, selected = self._select_users({key: query.get(key) for key in
+                                                               ("role", "usernamePrefix", "createdAfter", "offset", "limit")})
+                if error is not None:
+                    return 400, {"success": False, "error": error}
+                data = [{"id": user["id"], "username": user["username"], "role": user["role"],
+                         "createdAt": _iso(user["createdAt"]), "updatedAt": _iso(user["updatedAt"])} for user in page]
+                return 200, {"success": True, "data": data, "count": len(data), "total": len(selected)}
+            if operation == "addUser":
+                result = self.add_user(body)
+                if not result["success"]:
+                    return 400, {"success": False, "error": result["message"]}
+                user = self.users[result["userId"]]
+                return 201, {"success": True, "message": result["message"],
+                             "data": {key: user[key] for key in ("id", "username", "role")}}
+            if not user_id or not user_id.isdigit() or int(user_id) not in self.users:
+                return 404, {"success": False, "error": "Utilisateur non trouvé"}
+            if operation == "updateUser":
+                result = self.update_user({**body, "userId": user_id})
+                if not result["success"]:
+                    return 400, {"success": False, "error": result["message"]}
+                user = self.users[int(user_id)]
+                return 200, {"success": True, "message": result["message"],
+                             "data": {key: user[key] for key in ("id", "username", "role")}}
+            result = self.delete_user({"userId": user_id})
+            return 200, {"success": True, "message": result["message"]}
+
+    def revoke_soap_token(self, token: str):
+        """Révoque un token SOAP (comme DELETE /api/admin/soap-tokens/:id)"""
+        with self._lock:
+            self.soap_tokens.pop(token, None)
+
+    def expire_auth_tokens(self):
+        """Fait expirer tous les tokens JWT émis"""
+        with self._lock:
+            self.auth_tokens.clear()
+
+    def touch_article(self, article_id: int, **changes):
+        """Modifie (ou crée) un article et met à jour sa date de modification"""
+        with self._lock:
+            if article_id not in self.articles:
+                self._create_article(article_id)
+            self.articles[article_id].update(changes, updatedAt=_stored_now())
+
+    def delete_article(self, article_id: int):
+        with self._lock:
+            self.articles.pop(article_id, None)
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routage des requêtes vers le FakeBackend du serveur"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeBackend/1.0"
+    # En-têtes et corps sont écrits séparément : sans TCP_NODELAY, Nagle et
+    # l'ACK retardé du client ajoutent ~40 ms à chaque réponse
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def backend(self) -> FakeBackend:
+        return self.server.backend
+
+    def _read_body(self) -> bytes:
+        """Corps de la requête, décompressé selon Content-Encoding (ValueError si illisible)"""
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.backend._count_traffic("received", len(body))
+        encoding = (self.headers.get("Content-Encoding") or "identity").strip().lower()
+        try:
+            if encoding in ("gzip", "x-gzip"):
+                return gzip.decompress(body)
+            if encoding == "deflate":
+                return zlib.decompress(body)
+        except (OSError, EOFError, zlib.error) as e:
+            raise ValueError(f"Corps de requête illisible: {e}") from None
+        if encoding != "identity":
+            raise ValueError(f"Encodage de requête non supporté: {encoding}")
+        return body
+
+    def _accepts_gzip(self) -> bool:
+        for part in (self.headers.get("Accept-Encoding") or "").split(","):
+            name, _, params = part.strip().lower().partition(";")
+            if name in ("gzip", "*"):
+                quality = params.replace(" ", "")
+                try:
+                    return not quality.startswith("q=") or float(quality[2:]) > 0
+                except ValueError:
+                    return False
+        return False
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        threshold = self.backend.compress_threshold
+        compressed = threshold is not None and len(body) >= threshold and self._accepts_gzip()
+        if compressed:
+            body = gzip.compress(body, compresslevel=6)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if compressed:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.backend._count_traffic("sent", len(body))
+
+    def _send_json(self, status: int, data: Dict, padding: int = 0):
+        if padding > 0:
+            data = {**data, "padding": "x" * padding}
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+    def _drop(self):
+        """Ferme la connexion sans répondre (le client voit une ConnectionError)"""
+        self.close_connection = True
+
+    def _users(self, http_method: str, body: bytes = b""):
+        """Routes /api/users et /api/users/:id"""
+        url = urlsplit(self.path)
+        user_id = url.path[len("/api/users/"):] if url.path.startswith("/api/users/") else None
+        operation = {"GET": "listUsers", "POST": "addUser", "PUT": "updateUser", "DELETE": "deleteUser"}[http_method]
+        if (not user_id) != (http_method in ("GET", "POST")):
+            return self._send_json(404, {"error": "Route non trouvée", "path": url.path})
+        failure, profile = self.backend._inject(operation)
+        if failure == "drop":
+            return self._drop()
+        if failure == "error":
+            return self._send_json(profile.error_status, {"success": False, "error": "Erreur injectée"})
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": "JSON invalide"})
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        status, response = self.backend.rest_users(operation, self.headers.get("Authorization"), user_id,
+                                                   query, data if isinstance(data, dict) else {})
+        self._send_json(status, response, profile.padding)
+
+    def _is_users_route(self) -> bool:
+        path = urlsplit(self.path).path
+        return path == "/api/users" or path.startswith("/api/users/")
+
+    def do_GET(self):
+        if self._is_users_route():
+            return self._users("GET")
+        url = urlsplit(self.path)
+        routes = {"/api/health": "health", "/soap": "wsdl", "/api/rest/articles": "articles"}
+        operation = routes.get(url.path)
+        prefix, _, article_id = url.path.rpartition("/")
+        if operation is None and prefix == "/api/rest/articles" and article_id != "categories":
+            operation = "article"
+        if operation is None:
+            self._send_json(404, {"error": "Route non trouvée", "path": url.path})
+            return
+        failure, profile = self.backend._inject(operation)
+        if failure == "drop":
+            return self._drop()
+        if failure == "error":
+            return self._send_json(profile.error_status, {"success": False, "error": "Erreur injectée"})
+
+        if operation == "health":
+            self._send_json(200, {"status": "OK", "message": "API News Chronicle Online",
+                                  "timestamp": _iso(_now())}, profile.padding)
+        elif operation == "wsdl":
+            self._send(200, WSDL.encode("utf-8"), "application/xml")
+        elif operation == "article":
+            self._send_json(*self.backend.get_article(article_id), padding=profile.padding)
+        else:
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            self._send_json(*self.backend.list_articles(query), padding=profile.padding)
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        try:
+            body = self._read_body()
+        except ValueError as e:
+            if path == "/soap":
+                response = soap_response("error", {"success": False, "message": f"Erreur interne du serveur: {e}"})
+                return self._send(400, response, "text/xml; charset=utf-8")
+            return self._send_json(400, {"error": str(e)})
+        if path == "/soap":
+            return self._soap(body)
+        if self._is_users_route():
+            return self._users("POST", body)
+        routes = {"/api/admin/soap-tokens": "soapTokens", "/api/admin/soap-tokens/verify": "verifySoapToken"}
+        operation = routes.get(path)
+        if operation is None:
+            return self._send_json(404, {"error": "Route non trouvée", "path": path})
+        failure, profile = self.backend._inject(operation)
+        if failure == "drop":
+            return self._drop()
+        if failure == "error":
+            return self._send_json(profile.error_status, {"success": False, "error": "Erreur injectée"})
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": "JSON invalide"})
+        if operation == "soapTokens":
+            status, response = self.backend.generate_token(self.headers.get("Authorization"), data)
+        else:
+            status, response = self.backend.verify_token(data)
+        self._send_json(status, response, profile.padding)
+
+    def do_PUT(self):
+        try:
+            body = self._read_body()
+        except ValueError as e:
+            return self._send_json(400, {"error": str(e)})
+        if not self._is_users_route():
+            return self._send_json(404, {"error": "Route non trouvée", "path": urlsplit(self.path).path})
+        self._users("PUT", body)
+
+    def do_DELETE(self):
+        try:
+            body = self._read_body()
+        except ValueError as e:
+            return self._send_json(400, {"error": str(e)})
+        if not self._is_users_route():
+            return self._send_json(404, {"error": "Route non trouvée", "path": urlsplit(self.path).path})
+        self._users("DELETE", body)
+
+    def _soap(self, body: bytes):
+        try:
+            root = ET.fromstring(body)
+            soap_body = root.find(f"{{{SOAP_ENV_NS}}}Body")
+            element = soap_body[0] if soap_body is not None and len(soap_body) else None
+            operation = element.tag.split("}")[-1] if element is not None else None
+            if operation not in SOAP_OPERATIONS:
+                raise ValueError("Opération SOAP non reconnue")
+        except (ET.ParseError, ValueError) as e:
+            response = soap_response("error", {"success": False, "message": f"Erreur interne du serveur: {e}"})
+            return self._send(500, response, "text/xml; charset=utf-8")
+
+        failure, profile = self.backend._inject(operation)
+        if failure == "drop":
+            return self._drop()
+        if failure == "error":
+            response = soap_response("error", {"success": False, "message": "Erreur injectée"})
+            return self._send(profile.error_status, response, "text/xml; charset=utf-8")
+
+        args = {child.tag.split("}")[-1]: child.text or "" for child in element}
+        result = self.backend.handle_soap(operation, args)
+        self._send(200, soap_response(operation, result, profile.padding), "text/xml; charset=utf-8")
+
+def _parse_settings(values: List[str], convert) -> Dict[str, object]:
+    """Options `operation=valeur` (une valeur seule s'applique à `*`)"""
+    settings = {}
+    for value in values:
+        operation, _, setting = value.rpartition("=")
+        settings[operation or "*"] = convert(setting)
+    return settings
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur SOAP/REST de substitution en mémoire")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--users", type=int, default=100, help="Utilisateurs créés au démarrage")
+    parser.add_argument("--articles", type=int, default=100, help="Articles créés au démarrage")
+    parser.add_argument("--seed", type=int, default=0, help="Graine des tirages aléatoires")
+    parser.add_argument("--latency", action="append", default=[], metavar="[OP=]SECONDES")
+    parser.add_argument("--jitter", action="append", default=[], metavar="[OP=]SECONDES")
+    parser.add_argument("--error-rate", action="append", default=[], metavar="[OP=]TAUX")
+    parser.add_argument("--drop-rate", action="append", default=[], metavar="[OP=]TAUX")
+    parser.add_argument("--padding", action="append", default=[], metavar="[OP=]OCTETS")
+    parser.add_argument("--capacity", type=int, help="Requêtes traitées simultanément (les autres attendent)")
+    args = parser.parse_args(argv)
+
+    backend = FakeBackend(args.host, args.port, users=args.users, articles=args.articles, seed=args.seed,
+                          capacity=args.capacity)
+    for option, field, convert in (("latency", "latency", float), ("jitter", "jitter", float),
+                                   ("error_rate", "error_rate", float), ("drop_rate", "drop_rate", float),
+                                   ("padding", "padding", int)):
+        for operation, value in _parse_settings(getattr(args, option), convert).items():
+            backend.set_profile(operation, **{field: value})
+
+    print(f"🚀 Serveur de substitution sur {backend.url}")
+    print(f"🔑 Token SOAP: {backend.soap_token}")
+    backend.serve_forever()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Réconciliation des utilisateurs avec un état souhaité (export d'annuaire)
+News Chronicle Online - Client SOAP
+
+Plutôt que de renvoyer tous les comptes à chaque synchronisation, la liste
+actuelle est téléchargée une fois, indexée par nom d'utilisateur et par ID,
+puis comparée à l'état souhaité : seules les différences (créations,
+changements de rôle ou de nom, suppressions) sont envoyées, par lots
+batchUsers en parallèle.
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from bulk_users import iter_rows, row_text
+from soap_user_manager import MAX_BATCH_SIZE, OUTCOME_UNKNOWN, SoapClient, User
+
+ROLES = ("VISITEUR", "EDITEUR", "ADMIN")
+
+# Ordre d'application : les suppressions et renommages libèrent des noms
+# d'utilisateur que les opérations suivantes peuvent reprendre
+PHASES = ("delete", "update", "add")
+
+# Nombre maximal de suppressions appliquées par défaut (protège d'un fichier tronqué ou vide)
+MAX_DELETES = 100
+
+@dataclass
+class ReconcilePlan:
+    """Différences entre les utilisateurs actuels et l'état souhaité
+
+    `creates`, `updates` et `deletes` sont des opérations batchUsers
+    (`action`, `userId`, `username`, `password`, `role`). `invalid` liste
+    les entrées souhaitées ignorées, avec la raison. `unchanged` compte les
+    utilisateurs déjà conformes.
+    """
+    creates: List[Dict] = field(default_factory=list)
+    updates: List[Dict] = field(default_factory=list)
+    deletes: List[Dict] = field(default_factory=list)
+    invalid: List[Tuple[str, str]] = field(default_factory=list)
+    unchanged: int = 0
+
+    def operations(self, action: str) -> List[Dict]:
+        return {"add": self.creates, "update": self.updates, "delete": self.deletes}[action]
+
+def load_desired(path: str) -> List[Dict]:
+    """Lit l'état souhaité depuis un fichier CSV/JSONL
+
+    Colonnes : `username`, `role` (VISITEUR par défaut), `password` (utilisé
+    uniquement pour créer un compte) et `id` (optionnel : un compte trouvé
+    par son ID est renommé si son nom diffère). Une entrée illisible (valeur
+    JSONL qui n'est pas du texte) porte `error` et sera ignorée par le plan.
+    """
+    desired = []
+    for row_number, row in iter_rows(path):
+        user_id = str(row.get("id") or "").strip()
+        entry = {"row": row_number, "id": int(user_id) if user_id.isdigit() else None}
+        try:
+            entry.update(username=row_text(row, "username"), role=row_text(row, "role").upper() or "VISITEUR",
+                         password=row_text(row, "password", strip=False) or None)
+        except ValueError as e:
+            entry.update(username="", role="", password=None, error=str(e))
+        desired.append(entry)
+    return desired
+
+def plan_reconciliation(current: Iterable[User], desired: Iterable[Dict],
+                        protected: Iterable[str] = ()) -> ReconcilePlan:
+    """Calcule les opérations minimales pour passer de `current` à `desired`
+
+    Chaque entrée souhaitée est rapprochée d'un compte existant par son ID
+    s'il est fourni, sinon par son nom d'utilisateur (deux index en
+    dictionnaire : une recherche en temps constant par entrée). Les mots de
+    passe des comptes existants ne sont jamais modifiés. Les comptes absents
+    de l'état souhaité sont à supprimer, sauf ceux de `protected`.
+    """
+    by_id: Dict[int, User] = {}
+    by_username: Dict[str, User] = {}
+    for user in current:
+        by_id[user.id] = user
+        by_username[user.username] = user
+
+    plan = ReconcilePlan()
+    matched: Set[int] = set()
+    seen: Set[str] = set()
+    for entry in desired:
+        username = entry.get("username")
+        label = username or f"ligne {entry.get('row', '?')}"
+        if entry.get("error"):
+            plan.invalid.append((label, entry["error"]))
+            continue
+        if not username:
+            plan.invalid.append((label, "Nom d'utilisateur requis"))
+            continue
+        if entry["role"] not in ROLES:
+            plan.invalid.append((label, f"Rôle inconnu: {entry['role']}"))
+            continue
+        if username in seen:
+            plan.invalid.append((label, "Nom d'utilisateur en double dans l'état souhaité"))
+            continue
+        seen.add(username)
+
+        user = by_id.get(entry["id"]) if entry.get("id") is not None else None
+        if user is None:
+            user = by_username.get(username)
+        if user is None:
+            if not entry.get("password"):
+                plan.invalid.append((label, "Mot de passe requis pour créer le compte"))
+                continue
+            plan.creates.append({"action": "add", "username": username,
+                                 "password": entry["password"], "role": entry["role"]})
+            continue
+        if user.id in matched:
+            plan.invalid.append((label, f"Compte ID {user.id} déjà rapproché d'une autre entrée"))
+            continue
+        matched.add(user.id)
+
+        changes = {}
+        if user.username != username:
+            changes["username"] = username
+        if user.role != entry["role"]:
+            changes["role"] = entry["role"]
+        if changes:
+            plan.updates.append({"action": "update", "userId": user.id, **changes})
+        else:
+            plan.unchanged += 1
+
+    protected = set(protected)
+    for user in by_id.values():
+        if user.id not in matched and user.username not in protected:
+            plan.deletes.append({"action": "delete", "userId": user.id, "username": user.username})
+    return plan
+
+def _describe(operation: Dict) -> str:
+    if operation["action"] == "add":
+        return f"+ {operation['username']} ({operation['role']})"
+    if operation["action"] == "delete":
+        return f"- {operation['username']} (ID {operation['userId']})"
+    changes = ", ".join(f"{key}={operation[key]}" for key in ("username", "role") if key in operation)
+    return f"~ ID {operation['userId']}: {changes}"
+
+def apply_plan(client: SoapClient, plan: ReconcilePlan, workers: int = 4, batch_size: int = 500,
+               delete: bool = False) -> Dict[str, Dict[str, int]]:
+    """Applique le plan par lots batchUsers envoyés en parallèle, phase par phase
+
+    Les suppressions ne sont appliquées qu'avec `delete=True`. Renvoie, par
+    action, le nombre d'opérations réussies, échouées et au résultat inconnu
+    (réponse du lot perdue : elles ont pu être appliquées).
+    """
+    stats = {action: {"success": 0, "failed": 0, "unknown": 0} for action in PHASES}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for action in PHASES:
+            operations = plan.operations(action)
+            if not operations or (action == "delete" and not delete):
+                continue
+            # `username` des suppressions ne sert qu'aux messages
+            payload = [{key: value for key, value in operation.items()
+                        if action != "delete" or key != "username"} for operation in operations]
+            chunks = [(operations[start:start + batch_size], payload[start:start + batch_size])
+                      for start in range(0, len(operations), batch_size)]
+            futures = [(chunk, executor.submit(client.batch, sent, len(sent))) for chunk, sent in chunks]
+            for chunk, future in futures:
+                for operation, result in zip(chunk, future.result()):
+                    if result.get("success"):
+                        stats[action]["success"] += 1
+                    elif result.get("outcome") == OUTCOME_UNKNOWN:
+                        stats[action]["unknown"] += 1
+                        print(f"❓ {_describe(operation)}: {result.get('message')}", file=sys.stderr)
+                    else:
+                        stats[action]["failed"] += 1
+                        print(f"❌ {_describe(operation)}: {result.get('message') or 'Erreur inconnue'}",
+                              file=sys.stderr)
+    return stats
+
+def reconcile_users(client: SoapClient, desired: Iterable[Dict], dry_run: bool = False, delete: bool = False,
+                    workers: int = 4, batch_size: int = 500,
+                    protected: Optional[Iterable[str]] = None,
+                    max_deletes: Optional[int] = MAX_DELETES) -> Dict[str, object]:
+    """Aligne les utilisateurs du serveur sur l'état souhaité
+
+    `desired` contient des dictionnaires `username`, `role`, `password` et
+    éventuellement `id` (voir load_desired). Avec `dry_run`, le plan est
+    affiché sans rien modifier. Les suppressions exigent `delete=True` ;
+    sans cette option elles sont seulement signalées. Le compte connecté
+    n'est jamais supprimé (`protected` remplace cette liste).
+
+    Avec `delete=True`, la réconciliation est refusée (ValueError) avant
+    toute modification si le compte connecté est inconnu (token SOAP seul,
+    sans `protected`) ou si le plan prévoit plus de `max_deletes`
+    suppressions (None : pas de plafond).
+
+    Renvoie les compteurs du plan, les résultats par action et les durées
+    des étapes (secondes).
+    """
+    applies_deletes = delete and not dry_run
+    if protected is None:
+        if applies_deletes and not client.username:
+            # Avec un token SOAP seul, le compte de l'appelant ne peut pas être protégé
+            raise ValueError("Suppressions refusées : compte connecté inconnu (token SOAP sans session). "
+                             "Ouvrir une session (commande login) ou relancer sans --delete")
+        protected = [client.username] if client.username else []
+
+    timings = {}
+    started = time.perf_counter()
+    fields = {}
+    current = list(client.iter_users(fields=fields))
+    if fields.get("success") != "true":
+        raise ValueError(f"Liste des utilisateurs indisponible: {fields.get('message') or 'Erreur inconnue'}")
+    timings["fetch"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    plan = plan_reconciliation(current, desired, protected)
+    timings["diff"] = time.perf_counter() - started
+
+    print(f"📋 {len(current)} utilisateur(s) actuel(s), {plan.unchanged} déjà conforme(s)")
+    print(f"🔍 Plan: {len(plan.creates)} création(s), {len(plan.updates)} modification(s), "
+          f"{len(plan.deletes)} suppression(s), {len(plan.invalid)} entrée(s) ignorée(s)")
+    for label, reason in plan.invalid:
+        print(f"⚠️  {label}: {reason}", file=sys.stderr)
+    if applies_deletes and max_deletes is not None and len(plan.deletes) > max_deletes:
+        raise ValueError(f"Réconciliation refusée : {len(plan.deletes)} suppression(s) prévue(s), plus que le "
+                         f"maximum autorisé ({max_deletes}). Vérifier le fichier (--dry-run) ou relever --max-deletes")
+    if plan.deletes and not delete and not dry_run:
+        print(f"ℹ️  {len(plan.deletes)} suppression(s) non appliquée(s) (option --delete)")
+
+    results = None
+    if dry_run:
+        for action in PHASES:
+            for operation in plan.operations(action):
+                print(_describe(operation))
+    else:
+        started = time.perf_counter()
+        results = apply_plan(client, plan, workers, max(1, min(batch_size, MAX_BATCH_SIZE)), delete)
+        timings["apply"] = time.perf_counter() - started
+        applied = sum(counts["success"] for counts in results.values())
+        failed = sum(counts["failed"] for counts in results.values())
+        unknown = sum(counts["unknown"] for counts in results.values())
+        print(f"✅ Réconciliation terminée: {applied} opération(s) appliquée(s), {failed} échec(s)")
+        if unknown:
+            print(f"❓ {unknown} opération(s) au résultat inconnu : relancer la réconciliation pour les vérifier")
+
+    print("⏱️  " + ", ".join(f"{step} {seconds:.2f}s" for step, seconds in timings.items()))
+    return {
+        "current": len(current),
+        "unchanged": plan.unchanged,
+        "planned": {"add": len(plan.creates), "update": len(plan.updates), "delete": len(plan.deletes)},
+        "invalid": len(plan.invalid),
+        "results": results,
+        "timings": timings,
+    }
+
+def main(argv=None):
+    """Point d'entrée de la commande `reconcile` (voir user_cli)"""
+    import user_cli
+    return user_cli.main(argv)
+
+if __name__ == "__main__":
+    sys.exit(main())
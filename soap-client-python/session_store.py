@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Sessions d'authentification persistantes entre deux exécutions
+News Chronicle Online - Client SOAP
+
+Le token JWT renvoyé par authenticateUser et le token SOAP sont conservés,
+avec leur date d'expiration, dans un fichier JSON lisible par le seul
+propriétaire (0600). Une session par URL de serveur.
+"""
+
+import base64
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+# Fichier par défaut (surchargeable par la variable SOAP_SESSION_FILE)
+DEFAULT_SESSION_FILE = os.path.join(os.path.expanduser("~"), ".newschronicle", "soap_session.json")
+
+# Un token qui expire dans moins de cette marge (secondes) est considéré comme expiré
+EXPIRY_MARGIN = 60
+
+def jwt_expiry(token: Optional[str]) -> Optional[float]:
+    """Date d'expiration (`exp`, secondes epoch) d'un JWT, sans vérifier la signature"""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+def is_valid(expires_at: Optional[float], now: Optional[float] = None) -> bool:
+    """Vrai si la date d'expiration est inconnue ou suffisamment lointaine"""
+    if expires_at is None:
+        return True
+    return expires_at - EXPIRY_MARGIN > (time.time() if now is None else now)
+
+class SessionStore:
+    """Fichier de sessions (droits 0600, écriture atomique)
+
+    Chaque session est un dictionnaire : `username`, `role`, `auth_token`,
+    `auth_expires_at`, `soap_token`, `soap_expires_at` (dates en secondes
+    epoch, None si inconnues). Les tokens expirés sont retirés à la lecture.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.environ.get("SOAP_SESSION_FILE") or DEFAULT_SESSION_FILE
+
+    def _read_all(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, encoding="utf-8") as handle:
+                if os.name == "posix" and os.fstat(handle.fileno()).st_mode & 0o077:
+                    # Fichier lisible par d'autres comptes : on restreint les droits
+                    os.chmod(self.path, 0o600)
+                data = json.load(handle)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            # Fichier illisible ou corrompu : traité comme vide (réécrit à la prochaine sauvegarde)
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write_all(self, sessions: Dict[str, Dict]):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # Fichier temporaire créé en 0600 dans le même répertoire puis renommé :
+        # le token n'est jamais lisible par d'autres, même brièvement
+        descriptor, temporary = tempfile.mkstemp(prefix=".session-", dir=directory)
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as handle:
+                json.dump(sessions, handle, indent=2)
+            os.replace(temporary, self.path)
+        except BaseException:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+            raise
+
+    def load(self, base_url: str) -> Optional[Dict]:
+        """Session valide pour ce serveur (tokens expirés retirés), ou None"""
+        session = self._read_all().get(base_url)
+        if not isinstance(session, dict):
+            return None
+        session = dict(session)
+        if not session.get("auth_token") or not is_valid(session.get("auth_expires_at")):
+            session["auth_token"] = session["auth_expires_at"] = None
+        if not session.get("soap_token") or not is_valid(session.get("soap_expires_at")):
+            session["soap_token"] = session["soap_expires_at"] = None
+        if not session["auth_token"] and not session["soap_token"]:
+            return None
+        return session
+
+    def save(self, base_url: str, session: Dict):
+        """Enregistre (remplace) la session de ce serveur"""
+        sessions = self._read_all()
+        sessions[base_url] = session
+        self._write_all(sessions)
+
+    def clear(self, base_url: Optional[str] = None) -> bool:
+        """Supprime la session d'un serveur (toutes si base_url est None) ; vrai si elle existait"""
+        sessions = self._read_all()
+        if base_url is None:
+            existed = bool(sessions)
+            sessions = {}
+        else:
+            existed = sessions.pop(base_url, None) is not None
+        if not sessions:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        else:
+            self._write_all(sessions)
+        return existed
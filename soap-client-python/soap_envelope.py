@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Sérialisation des requêtes SOAP (enveloppes précompilées)
+News Chronicle Online - Client SOAP
+"""
+
+from typing import Dict, Optional, Tuple, Union
+
+SOAP_ENV_NAMESPACE = "http://schemas.xmlsoap.org/soap/envelope/"
+SOAP_NAMESPACE = "http://newschronicle.com/soap"
+
+# Paramètres de chaque opération, dans l'ordre des messages *Request du WSDL
+OPERATION_PARAMETERS: Dict[str, Tuple[str, ...]] = {
+    "authenticateUser": ("username", "password"),
+    "listUsers": ("token", "updatedSince", "offset", "limit", "role", "usernamePrefix", "createdAfter"),
+    "addUser": ("token", "username", "password", "role"),
+    "updateUser": ("token", "userId", "username", "password", "role"),
+    "deleteUser": ("token", "userId"),
+    "batchUsers": ("token", "operations"),
+}
+
+class EnvelopeTemplate:
+    """Enveloppe SOAP précompilée pour une opération
+
+    Les fragments fixes (en-tête, balises des paramètres) sont calculés une
+    seule fois : construire une requête se résume à un `join` et un `encode`.
+    """
+
+    __slots__ = ("operation", "parameters", "_prefix", "_suffix", "_tags")
+
+    def __init__(self, operation: str, parameters: Tuple[str, ...]):
+        self.operation = operation
+        self.parameters = parameters
+        self._prefix = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            f'<soapenv:Envelope xmlns:soapenv="{SOAP_ENV_NAMESPACE}" xmlns:soap="{SOAP_NAMESPACE}">'
+            f'<soapenv:Header/><soapenv:Body><soap:{operation}>'
+        )
+        self._suffix = f'</soap:{operation}></soapenv:Body></soapenv:Envelope>'
+        self._tags = {name: (f"<{name}>", f"</{name}>") for name in parameters}
+
+    def _parts(self, params: Dict) -> list:
+        parts = [self._prefix]
+        tags = self._tags
+        for name, value in params.items():
+            if value is None:
+                continue
+            try:
+                open_tag, close_tag = tags[name]
+            except KeyError:
+                raise ValueError(f"Paramètre '{name}' inconnu pour l'opération {self.operation}") from None
+            # Échappement du contenu texte, en ligne : exécuté pour chaque valeur (chemin critique)
+            if value.__class__ is not str:
+                value = str(value)
+            if "&" in value or "<" in value or ">" in value:
+                value = value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            parts += (open_tag, value, close_tag)
+        parts.append(self._suffix)
+        return parts
+
+    def render(self, params: Dict) -> bytes:
+        """Construit l'enveloppe encodée en UTF-8 ; les valeurs None sont omises"""
+        return "".join(self._parts(params)).encode("utf-8")
+
+    def render_into(self, buffer: bytearray, params: Dict) -> bytearray:
+        """Construit l'enveloppe dans un tampon réutilisable (vidé au préalable)"""
+        buffer.clear()
+        buffer += "".join(self._parts(params)).encode("utf-8")
+        return buffer
+
+ENVELOPES: Dict[str, EnvelopeTemplate] = {
+    operation: EnvelopeTemplate(operation, parameters)
+    for operation, parameters in OPERATION_PARAMETERS.items()
+}
+
+def build_envelope(operation: str, params: Dict, buffer: Optional[bytearray] = None) -> Union[bytes, bytearray]:
+    """Construit la requête SOAP d'une opération déclarée dans le WSDL"""
+    try:
+        template = ENVELOPES[operation]
+    except KeyError:
+        raise ValueError(f"Opération SOAP inconnue: {operation}") from None
+    if buffer is not None:
+        return template.render_into(buffer, params)
+    return template.render(params)
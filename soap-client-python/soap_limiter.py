@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Limitation adaptative du nombre de requêtes SOAP en vol
+News Chronicle Online - Client SOAP
+
+Le serveur Express tourne dans un seul processus, devant une seule base :
+au-delà d'un certain parallélisme, les requêtes supplémentaires ne font
+qu'allonger la file d'attente du serveur puis échouer (503, délais
+dépassés). `AdaptiveLimiter` ajuste la limite de requêtes simultanées
+d'après ce que le client observe (AIMD) :
+
+- chaque réponse rapide, alors que la limite est utilisée, l'augmente de
+  1/limite (soit environ +1 par « tour » de requêtes) ;
+- une erreur 5xx, un délai dépassé, une connexion refusée, ou une latence
+  moyenne récente supérieure à `latency_tolerance` fois la latence de
+  référence la multiplie par `backoff`.
+
+Les latences sont suivies par opération SOAP : un listUsers complet est
+normalement bien plus lent qu'un deleteUser et ne doit pas passer pour une
+surcharge. La référence d'une opération est la plus basse latence de ses
+`baseline_window` à `2 * baseline_window` derniers appels : elle suit un
+ralentissement durable au lieu de rester sur un minimum ancien.
+
+Un seau à jetons (`TokenBucket`) peut en plus plafonner le débit
+(requêtes par seconde).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+class TokenBucket:
+    """Seau à jetons : au plus `rate` requêtes par seconde, rafales de `burst`"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("Le débit doit être positif")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Prend un jeton ; renvoie 0 en cas de succès, sinon l'attente nécessaire (secondes)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Attend qu'un jeton soit disponible puis le prend"""
+        while True:
+            delay = self.try_acquire()
+            if not delay:
+                return
+            time.sleep(delay)
+
+class LatencyTracker:
+    """Latences d'une opération : référence (minimum glissant) et moyenne récente
+
+    Le minimum est calculé sur deux fenêtres consécutives de `window`
+    appels : à la fin de chaque fenêtre, la plus ancienne est oubliée.
+    """
+
+    __slots__ = ("window", "smoothed", "_current_min", "_previous_min", "_samples")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.smoothed: Optional[float] = None
+        self._current_min: Optional[float] = None
+        self._previous_min: Optional[float] = None
+        self._samples = 0
+
+    @property
+    def baseline(self) -> Optional[float]:
+        minimums = [value for value in (self._current_min, self._previous_min) if value is not None]
+        return min(minimums) if minimums else None
+
+    def observe(self, latency: float):
+        if self._current_min is None or latency < self._current_min:
+            self._current_min = latency
+        self._samples += 1
+        if self._samples >= self.window:
+            self._previous_min, self._current_min, self._samples = self._current_min, None, 0
+        # Moyenne mobile : une réponse lente isolée ne suffit pas à baisser la limite
+        self.smoothed = latency if self.smoothed is None else self.smoothed + (latency - self.smoothed) * 0.2
+
+class AdaptiveLimiter:
+    """Limite adaptative (AIMD) de requêtes simultanées, avec débit maximal optionnel
+
+    Utilisé par SoapClient (option `limiter`) autour de chaque tentative :
+    un appel attend une place libre (et un jeton si `rate` est fixé), puis
+    rend sa place avec le résultat observé. Une même instance peut être
+    partagée par plusieurs clients vers le même serveur.
+
+    `limit`, `in_flight` et `queue_depth` (appels en attente) sont lisibles
+    à tout moment ; `snapshot()` et `to_prometheus()` les exportent.
+    """
+
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 64,
+                 backoff: float = 0.9, latency_tolerance: float = 2.0,
+                 rate: Optional[float] = None, burst: Optional[float] = None, baseline_window: int = 100):
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("Bornes de limite invalides (1 <= min_limit <= max_limit)")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._waiting = 0
+        self.baseline_window = baseline_window
+        self._latencies: Dict[Optional[str], LatencyTracker] = {}
+        # Chaque baisse ouvre une nouvelle époque : les requêtes parties avant
+        # elle ne provoquent pas de baisse supplémentaire (pas d'effondrement
+        # de la limite sur une rafale d'échecs simultanés)
+        self._epoch = 0
+        self.increases = 0
+        self.decreases = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    def acquire(self) -> int:
+        """Attend une place libre (puis un jeton) ; renvoie l'époque à rendre à release()"""
+        with self._condition:
+            self._waiting += 1
+            try:
+                while self._in_flight >= int(self._limit):
+                    self._condition.wait()
+                self._in_flight += 1
+                epoch = self._epoch
+            finally:
+                self._waiting -= 1
+        if self.bucket is not None:
+            try:
+                self.bucket.acquire()
+            except BaseException:
+                self.release(epoch, None, dropped=True)
+                raise
+        return epoch
+
+    def release(self, epoch: int, latency: Optional[float], overloaded: bool = False, dropped: bool = False,
+                operation: Optional[str] = None):
+        """Rend une place et ajuste la limite
+
+        `overloaded` signale une surcharge du serveur (5xx, délai dépassé,
+        connexion refusée). `dropped` rend la place sans rien conclure
+        (appel interrompu côté client). `latency` est comparée aux latences
+        précédentes de la même `operation`.
+        """
+        with self._condition:
+            used = self._in_flight
+            self._in_flight -= 1
+            if not dropped:
+                if latency is not None and not overloaded:
+                    tracker = self._latencies.get(operation)
+                    if tracker is None:
+                        tracker = self._latencies[operation] = LatencyTracker(self.baseline_window)
+                    tracker.observe(latency)
+                    overloaded = tracker.smoothed > tracker.baseline * self.latency_tolerance
+                if overloaded:
+                    if epoch == self._epoch:
+                        self._epoch += 1
+                        self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                        self.decreases += 1
+                elif used * 2 >= self._limit and self._limit < self.max_limit:
+                    # Augmentation seulement si la limite est réellement utilisée
+                    self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+                    self.increases += 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, operation: Optional[str] = None) -> Iterator["LimiterSlot"]:
+        """Place le temps d'une requête ; l'appelant renseigne `slot.overloaded` si besoin"""
+        epoch = self.acquire()
+        slot = LimiterSlot()
+        started = time.perf_counter()
+        try:
+            yield slot
+        except BaseException:
+            self.release(epoch, None, overloaded=slot.overloaded, dropped=not slot.overloaded)
+            raise
+        self.release(epoch, time.perf_counter() - started, slot.overloaded, operation=operation)
+
+    def snapshot(self) -> Dict[str, object]:
+        """État courant pour la supervision"""
+        with self._condition:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "queue_depth": self._waiting,
+                "latencies": {operation: {"baseline": tracker.baseline, "recent": tracker.smoothed}
+                              for operation, tracker in self._latencies.items()},
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "rate": self.bucket.rate if self.bucket is not None else None,
+            }
+
+    def to_prometheus(self, prefix: str = "soap_client") -> str:
+        """Export au format texte d'exposition Prometheus (jauges et compteurs)"""
+        state = self.snapshot()
+        lines = []
+        for name, kind, help_text, value in (
+                ("concurrency_limit", "gauge", "Limite courante de requêtes en vol", state["limit"]),
+                ("in_flight_requests", "gauge", "Requêtes en vol", state["in_flight"]),
+                ("queued_requests", "gauge", "Requêtes en attente d'une place", state["queue_depth"]),
+                ("limit_increases_total", "counter", "Augmentations de la limite", state["increases"]),
+                ("limit_decreases_total", "counter", "Baisses de la limite", state["decreases"])):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+class LimiterSlot:
+    """Place obtenue par AdaptiveLimiter.slot()"""
+
+    __slots__ = ("overloaded",)
+
+    def __init__(self):
+        self.overloaded = False
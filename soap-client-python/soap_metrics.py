@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Instrumentation des appels SOAP (observateurs, phases, histogrammes)
+News Chronicle Online - Client SOAP
+"""
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Phases mesurées pour chaque appel, dans l'ordre chronologique
+PHASES = ("build", "connect", "send", "server", "receive", "parse")
+
+# Bornes des histogrammes (secondes et octets)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+class RequestTrace:
+    """Mesures d'un appel SOAP, transmises aux observateurs
+
+    Durées en secondes :
+    - `build` : construction de l'enveloppe
+    - `connect` : résolution DNS et ouverture de la connexion TCP/TLS
+      (0 si une connexion du pool est réutilisée)
+    - `send` : écriture de la requête sur la socket
+    - `server` : attente des en-têtes de la réponse (traitement Express)
+    - `receive` : téléchargement du corps de la réponse
+    - `parse` : analyse XML côté client
+    Les phases s'additionnent sur l'ensemble des tentatives.
+    """
+
+    __slots__ = ("operation", "started", "total", "build", "connect", "send", "server", "receive", "parse",
+                 "request_bytes", "response_bytes", "status", "retries", "success", "error")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.started = time.perf_counter()
+        self.total = self.build = self.connect = self.send = self.server = self.receive = self.parse = 0.0
+        self.request_bytes = self.response_bytes = 0
+        self.status: Optional[int] = None
+        self.retries = 0
+        self.success = False
+        self.error: Optional[str] = None
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def phases(self) -> Dict[str, float]:
+        return {phase: getattr(self, phase) for phase in PHASES}
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__ if name != "started"}
+
+class SoapObserver:
+    """Interface des observateurs de SoapClient (toutes les méthodes sont facultatives)"""
+
+    def on_request(self, trace: RequestTrace):
+        """Appelé avant l'envoi (l'enveloppe est construite, `request_bytes` est connu)"""
+
+    def on_retry(self, trace: RequestTrace, reason: str):
+        """Appelé avant chaque nouvelle tentative (`reason` : classe d'erreur ou code HTTP)"""
+
+    def on_response(self, trace: RequestTrace):
+        """Appelé après l'analyse d'une réponse HTTP 200 (`success` reflète la réponse SOAP)"""
+
+    def on_error(self, trace: RequestTrace, error: Exception):
+        """Appelé lorsque l'appel échoue (réseau, HTTP ou XML) ; `trace.error` contient la classe"""
+
+# Mesure en cours sur le thread courant, renseignée par les connexions instrumentées
+_active = threading.local()
+
+def activate(trace: Optional[RequestTrace]):
+    """Associe une mesure au thread courant (None pour la détacher)"""
+    _active.trace = trace
+
+def _active_trace() -> Optional[RequestTrace]:
+    return getattr(_active, "trace", None)
+
+class _TimedConnectionMixin:
+    """Chronomètre l'ouverture de connexion, l'envoi et l'attente de la réponse
+
+    http.client ouvre la connexion à la volée dans `request()` : le temps de
+    connexion mesuré pendant l'envoi est donc déduit de la phase `send`.
+    """
+
+    def connect(self):
+        trace = _active_trace()
+        if trace is None:
+            return super().connect()
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            trace.connect += time.perf_counter() - started
+
+    def request(self, *args, **kwargs):
+        trace = _active_trace()
+        if trace is None:
+            return super().request(*args, **kwargs)
+        started = time.perf_counter()
+        connect_before = trace.connect
+        try:
+            return super().request(*args, **kwargs)
+        finally:
+            trace.send += time.perf_counter() - started - (trace.connect - connect_before)
+
+    def getresponse(self, *args, **kwargs):
+        trace = _active_trace()
+        if trace is None:
+            return super().getresponse(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().getresponse(*args, **kwargs)
+        finally:
+            trace.server += time.perf_counter() - started
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class InstrumentedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter dont les connexions renseignent la mesure du thread courant
+
+    Monté par SoapClient au premier observateur enregistré : sans
+    observateur, le client garde l'adaptateur standard.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+class Histogram:
+    """Histogramme cumulatif à bornes fixes (format Prometheus)"""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Couples (borne `le`, nombre cumulé), borne +Inf comprise"""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Estimation d'un quantile (borne supérieure du seau atteint)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(self.cumulative()),
+        }
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+class MetricsCollector(SoapObserver):
+    """Observateur agrégeant les mesures par opération
+
+    Histogrammes de durée totale et par phase, tailles de requête et de
+    réponse, compteurs d'appels, de nouvelles tentatives et d'erreurs par
+    classe. Exportable au format texte Prometheus ou en JSON.
+    """
+
+    def __init__(self, prefix: str = "soap_client"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.latency: Dict[str, Histogram] = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.phases: Dict[Tuple[str, str], Histogram] = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.request_bytes: Dict[str, Histogram] = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.response_bytes: Dict[str, Histogram] = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.outcomes: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.retries: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.errors: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def on_retry(self, trace: RequestTrace, reason: str):
+        with self._lock:
+            self.retries[trace.operation, reason] += 1
+
+    def _record(self, trace: RequestTrace, outcome: str):
+        operation = trace.operation
+        with self._lock:
+            self.latency[operation].observe(trace.total)
+            for phase, value in trace.phases().items():
+                self.phases[operation, phase].observe(value)
+            self.request_bytes[operation].observe(trace.request_bytes)
+            if trace.response_bytes:
+                self.response_bytes[operation].observe(trace.response_bytes)
+            self.outcomes[operation, outcome] += 1
+            if trace.error:
+                self.errors[operation, trace.error] += 1
+
+    def on_response(self, trace: RequestTrace):
+        self._record(trace, "success" if trace.success else "failure")
+
+    def on_error(self, trace: RequestTrace, error: Exception):
+        self._record(trace, "error")
+
+    def reset(self):
+        """Remet toutes les mesures à zéro"""
+        with self._lock:
+            for metric in (self.latency, self.phases, self.request_bytes, self.response_bytes,
+                           self.outcomes, self.retries, self.errors):
+                metric.clear()
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """Export JSON : une entrée par opération"""
+        with self._lock:
+            operations = {}
+            for operation, histogram in self.latency.items():
+                operations[operation] = {
+                    "latency": histogram.to_dict(),
+                    "phases": {phase: self.phases[operation, phase].to_dict() for phase in PHASES},
+                    "request_bytes": self.request_bytes[operation].to_dict(),
+                    "response_bytes": self.response_bytes[operation].to_dict(),
+                    "outcomes": {outcome: count for (op, outcome), count in self.outcomes.items() if op == operation},
+                    "retries": {reason: count for (op, reason), count in self.retries.items() if op == operation},
+                    "errors": {error: count for (op, error), count in self.errors.items() if op == operation},
+                }
+            return json.dumps({"operations": operations}, indent=indent)
+
+    def to_prometheus(self) -> str:
+        """Export au format texte d'exposition Prometheus"""
+        prefix = self.prefix
+        lines = []
+
+        def histogram(name: str, help_text: str, series):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for labels, hist in series:
+                for bound, count in hist.cumulative():
+                    lines.append(f'{prefix}_{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{prefix}_{name}_sum{{{labels}}} {hist.sum!r}")
+                lines.append(f"{prefix}_{name}_count{{{labels}}} {hist.count}")
+
+        def counter(name: str, help_text: str, series):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for labels, value in series:
+                lines.append(f"{prefix}_{name}{{{labels}}} {value}")
+
+        with self._lock:
+            histogram("request_duration_seconds", "Durée totale des appels SOAP",
+                      [(_labels(operation=op), hist) for op, hist in sorted(self.latency.items())])
+            histogram("phase_duration_seconds", "Durée des appels SOAP par phase",
+                      [(_labels(operation=op, phase=phase), hist) for (op, phase), hist in sorted(self.phases.items())])
+            histogram("request_bytes", "Taille des requêtes SOAP",
+                      [(_labels(operation=op), hist) for op, hist in sorted(self.request_bytes.items())])
+            histogram("response_bytes", "Taille des réponses SOAP",
+                      [(_labels(operation=op), hist) for op, hist in sorted(self.response_bytes.items())])
+            counter("requests_total", "Appels SOAP par résultat",
+                    [(_labels(operation=op, outcome=outcome), count)
+                     for (op, outcome), count in sorted(self.outcomes.items())])
+            counter("retries_total", "Nouvelles tentatives par cause",
+                    [(_labels(operation=op, reason=reason), count)
+                     for (op, reason), count in sorted(self.retries.items())])
+            counter("errors_total", "Erreurs par classe",
+                    [(_labels(operation=op, error=error), count)
+                     for (op, error), count in sorted(self.errors.items())])
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Analyse incrémentale des réponses SOAP volumineuses (listUsers)
+News Chronicle Online - Client SOAP
+"""
+
+import json
+import xml.sax
+from collections import deque
+from typing import Dict, Iterable, Iterator, Optional
+
+class JsonArrayStream:
+    """Décodeur incrémental d'un tableau JSON reçu par morceaux
+
+    Chaque élément du tableau est renvoyé dès qu'il est complet : seul
+    l'élément en cours de réception est conservé en mémoire.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self.finished = False
+
+    def feed(self, text: str) -> Iterator:
+        """Ajoute un morceau de texte et renvoie les éléments désormais complets"""
+        self._buffer += text
+        buffer = self._buffer
+        position = 0
+        length = len(buffer)
+        while not self.finished:
+            while position < length and buffer[position] in " \t\r\n,":
+                position += 1
+            if position >= length:
+                break
+            if not self._started:
+                if buffer[position] != "[":
+                    raise ValueError("Tableau JSON attendu")
+                self._started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                self.finished = True
+                position += 1
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Élément incomplet : attendre le morceau suivant
+                break
+            if end == length and not isinstance(item, (dict, list)):
+                # Un scalaire en fin de tampon (nombre, ...) peut être tronqué
+                break
+            position = end
+            yield item
+        # Libérer le texte déjà décodé
+        self._buffer = buffer[position:]
+
+    def close(self):
+        """Vérifie que le tableau est complet (un tableau vide ou absent est accepté)"""
+        if self._started and not self.finished:
+            raise ValueError("Tableau JSON tronqué")
+        if not self._started and self._buffer.strip():
+            raise ValueError("Tableau JSON attendu")
+
+class ListUsersHandler(xml.sax.ContentHandler):
+    """Gestionnaire SAX de la réponse listUsers
+
+    Les champs simples (success, message...) sont collectés dans `fields` ;
+    le texte de l'élément `users` est transmis au fur et à mesure à un
+    JsonArrayStream dont les éléments décodés s'accumulent dans `items`.
+    """
+
+    def __init__(self, method: str = "listUsers", array_field: str = "users"):
+        super().__init__()
+        self.response_tag = f"{method}Response"
+        self.array_field = array_field
+        self.fields: Dict[str, str] = {}
+        self.items = deque()
+        self.array = JsonArrayStream()
+        self.found_response = False
+        self._in_response = False
+        self._current: Optional[str] = None
+        self._text = []
+
+    def startElement(self, name, attrs):
+        local_name = name.split(":")[-1]
+        if local_name == self.response_tag:
+            self._in_response = self.found_response = True
+        elif self._in_response and self._current is None:
+            self._current = local_name
+            self._text = []
+
+    def characters(self, content):
+        if self._current == self.array_field:
+            self.items.extend(self.array.feed(content))
+        elif self._current is not None:
+            self._text.append(content)
+
+    def endElement(self, name):
+        local_name = name.split(":")[-1]
+        if local_name == self.response_tag:
+            self._in_response = False
+        elif self._current == local_name:
+            if local_name == self.array_field:
+                self.array.close()
+            else:
+                self.fields[local_name] = "".join(self._text)
+            self._current = None
+
+def iter_array_response(chunks: Iterable[bytes], method: str = "listUsers",
+                        array_field: str = "users", fields: Optional[Dict] = None) -> Iterator[Dict]:
+    """Analyse une réponse SOAP reçue par morceaux et renvoie les éléments du tableau JSON
+
+    Les champs simples de la réponse sont recopiés dans `fields` s'il est
+    fourni, au fil de l'analyse (`success` est donc connu avant les éléments).
+    """
+    handler = ListUsersHandler(method, array_field)
+    parser = xml.sax.make_parser()
+    parser.setContentHandler(handler)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if fields is not None:
+            fields.update(handler.fields)
+        while handler.items:
+            yield handler.items.popleft()
+    parser.close()
+    if fields is not None:
+        fields.update(handler.fields)
+    while handler.items:
+        yield handler.items.popleft()
+    if not handler.found_response:
+        raise ValueError(f"Réponse {method} non trouvée")
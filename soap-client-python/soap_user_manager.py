@@ -4,74 +4,361 @@ Application Python pour la gestion des utilisateurs via les services SOAP
 News Chronicle Online - Client SOAP
 """
 
-import requests
+# Les modules coûteux (requests, analyseurs XML, threads) sont importés à la
+# première utilisation : les commandes ponctuelles et --help démarrent vite
 import json
 import sys
 import os
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-import xml.etree.ElementTree as ET
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
 import getpass
 
-@dataclass
+from soap_envelope import OPERATION_PARAMETERS, build_envelope
+from session_store import SessionStore, is_valid, jwt_expiry
+
+if TYPE_CHECKING:
+    import requests
+
+@dataclass(frozen=True)
 class User:
-    """Classe pour représenter un utilisateur"""
+    """Classe pour représenter un utilisateur (immuable, sans __dict__ par instance)"""
+    __slots__ = ("id", "username", "role", "created_at")
+    
     id: int
     username: str
     role: str
     created_at: str
 
+# Opérations pouvant être rejouées sans effet de bord supplémentaire
+IDEMPOTENT_OPERATIONS = frozenset({"authenticateUser", "listUsers", "updateUser", "deleteUser"})
+
+# Opérations modifiant la liste des utilisateurs (invalident le cache local)
+MUTATING_OPERATIONS = frozenset({"addUser", "updateUser", "deleteUser", "batchUsers"})
+
+# Nombre maximal d'opérations par appel batchUsers (limite du serveur)
+MAX_BATCH_SIZE = 1000
+
+# Délai de lecture ajouté à un lot batchUsers par opération portant un mot de passe :
+# le serveur le hache (bcrypt, coût 10, 50 à 100 ms) dans la transaction du lot
+PASSWORD_HASH_SECONDS = 0.25
+
+# Valeur de `outcome` d'une réponse perdue : la requête a pu être appliquée par le serveur
+OUTCOME_UNKNOWN = "unknown"
+
+# Codes HTTP transitoires justifiant une nouvelle tentative
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+
+# Taille des morceaux lus sur la socket pour les réponses analysées en flux
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Taille (octets) à partir de laquelle une enveloppe est envoyée compressée en gzip
+COMPRESS_THRESHOLD = 4096
+
+# Messages SOAP indiquant un token SOAP refusé (renouvelable)
+TOKEN_REJECTED_MESSAGES = frozenset({"Token invalide ou expiré"})
+
+def _parse_expiry(value: Optional[str]) -> Optional[float]:
+    """Date ISO 8601 renvoyée par l'API REST (expiresAt) en secondes epoch"""
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
 class SoapClient:
-    """Client pour les services SOAP"""
+    """Client pour les services SOAP
+    
+    Le client conserve une session HTTP persistante (keep-alive) dont le pool
+    de connexions est partagé par tous les appels. Il peut être utilisé comme
+    gestionnaire de contexte pour fermer proprement les connexions.
+    
+    Des observateurs (`soap_metrics.SoapObserver`, par exemple
+    `MetricsCollector`) peuvent être enregistrés pour mesurer chaque appel ;
+    sans observateur, aucune mesure n'est effectuée.
+    
+    Les enveloppes d'au moins `compress_threshold` octets (lots batchUsers
+    notamment) sont envoyées compressées en gzip ; None désactive la
+    compression. Les réponses compressées par le serveur (gzip, deflate,
+    br si le paquet brotli est installé) sont décompressées par requests,
+    qui annonce ces encodages dans Accept-Encoding.
+    
+    Un `limiter` (`soap_limiter.AdaptiveLimiter`) borne le nombre de
+    tentatives en vol et l'ajuste d'après la latence et les erreurs
+    observées (5xx, délais dépassés) ; il peut aussi plafonner le débit.
+    Pour un appel analysé en flux, la place est rendue à la réception des
+    en-têtes de la réponse.
+    
+    `transport` choisit l'échange des opérations utilisateurs (liste,
+    ajout, modification, suppression, lots) : `soap` (défaut, token SOAP)
+    ou `rest` (JSON sur /api/users, token JWT d'un compte ADMIN) ; voir
+    user_transport.py. Les méthodes et leurs résultats sont identiques.
+    
+    Avec un `session_store` (`session_store.SessionStore`), les tokens JWT
+    et SOAP sont enregistrés avec leur expiration et repris par
+    `restore_session` lors d'une exécution suivante. Un token SOAP refusé
+    par le serveur est renouvelé une fois (`generate_soap_token`), après
+    une nouvelle authentification si le token JWT a expiré et que les
+    identifiants sont connus de cette exécution.
+    """
     
-    def __init__(self, base_url: str = "http://localhost:3000"):
+    def __init__(self, base_url: str = "http://localhost:3000", pool_size: int = 10,
+                 connect_timeout: float = 5.0, read_timeout: float = 30.0,
+                 max_retries: int = 3, backoff_factor: float = 0.5, verbose: bool = True,
+                 cache_ttl: Optional[float] = None, cache_size: int = 8, observers: Iterable = (),
+                 session_store: Optional[SessionStore] = None,
+                 compress_threshold: Optional[int] = COMPRESS_THRESHOLD, limiter=None,
+                 transport: str = "soap"):
         self.base_url = base_url
         self.soap_url = f"{base_url}/soap"
         self.auth_token = None
         self.soap_token = None
+        self.username = None
+        self.role = None
+        self.auth_expires_at: Optional[float] = None
+        self.soap_token_expires_at: Optional[float] = None
+        self.session_store = session_store
+        # Identifiants de l'exécution en cours (jamais écrits sur disque), pour se réauthentifier
+        self._credentials: Optional[Tuple[str, str]] = None
+        self._auth_lock = threading.Lock()
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.pool_size = pool_size
+        self.compress_threshold = compress_threshold
+        self.limiter = limiter
+        self.verbose = verbose
+        self._observers = []
         
-    def _make_soap_request(self, method: str, params: Dict) -> Dict:
-        """Effectue une requête SOAP"""
+        # Cache local de listUsers, activé uniquement si une durée de vie est fournie
+        self.cache = None
+        if cache_ttl:
+            from user_cache import UserListCache
+            self.cache = UserListCache(ttl=cache_ttl, max_entries=cache_size)
+        
+        # Session persistante : une seule poignée de main TCP/TLS par connexion du pool
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            'Content-Type': 'text/xml; charset=utf-8',
+            'Connection': 'keep-alive'
+        })
+        for observer in observers:
+            self.add_observer(observer)
+        
+        # Échange des opérations utilisateurs : enveloppes SOAP ou JSON REST (voir user_transport.py)
+        from user_transport import create_transport
+        self.transport = create_transport(transport, self)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Ferme la session HTTP et libère les connexions du pool"""
+        self.session.close()
+    
+    def _log(self, message: str):
+        """Affiche un message de progression si le mode verbeux est actif"""
+        if self.verbose:
+            print(message)
+    
+    def add_observer(self, observer):
+        """Enregistre un observateur des appels SOAP (voir soap_metrics.SoapObserver)
+        
+        Au premier observateur, la session bascule sur un adaptateur HTTP
+        instrumenté qui chronomètre connexion, envoi et attente du serveur.
+        """
+        if not self._observers:
+            from soap_metrics import InstrumentedHTTPAdapter
+            adapter = InstrumentedHTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=True)
+            for prefix in ("http://", "https://"):
+                self.session.adapters[prefix].close()
+                self.session.mount(prefix, adapter)
+        self._observers.append(observer)
+        return observer
+    
+    def remove_observer(self, observer):
+        """Retire un observateur précédemment enregistré"""
+        self._observers.remove(observer)
+    
+    def _notify(self, hook: str, *args):
+        """Transmet une mesure aux observateurs ; leurs erreurs n'interrompent pas l'appel"""
+        for observer in self._observers:
+            callback = getattr(observer, hook, None)
+            if callback is None:
+                continue
+            try:
+                callback(*args)
+            except Exception as e:
+                self._log(f"⚠️  Erreur de l'observateur {type(observer).__name__}.{hook}: {str(e)}")
+    
+    def _start_trace(self, method: str, started: float, soap_body: bytes):
+        """Crée la mesure d'un appel (None sans observateur)"""
+        if not self._observers:
+            return None
+        from soap_metrics import RequestTrace
+        trace = RequestTrace(method)
+        trace.started = started
+        trace.build = time.perf_counter() - started
+        trace.request_bytes = len(soap_body)
+        self._notify("on_request", trace)
+        return trace
+    
+    def _fail_trace(self, trace, error: Exception):
+        """Termine la mesure d'un appel en échec"""
+        trace.error = trace.error or type(error).__name__
+        trace.finish()
+        self._notify("on_error", trace, error)
+    
+    def _request(self, http_method: str, url: str, trace, **kwargs) -> "requests.Response":
+        """Une tentative d'envoi ; avec une mesure, le temps non attribué aux phases réseau va à `receive`"""
+        kwargs.setdefault("timeout", self.timeout)
+        if trace is None:
+            return self.session.request(http_method, url, **kwargs)
+        from soap_metrics import activate
+        started = time.perf_counter()
+        network = trace.connect + trace.send + trace.server
+        activate(trace)
         try:
-            # Construction de l'enveloppe SOAP
-            soap_body = f"""<?xml version="1.0" encoding="UTF-8"?>
-<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" xmlns:soap="http://newschronicle.com/soap">
-   <soapenv:Header/>
-   <soapenv:Body>
-      <soap:{method}>
-         {self._dict_to_soap_params(params)}
-      </soap:{method}>
-   </soapenv:Body>
-</soapenv:Envelope>"""
-            
-            headers = {
-                'Content-Type': 'text/xml; charset=utf-8',
-                'SOAPAction': method
-            }
+            return self.session.request(http_method, url, **kwargs)
+        finally:
+            activate(None)
+            trace.receive += time.perf_counter() - started - (trace.connect + trace.send + trace.server - network)
+    
+    def _limited(self, send, method: Optional[str] = None) -> "requests.Response":
+        """Une tentative (`send()`), dans une place du limiteur s'il y en a un"""
+        if self.limiter is None:
+            return send()
+        import requests
+        with self.limiter.slot(method) as slot:
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout):
+                slot.overloaded = True
+                raise
+            slot.overloaded = response.status_code >= 500
+            return response
+    
+    def _post_with_retry(self, method: str, soap_body: bytes, stream: bool = False, trace=None,
+                         timeout: Optional[Tuple[float, float]] = None) -> "requests.Response":
+        """Envoie la requête SOAP (voir _send_with_retry)
+        
+        Avec `stream`, le corps de la réponse n'est pas téléchargé d'avance.
+        `timeout` remplace les délais du client pour cette requête.
+        """
+        headers = {'SOAPAction': method}
+        if self.compress_threshold is not None and len(soap_body) >= self.compress_threshold:
+            # Compressé une seule fois, même si la requête est rejouée
+            import gzip
+            soap_body = gzip.compress(soap_body, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+            if trace is not None:
+                trace.request_bytes = len(soap_body)
+        return self._send_with_retry(method, lambda: self._request(
+            "POST", self.soap_url, trace, data=soap_body, headers=headers, stream=stream,
+            timeout=timeout or self.timeout), trace)
+    
+    def _send_with_retry(self, method: str, send, trace=None) -> "requests.Response":
+        """Effectue `send()`, en le rejouant avec backoff exponentiel si l'opération est idempotente"""
+        import requests
+        attempts = self.max_retries + 1 if method in IDEMPOTENT_OPERATIONS else 1
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            try:
+                response = self._limited(send, method)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_attempt:
+                    raise
+                reason = type(e).__name__
+            else:
+                if trace is not None:
+                    trace.status = response.status_code
+                if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                    return response
+                # Réponse abandonnée : sa connexion doit revenir au pool (bloquant) avant la tentative suivante
+                response.close()
+                reason = f"HTTP {response.status_code}"
+            if trace is not None:
+                trace.retries += 1
+                self._notify("on_retry", trace, reason)
+            time.sleep(self.backoff_factor * (2 ** attempt))
+    
+    def _make_soap_request(self, method: str, params: Dict, timeout: Optional[Tuple[float, float]] = None) -> Dict:
+        """Effectue une requête SOAP ; un token SOAP refusé est renouvelé une fois si possible"""
+        result = self._send_soap_request(method, params, timeout)
+        token = params.get("token")
+        if token and self._token_rejected(result) and self._renew_soap_token(token):
+            result = self._send_soap_request(method, {**params, "token": self.soap_token}, timeout)
+        return result
+    
+    def _send_soap_request(self, method: str, params: Dict, timeout: Optional[Tuple[float, float]] = None) -> Dict:
+        """Effectue une requête SOAP
+        
+        Si la requête a été envoyée sans qu'une réponse SOAP soit reçue
+        (délai dépassé, connexion coupée, erreur HTTP), le résultat porte
+        `outcome` = OUTCOME_UNKNOWN : le serveur a pu l'appliquer.
+        """
+        trace = None
+        sent = False
+        try:
+            # Construction de l'enveloppe SOAP à partir du gabarit précompilé
+            started = time.perf_counter()
+            soap_body = build_envelope(method, params)
+            trace = self._start_trace(method, started, soap_body)
             
-            response = requests.post(self.soap_url, data=soap_body, headers=headers)
+            sent = True
+            response = self._post_with_retry(method, soap_body, trace=trace, timeout=timeout)
             
             if response.status_code != 200:
+                if trace is not None:
+                    trace.error = f"HTTP {response.status_code}"
                 raise Exception(f"Erreur HTTP {response.status_code}: {response.text}")
             
             # Parser la réponse SOAP
-            return self._parse_soap_response(response.text, method)
+            if trace is None:
+                result = self._parse_soap_response(response.text, method)
+            else:
+                trace.response_bytes = len(response.content)
+                parse_started = time.perf_counter()
+                result = self._parse_soap_response(response.text, method, trace)
+                trace.parse = time.perf_counter() - parse_started
+                trace.success = result.get("success") == "true"
+                trace.finish()
+                self._notify("on_response", trace)
+            if self.cache is not None and method in MUTATING_OPERATIONS and result.get("success") == "true":
+                self.cache.invalidate()
+            return result
             
         except Exception as e:
-            print(f"❌ Erreur lors de la requête SOAP {method}: {str(e)}")
+            if trace is not None:
+                self._fail_trace(trace, e)
+            self._log(f"❌ Erreur lors de la requête SOAP {method}: {str(e)}")
+            if sent:
+                return {"success": False, "message": str(e), "outcome": OUTCOME_UNKNOWN}
             return {"success": False, "message": str(e)}
     
-    def _dict_to_soap_params(self, params: Dict) -> str:
-        """Convertit un dictionnaire en paramètres SOAP"""
-        soap_params = ""
-        for key, value in params.items():
-            if value is not None:
-                soap_params += f"<{key}>{value}</{key}>"
-        return soap_params
+    def execute(self, method: str, params: Dict) -> Dict:
+        """Exécute une opération SOAP et renvoie le dictionnaire de réponse brut
+        
+        Le token SOAP configuré est ajouté aux paramètres si l'opération
+        l'attend et qu'il n'y figure pas. Avec le transport `rest`, les
+        opérations utilisateurs passent par /api/users (réponse de même forme).
+        """
+        if self.soap_token and "token" not in params and "token" in OPERATION_PARAMETERS.get(method, ()):
+            params = {"token": self.soap_token, **params}
+        return self.transport.execute(method, params)
     
-    def _parse_soap_response(self, xml_response: str, method: str) -> Dict:
+    def _parse_soap_response(self, xml_response: str, method: str, trace=None) -> Dict:
         """Parse la réponse SOAP"""
+        import xml.etree.ElementTree as ET
         try:
             root = ET.fromstring(xml_response)
             
@@ -94,12 +381,14 @@ class SoapClient:
             return result
             
         except ET.ParseError as e:
-            print(f"❌ Erreur de parsing XML: {str(e)}")
+            if trace is not None:
+                trace.error = "ParseError"
+            self._log(f"❌ Erreur de parsing XML: {str(e)}")
             return {"success": False, "message": "Réponse XML invalide"}
     
     def authenticate_user(self, username: str, password: str) -> bool:
         """Authentifie un utilisateur"""
-        print(f"🔐 Authentification de l'utilisateur '{username}'...")
+        self._log(f"🔐 Authentification de l'utilisateur '{username}'...")
         
         result = self._make_soap_request("authenticateUser", {
             "username": username,
@@ -108,58 +397,394 @@ class SoapClient:
         
         if result.get("success") == "true":
             self.auth_token = result.get("token")
-            role = result.get("role")
-            print(f"✅ Authentification réussie ! Rôle: {role}")
+            self.auth_expires_at = jwt_expiry(self.auth_token)
+            self.username = username
+            self.role = role = result.get("role")
+            self._credentials = (username, password)
+            self._log(f"✅ Authentification réussie ! Rôle: {role}")
+            self.save_session()
             return True
         else:
-            print(f"❌ Échec de l'authentification: {result.get('message', 'Erreur inconnue')}")
+            self._log(f"❌ Échec de l'authentification: {result.get('message', 'Erreur inconnue')}")
             return False
     
-    def set_soap_token(self, token: str):
-        """Définit le token SOAP pour les opérations d'administration"""
+    def set_soap_token(self, token: str, expires_at: Optional[float] = None):
+        """Définit le token SOAP pour les opérations d'administration (enregistré dans la session)"""
         self.soap_token = token
-        print(f"🔑 Token SOAP configuré: {token[:20]}...")
+        self.soap_token_expires_at = expires_at
+        self._log(f"🔑 Token SOAP configuré: {token[:20]}...")
+        self.save_session()
+    
+    def set_credentials(self, username: str, password: str):
+        """Identifiants utilisés pour se réauthentifier si le token JWT expire (gardés en mémoire)"""
+        self._credentials = (username, password)
+    
+    def restore_session(self) -> bool:
+        """Reprend la session enregistrée pour ce serveur
+        
+        Les tokens encore valides sont restaurés (le token SOAP seulement si
+        aucun n'est déjà configuré). Renvoie vrai si le token JWT l'a été :
+        aucune authentification n'est alors nécessaire.
+        """
+        if self.session_store is None:
+            return False
+        session = self.session_store.load(self.base_url)
+        if session is None:
+            return False
+        if session.get("soap_token") and not self.soap_token:
+            self.soap_token = session["soap_token"]
+            self.soap_token_expires_at = session.get("soap_expires_at")
+        if not session.get("auth_token"):
+            return False
+        self.auth_token = session["auth_token"]
+        self.auth_expires_at = session.get("auth_expires_at")
+        self.username = session.get("username")
+        self.role = session.get("role")
+        return True
+    
+    def save_session(self):
+        """Enregistre les tokens courants dans le fichier de session (s'il est configuré)"""
+        if self.session_store is None or not (self.auth_token or self.soap_token):
+            return
+        try:
+            self.session_store.save(self.base_url, {
+                "username": self.username,
+                "role": self.role,
+                "auth_token": self.auth_token,
+                "auth_expires_at": self.auth_expires_at,
+                "soap_token": self.soap_token,
+                "soap_expires_at": self.soap_token_expires_at,
+            })
+        except OSError as e:
+            self._log(f"⚠️  Session non enregistrée: {str(e)}")
+    
+    def clear_session(self) -> bool:
+        """Oublie les tokens et supprime la session enregistrée ; vrai si elle existait"""
+        self.auth_token = self.soap_token = self.username = self.role = None
+        self.auth_expires_at = self.soap_token_expires_at = None
+        self._credentials = None
+        if self.session_store is None:
+            return False
+        try:
+            return self.session_store.clear(self.base_url)
+        except OSError as e:
+            self._log(f"⚠️  Session non supprimée: {str(e)}")
+            return False
+    
+    def _transport_ready(self) -> bool:
+        """Vérifie que le transport dispose des identifiants nécessaires (message d'erreur sinon)"""
+        missing = self.transport.missing_credentials()
+        if missing:
+            self._log(f"❌ {missing}")
+            return False
+        return True
+    
+    def _reauthenticate(self) -> bool:
+        """Nouvelle authentification avec les identifiants de cette exécution"""
+        if self._credentials is None:
+            return False
+        self._log("🔄 Session expirée, nouvelle authentification...")
+        return self.authenticate_user(*self._credentials)
+    
+    @staticmethod
+    def _token_rejected(result: Dict) -> bool:
+        return result.get("success") != "true" and result.get("message") in TOKEN_REJECTED_MESSAGES
+    
+    def _renew_soap_token(self, rejected_token: str) -> bool:
+        """Remplace un token SOAP refusé par un nouveau ; vrai si l'appel peut être rejoué
+        
+        Un seul renouvellement pour les appels concurrents : les threads
+        arrivés après lui réutilisent le nouveau token.
+        """
+        with self._auth_lock:
+            if self.soap_token != rejected_token:
+                return bool(self.soap_token)
+            if not (self.auth_token and is_valid(self.auth_expires_at)) and not self._reauthenticate():
+                return False
+            self._log("🔄 Token SOAP refusé, génération d'un nouveau token...")
+            return self.generate_soap_token(f"Client Python ({self.username})") is not None
+    
+    def generate_soap_token(self, description: str) -> Optional[str]:
+        """Génère un token SOAP via l'API REST d'administration
+        
+        Nécessite une authentification préalable avec un compte ADMIN
+        (`authenticate_user`). Le token généré est configuré sur le client.
+        Si le token JWT est refusé (HTTP 401), le client se réauthentifie une
+        fois lorsque les identifiants de cette exécution sont connus.
+        """
+        if not self.auth_token and not self._reauthenticate():
+            self._log("❌ Authentification requise pour générer un token SOAP")
+            return None
+        
+        import requests
+        for attempt in range(2):
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/api/admin/soap-tokens",
+                    json={"description": description},
+                    headers={'Content-Type': 'application/json', 'Authorization': f"Bearer {self.auth_token}"},
+                    timeout=self.timeout
+                )
+                data = response.json()
+            except (requests.RequestException, ValueError) as e:
+                self._log(f"❌ Erreur lors de la génération du token SOAP: {str(e)}")
+                return None
+            if response.status_code != 401 or attempt or not self._reauthenticate():
+                break
+        
+        if response.status_code != 201 or not data.get("success"):
+            self._log(f"❌ Erreur: {data.get('error', f'Erreur HTTP {response.status_code}')}")
+            return None
+        
+        self.set_soap_token(data["data"]["token"], _parse_expiry(data["data"].get("expiresAt")))
+        return self.soap_token
     
-    def list_users(self) -> List[User]:
-        """Liste tous les utilisateurs"""
+    def verify_soap_token(self) -> Optional[Dict]:
+        """Vérifie le token SOAP configuré via l'API REST
+        
+        Renvoie les informations du token (description, expiresAt,
+        lastUsedAt) ou None s'il est invalide ou expiré.
+        """
+        import requests
         if not self.soap_token:
-            print("❌ Token SOAP requis pour cette opération")
+            self._log("❌ Token SOAP requis pour cette opération")
+            return None
+        
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/admin/soap-tokens/verify",
+                json={"token": self.soap_token},
+                headers={'Content-Type': 'application/json'},
+                timeout=self.timeout
+            )
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            self._log(f"❌ Erreur lors de la vérification du token SOAP: {str(e)}")
+            return None
+        
+        if response.status_code != 200 or not data.get("success"):
+            self._log(f"❌ Erreur: {data.get('error', f'Erreur HTTP {response.status_code}')}")
+            return None
+        info = data.get("data") or {}
+        expires_at = _parse_expiry(info.get("expiresAt"))
+        if expires_at != self.soap_token_expires_at:
+            self.soap_token_expires_at = expires_at
+            self.save_session()
+        return info
+    
+    def _stream_users(self, fields: Dict, params: Optional[Dict] = None) -> Iterator[User]:
+        """Envoie listUsers et analyse la réponse au fil de sa réception
+        
+        Les champs simples de la réponse (success, message...) sont recopiés
+        dans `fields`. Les erreurs sont affichées et interrompent le parcours.
+        Un token SOAP refusé est renouvelé une fois si possible (le serveur
+        ne renvoie alors aucun utilisateur).
+        """
+        params = params or {"token": self.soap_token}
+        yield from self._stream_users_once(fields, params)
+        token = params.get("token")
+        if token and self._token_rejected(fields) and self._renew_soap_token(token):
+            fields.clear()
+            yield from self._stream_users_once(fields, {**params, "token": self.soap_token})
+    
+    def _stream_users_once(self, fields: Dict, params: Dict) -> Iterator[User]:
+        """Un appel listUsers analysé en flux (voir _stream_users)"""
+        from soap_stream import iter_array_response
+        trace = None
+        try:
+            started = time.perf_counter()
+            soap_body = build_envelope("listUsers", params)
+            trace = self._start_trace("listUsers", started, soap_body)
+            with self._post_with_retry("listUsers", soap_body, stream=True, trace=trace) as response:
+                if response.status_code != 200:
+                    if trace is not None:
+                        trace.error = f"HTTP {response.status_code}"
+                    raise Exception(f"Erreur HTTP {response.status_code}: {response.text}")
+                
+                chunks = response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+                if trace is None:
+                    for user_data in iter_array_response(chunks, "listUsers", "users", fields):
+                        yield self._user_from_json(user_data)
+                else:
+                    yield from self._traced_stream(trace, chunks, fields)
+            if trace is not None:
+                trace.success = fields.get("success") == "true"
+                trace.finish()
+                self._notify("on_response", trace)
+        except Exception as e:
+            if trace is not None:
+                self._fail_trace(trace, e)
+            fields.update(success="false", message=str(e))
+            self._log(f"❌ Erreur lors de la requête SOAP listUsers: {str(e)}")
+    
+    @staticmethod
+    def _user_from_json(user_data: Dict) -> User:
+        """Construit un User à partir d'un élément JSON de listUsers"""
+        role = user_data.get("role")
+        return User(
+            id=user_data.get("id"),
+            username=user_data.get("username"),
+            # Quelques rôles distincts : une seule chaîne partagée par rôle
+            role=sys.intern(role) if role else role,
+            created_at=user_data.get("createdAt")
+        )
+    
+    def _traced_stream(self, trace, chunks: Iterable[bytes], fields: Dict) -> Iterator[User]:
+        """Variante mesurée de l'analyse en flux : sépare téléchargement et analyse
+        
+        Le temps passé chez l'appelant entre deux utilisateurs n'est pas compté.
+        """
+        from soap_stream import iter_array_response
+        
+        def timed_chunks():
+            iterator = iter(chunks)
+            while True:
+                received = time.perf_counter()
+                chunk = next(iterator, None)
+                trace.receive += time.perf_counter() - received
+                if chunk is None:
+                    return
+                trace.response_bytes += len(chunk)
+                yield chunk
+        
+        started = time.perf_counter()
+        receive_before = trace.receive
+        suspended = 0.0
+        try:
+            for user_data in iter_array_response(timed_chunks(), "listUsers", "users", fields):
+                user = self._user_from_json(user_data)
+                paused = time.perf_counter()
+                yield user
+                suspended += time.perf_counter() - paused
+        finally:
+            trace.parse += time.perf_counter() - started - suspended - (trace.receive - receive_before)
+    
+    def iter_users(self, role: Optional[str] = None, username_prefix: Optional[str] = None,
+                   created_after=None, fields: Optional[Dict] = None) -> Iterator[User]:
+        """Parcourt les utilisateurs un par un, sans charger la liste complète
+        
+        La réponse listUsers est lue depuis la socket et analysée de manière
+        incrémentale : le premier utilisateur est disponible avant la fin du
+        téléchargement et la mémoire reste bornée. Les filtres sont ceux de
+        `list_users`. Si `fields` est fourni, il reçoit les champs simples de
+        la réponse (`success`, `message`...) pour détecter un échec.
+        """
+        if fields is None:
+            fields = {}
+        missing = self.transport.missing_credentials()
+        if missing:
+            fields.update(success="false", message=missing)
+            self._log(f"❌ {missing}")
+            return
+        
+        params = {"token": self.soap_token, **self._list_filters(role, username_prefix, created_after)}
+        yield from self.transport.stream_users(fields, params)
+        if fields.get("success") != "true":
+            self._log(f"❌ Erreur: {fields.get('message', 'Erreur inconnue')}")
+    
+    def _list_filters(self, role: Optional[str], username_prefix: Optional[str], created_after) -> Dict:
+        """Paramètres de filtrage de listUsers (les valeurs absentes sont omises)"""
+        if isinstance(created_after, datetime):
+            created_after = created_after.isoformat()
+        filters = {"role": role, "usernamePrefix": username_prefix, "createdAfter": created_after}
+        return {key: value for key, value in filters.items() if value}
+    
+    def list_users(self, refresh: bool = False, role: Optional[str] = None,
+                   username_prefix: Optional[str] = None, created_after=None) -> List[User]:
+        """Liste les utilisateurs, éventuellement filtrés côté serveur
+        
+        Filtres : `role`, `username_prefix` et `created_after` (datetime ou
+        date ISO 8601). Si le cache est activé (`cache_ttl`), une liste encore
+        fraîche est renvoyée sans appel réseau. Une liste expirée, ou
+        `refresh=True`, déclenche une actualisation qui ne télécharge que les
+        utilisateurs modifiés depuis le dernier instantané lorsque le serveur
+        le permet.
+        """
+        if not self._transport_ready():
             return []
         
-        print("📋 Récupération de la liste des utilisateurs...")
-        result = self._make_soap_request("listUsers", {
-            "token": self.soap_token
-        })
+        filters = self._list_filters(role, username_prefix, created_after)
+        cache_key = (self.soap_token, tuple(sorted(filters.items())))
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.get(cache_key)
+            if entry is not None and not refresh and entry.is_fresh():
+                self._log(f"📋 {len(entry.users)} utilisateur(s) (cache local)")
+                return entry.to_list()
         
-        if result.get("success") == "true":
-            users_json = result.get("users", "[]")
-            try:
-                users_data = json.loads(users_json)
-                users = []
-                for user_data in users_data:
-                    users.append(User(
-                        id=user_data.get("id"),
-                        username=user_data.get("username"),
-                        role=user_data.get("role"),
-                        created_at=user_data.get("createdAt")
-                    ))
-                print(f"✅ {len(users)} utilisateur(s) trouvé(s)")
-                return users
-            except json.JSONDecodeError:
-                print("❌ Erreur de parsing JSON des utilisateurs")
-                return []
+        params = {"token": self.soap_token, **filters}
+        if entry is not None and entry.server_time:
+            params["updatedSince"] = entry.server_time
+            self._log("🔄 Actualisation de la liste des utilisateurs...")
         else:
-            print(f"❌ Erreur: {result.get('message', 'Erreur inconnue')}")
+            self._log("📋 Récupération de la liste des utilisateurs...")
+        fields = {}
+        users = list(self.transport.stream_users(fields, params))
+        
+        if fields.get("success") != "true":
+            self._log(f"❌ Erreur: {fields.get('message', 'Erreur inconnue')}")
             return []
+        
+        if self.cache is not None:
+            if "updatedSince" in params and fields.get("userIds") is not None:
+                # Réponse différentielle : fusion avec l'instantané existant
+                entry.apply_changes(users, json.loads(fields["userIds"]))
+                self.cache.touch(entry, fields.get("serverTime"))
+                users = entry.to_list()
+            else:
+                self.cache.put(cache_key, users, fields.get("serverTime"))
+        
+        self._log(f"✅ {len(users)} utilisateur(s) trouvé(s)")
+        return users
+    
+    def _fetch_page(self, params: Dict, offset: int) -> Tuple[Optional[List[User]], Optional[int]]:
+        """Télécharge une page de listUsers ; renvoie (utilisateurs, total) ou (None, None) en cas d'erreur"""
+        fields = {}
+        users = list(self.transport.stream_users(fields, {**params, "offset": offset}))
+        if fields.get("success") != "true":
+            self._log(f"❌ Erreur: {fields.get('message', 'Erreur inconnue')}")
+            return None, None
+        total = fields.get("total")
+        return users, int(total) if total else None
+    
+    def iter_user_pages(self, page_size: int = 500, role: Optional[str] = None,
+                        username_prefix: Optional[str] = None, created_after=None) -> Iterator[List[User]]:
+        """Parcourt les utilisateurs page par page (offset/limit), avec filtres côté serveur
+        
+        La page suivante est téléchargée en arrière-plan pendant que
+        l'appelant traite la page courante : seules deux pages au plus sont
+        en mémoire.
+        """
+        if not self._transport_ready():
+            return
+        
+        params = {"token": self.soap_token, "limit": page_size,
+                  **self._list_filters(role, username_prefix, created_after)}
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="soap-page") as executor:
+            offset = 0
+            future = executor.submit(self._fetch_page, params, offset)
+            try:
+                while future is not None:
+                    users, total = future.result()
+                    if not users:
+                        return
+                    offset += len(users)
+                    # Le serveur peut plafonner la taille de page : on se fie au total s'il est connu
+                    has_more = offset < total if total is not None else len(users) == page_size
+                    future = executor.submit(self._fetch_page, params, offset) if has_more else None
+                    yield users
+            finally:
+                if future is not None:
+                    future.cancel()
     
     def add_user(self, username: str, password: str, role: str = "VISITEUR") -> bool:
         """Ajoute un nouvel utilisateur"""
-        if not self.soap_token:
-            print("❌ Token SOAP requis pour cette opération")
+        if not self._transport_ready():
             return False
         
-        print(f"➕ Ajout de l'utilisateur '{username}' avec le rôle '{role}'...")
-        result = self._make_soap_request("addUser", {
+        self._log(f"➕ Ajout de l'utilisateur '{username}' avec le rôle '{role}'...")
+        result = self.transport.execute("addUser", {
             "token": self.soap_token,
             "username": username,
             "password": password,
@@ -168,19 +793,18 @@ class SoapClient:
         
         if result.get("success") == "true":
             user_id = result.get("userId")
-            print(f"✅ Utilisateur créé avec succès ! ID: {user_id}")
+            self._log(f"✅ Utilisateur créé avec succès ! ID: {user_id}")
             return True
         else:
-            print(f"❌ Erreur: {result.get('message', 'Erreur inconnue')}")
+            self._log(f"❌ Erreur: {result.get('message', 'Erreur inconnue')}")
             return False
     
     def update_user(self, user_id: int, username: str = None, password: str = None, role: str = None) -> bool:
         """Met à jour un utilisateur"""
-        if not self.soap_token:
-            print("❌ Token SOAP requis pour cette opération")
+        if not self._transport_ready():
             return False
         
-        print(f"✏️  Mise à jour de l'utilisateur ID {user_id}...")
+        self._log(f"✏️  Mise à jour de l'utilisateur ID {user_id}...")
         params = {"token": self.soap_token, "userId": user_id}
         if username:
             params["username"] = username
@@ -189,44 +813,112 @@ class SoapClient:
         if role:
             params["role"] = role
         
-        result = self._make_soap_request("updateUser", params)
+        result = self.transport.execute("updateUser", params)
         
         if result.get("success") == "true":
-            print("✅ Utilisateur mis à jour avec succès !")
+            self._log("✅ Utilisateur mis à jour avec succès !")
             return True
         else:
-            print(f"❌ Erreur: {result.get('message', 'Erreur inconnue')}")
+            self._log(f"❌ Erreur: {result.get('message', 'Erreur inconnue')}")
             return False
     
     def delete_user(self, user_id: int) -> bool:
         """Supprime un utilisateur"""
-        if not self.soap_token:
-            print("❌ Token SOAP requis pour cette opération")
+        if not self._transport_ready():
             return False
         
-        print(f"🗑️  Suppression de l'utilisateur ID {user_id}...")
-        result = self._make_soap_request("deleteUser", {
+        self._log(f"🗑️  Suppression de l'utilisateur ID {user_id}...")
+        result = self.transport.execute("deleteUser", {
             "token": self.soap_token,
             "userId": user_id
         })
         
         if result.get("success") == "true":
-            print("✅ Utilisateur supprimé avec succès !")
+            self._log("✅ Utilisateur supprimé avec succès !")
             return True
         else:
-            print(f"❌ Erreur: {result.get('message', 'Erreur inconnue')}")
+            self._log(f"❌ Erreur: {result.get('message', 'Erreur inconnue')}")
             return False
+    
+    def batch(self, operations: Iterable[Dict], batch_size: int = MAX_BATCH_SIZE) -> List[Dict]:
+        """Applique plusieurs modifications d'utilisateurs en un minimum d'allers-retours
+        
+        Chaque opération est un dictionnaire avec `action` (add, update ou
+        delete) et les champs correspondants (username, password, role,
+        userId). Les opérations sont envoyées par lots de `batch_size` via
+        batchUsers : le serveur vérifie le token une seule fois et applique
+        chaque lot dans une transaction. Renvoie un résultat par opération,
+        dans l'ordre (clés `success`, `message`, `userId`).
+        
+        Le délai de lecture d'un lot est allongé de PASSWORD_HASH_SECONDS par
+        opération portant un mot de passe. Si la réponse d'un lot est perdue,
+        ses opérations ne sont pas réussies mais portent `outcome` =
+        OUTCOME_UNKNOWN : la transaction a pu être validée par le serveur.
+        """
+        if not self._transport_ready():
+            return []
+        
+        operations = [{key: value for key, value in operation.items() if value is not None}
+                      for operation in operations]
+        results = []
+        for start in range(0, len(operations), batch_size):
+            chunk = operations[start:start + batch_size]
+            self._log(f"📦 Envoi d'un lot de {len(chunk)} opération(s)...")
+            hashed = sum(1 for operation in chunk if operation.get("password"))
+            connect_timeout, read_timeout = self.timeout
+            result = self.transport.execute("batchUsers", {
+                "token": self.soap_token,
+                "operations": json.dumps(chunk, ensure_ascii=False)
+            }, timeout=(connect_timeout, read_timeout + hashed * PASSWORD_HASH_SECONDS))
+            
+            if result.get("success") == "true":
+                chunk_results = json.loads(result.get("results") or "[]")
+                self._log(f"✅ {result.get('message')}")
+            elif result.get("outcome") == OUTCOME_UNKNOWN:
+                # Réponse perdue : la transaction a pu être validée, à vérifier avant de rejouer le lot
+                message = f"Résultat inconnu, le lot a pu être appliqué ({result.get('message')})"
+                self._log(f"❓ {message}")
+                chunk_results = [{"action": operation.get("action"), "success": False, "message": message,
+                                  "outcome": OUTCOME_UNKNOWN} for operation in chunk]
+            else:
+                # Lot rejeté ou annulé par le serveur : aucune opération appliquée
+                message = result.get("message", "Erreur inconnue")
+                self._log(f"❌ Erreur: {message}")
+                chunk_results = [{"action": operation.get("action"), "success": False, "message": message}
+                                 for operation in chunk]
+            results.extend(chunk_results)
+        return results
+    
+    def reconcile(self, desired_users: Iterable[Dict], dry_run: bool = False, delete: bool = False,
+                  workers: int = 4, batch_size: int = 500, **options) -> Dict:
+        """Aligne les utilisateurs du serveur sur un état souhaité (voir reconcile.py)
+        
+        Seules les différences sont envoyées : créations, changements de
+        rôle ou de nom et, avec `delete=True`, suppressions des comptes
+        absents de `desired_users` (options `protected` et `max_deletes`
+        de reconcile_users).
+        """
+        from reconcile import reconcile_users
+        return reconcile_users(self, desired_users, dry_run=dry_run, delete=delete,
+                               workers=workers, batch_size=batch_size, **options)
+
+# Nombre d'utilisateurs affichés par écran dans la recherche
+USERS_PER_SCREEN = 20
 
 class UserManagerApp:
     """Application principale de gestion des utilisateurs"""
     
     def __init__(self):
-        self.client = SoapClient()
+        self.client = SoapClient(cache_ttl=60, session_store=SessionStore())
         self.current_user = None
+        if os.name == 'nt':
+            # Active l'interprétation des séquences ANSI de la console Windows (une seule fois)
+            os.system('')
     
     def clear_screen(self):
-        """Efface l'écran"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        """Efface l'écran (séquence ANSI, sans lancer de shell)"""
+        sys.stdout.write("\033[2J\033[H")
+        sys.stdout.flush()
     
     def print_header(self):
         """Affiche l'en-tête de l'application"""
@@ -237,9 +929,14 @@ class UserManagerApp:
         print()
     
     def login(self) -> bool:
-        """Processus de connexion"""
+        """Processus de connexion (reprend la session enregistrée si elle est encore valide)"""
         self.clear_screen()
         self.print_header()
+        if self.client.restore_session():
+            self.current_user = self.client.username
+            print(f"🔓 Session reprise: {self.current_user} (rôle {self.client.role})")
+            return True
+        
         print("🔐 CONNEXION")
         print("-" * 30)
         
@@ -370,6 +1067,30 @@ class UserManagerApp:
         
         input("\nAppuyez sur Entrée pour continuer...")
     
+    def search_users_menu(self):
+        """Menu de recherche d'utilisateurs, affichés page par page"""
+        print("\n🔎 RECHERCHE D'UTILISATEURS")
+        print("-" * 30)
+        print("Laissez vide pour ne pas filtrer:")
+        role_choice = input("Rôle (1. VISITEUR, 2. EDITEUR, 3. ADMIN): ").strip()
+        role_map = {"1": "VISITEUR", "2": "EDITEUR", "3": "ADMIN"}
+        role = role_map.get(role_choice)
+        prefix = input("Début du nom d'utilisateur: ").strip() or None
+        
+        found = False
+        pages = self.client.iter_user_pages(page_size=USERS_PER_SCREEN, role=role, username_prefix=prefix)
+        for page_number, users in enumerate(pages, start=1):
+            found = True
+            print(f"\n📄 Page {page_number}")
+            self.display_users(users)
+            if input("\nEntrée pour la page suivante, q pour arrêter: ").strip().lower() == 'q':
+                pages.close()
+                break
+        
+        if not found:
+            print("📭 Aucun utilisateur trouvé")
+        input("\nAppuyez sur Entrée pour continuer...")
+    
     def main_menu(self):
         """Menu principal"""
         while True:
@@ -388,14 +1109,20 @@ class UserManagerApp:
             print("4. 🗑️  Supprimer un utilisateur")
             print("5. 🔑 Configurer le token SOAP")
             print("6. 🔄 Actualiser la liste")
+            print("7. 🔎 Rechercher des utilisateurs")
+            print("8. 🔒 Se déconnecter (oublier la session)")
             print("0. 🚪 Quitter")
             print()
             
-            choice = input("Votre choix (0-6): ").strip()
+            choice = input("Votre choix (0-8): ").strip()
             
             if choice == "0":
                 print("\n👋 Au revoir !")
                 break
+            elif choice == "8":
+                self.client.clear_session()
+                print("\n🔒 Session supprimée. Au revoir !")
+                break
             elif choice == "1":
                 users = self.client.list_users()
                 self.display_users(users)
@@ -422,27 +1149,42 @@ class UserManagerApp:
                 self.configure_soap_token()
             elif choice == "6":
                 print("🔄 Actualisation...")
-                users = self.client.list_users()
+                users = self.client.list_users(refresh=True)
                 self.display_users(users)
                 input("\nAppuyez sur Entrée pour continuer...")
+            elif choice == "7":
+                if not self.client.soap_token:
+                    print("❌ Token SOAP requis pour cette opération")
+                    input("\nAppuyez sur Entrée pour continuer...")
+                else:
+                    self.search_users_menu()
             else:
                 print("❌ Choix invalide")
                 input("\nAppuyez sur Entrée pour continuer...")
 
 def main():
     """Fonction principale"""
-    app = UserManagerApp()
-    
-    # Connexion
-    if not app.login():
-        print("\n❌ Échec de la connexion. Arrêt de l'application.")
-        sys.exit(1)
+    # Mode non interactif : commandes ponctuelles (list, add, update, delete, whoami, import, export)
+    if len(sys.argv) > 1:
+        import user_cli
+        sys.exit(user_cli.main(sys.argv[1:]))
     
-    # Configuration du token SOAP
-    app.configure_soap_token()
+    app = UserManagerApp()
     
-    # Menu principal
-    app.main_menu()
+    with app.client:
+        # Connexion
+        if not app.login():
+            print("\n❌ Échec de la connexion. Arrêt de l'application.")
+            sys.exit(1)
+        
+        # Configuration du token SOAP (sauf s'il a été repris de la session)
+        if app.client.soap_token:
+            print("🔑 Token SOAP de la session précédente réutilisé")
+        else:
+            app.configure_soap_token()
+        
+        # Menu principal
+        app.main_menu()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Tests de non-régression du client contre le serveur de substitution
+News Chronicle Online - Client SOAP
+
+Nouvelles tentatives, délais d'attente et pagination, sans Node ni base de
+données (voir fake_backend.py). Exécution :
+
+    python -m unittest test_fake_backend        # ou python test_fake_backend.py
+"""
+
+import shutil
+import tempfile
+import threading
+import unittest
+
+from fake_backend import FakeBackend
+from soap_user_manager import SoapClient
+
+class FakeBackendTestCase(unittest.TestCase):
+    """Un serveur de substitution par test, avec un client authentifié par token SOAP"""
+
+    users = 50
+
+    def setUp(self):
+        self.backend = FakeBackend(users=self.users, seed=1).start()
+        self.addCleanup(self.backend.stop)
+
+    def client(self, **options) -> SoapClient:
+        options.setdefault("backoff_factor", 0)
+        options.setdefault("verbose", False)
+        client = SoapClient(self.backend.url, **options)
+        self.addCleanup(client.close)
+        client.set_soap_token(self.backend.soap_token)
+        return client
+
+    def temporary_directory(self) -> str:
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        return directory
+
+class RetryTests(FakeBackendTestCase):
+
+    def test_idempotent_operation_is_retried_until_success(self):
+        self.backend.set_profile("listUsers", error_rate=1.0)
+        client = self.client(max_retries=2)
+        self.assertEqual(client.list_users(), [])
+        self.assertEqual(self.backend.calls["listUsers"], 3)
+
+        self.backend.set_profile("listUsers", error_rate=0.0)
+        self.backend.reset_calls()
+        self.assertEqual(len(client.list_users()), self.users + 1)
+        self.assertEqual(self.backend.calls["listUsers"], 1)
+
+    def test_retried_stream_releases_its_connection(self):
+        # Avec un pool d'une connexion, une réponse non lue bloquerait la tentative suivante
+        self.backend.set_profile("listUsers", error_rate=1.0)
+        client = self.client(pool_size=1, max_retries=2)
+        results = []
+        worker = threading.Thread(target=lambda: results.append((list(client.iter_users()), client.list_users())),
+                                  daemon=True)
+        worker.start()
+        worker.join(timeout=10)
+        self.assertFalse(worker.is_alive(), "listUsers bloqué en attente d'une connexion du pool")
+        self.assertEqual(results, [([], [])])
+        self.assertEqual(self.backend.calls["listUsers"], 6)
+
+    def test_dropped_connections_are_retried(self):
+        self.backend.set_profile("updateUser", drop_rate=1.0)
+        client = self.client(max_retries=3)
+        self.assertFalse(client.update_user(2, role="EDITEUR"))
+        self.assertEqual(self.backend.calls["updateUser"], 4)
+
+    def test_non_idempotent_operation_is_not_retried(self):
+        self.backend.set_profile("addUser", error_rate=1.0)
+        client = self.client(max_retries=3)
+        self.assertFalse(client.add_user("nouveau", "motdepasse"))
+        self.assertEqual(self.backend.calls["addUser"], 1)
+
+    def test_error_status_outside_retry_codes_is_not_retried(self):
+        self.backend.set_profile("listUsers", error_rate=1.0, error_status=500)
+        client = self.client(max_retries=3)
+        self.assertEqual(client.list_users(), [])
+        self.assertEqual(self.backend.calls["listUsers"], 1)
+
+class TimeoutTests(FakeBackendTestCase):
+
+    def test_slow_response_times_out_and_is_retried(self):
+        self.backend.set_profile("deleteUser", latency=0.5)
+        client = self.client(read_timeout=0.1, max_retries=1)
+        self.assertFalse(client.delete_user(2))
+        self.assertEqual(self.backend.calls["deleteUser"], 2)
+
+    def test_response_within_timeout_succeeds(self):
+        self.backend.set_profile("deleteUser", latency=0.05)
+        client = self.client(read_timeout=2.0)
+        self.assertTrue(client.delete_user(2))
+        self.assertEqual(self.backend.calls["deleteUser"], 1)
+
+class PaginationTests(FakeBackendTestCase):
+
+    users = 95
+
+    def test_pages_cover_every_user_once(self):
+        client = self.client()
+        pages = list(client.iter_user_pages(page_size=20))
+        self.assertEqual([len(page) for page in pages], [20, 20, 20, 20, 16])
+        ids = [user.id for page in pages for user in page]
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertEqual(len(ids), self.users + 1)
+
+    def test_pages_with_filter(self):
+        client = self.client()
+        pages = list(client.iter_user_pages(page_size=10, role="EDITEUR"))
+        users = [user for page in pages for user in page]
+        self.assertEqual(len(users), 47)
+        self.assertTrue(all(user.role == "EDITEUR" for user in users))
+
+    def test_page_error_stops_iteration(self):
+        client = self.client(max_retries=0)
+        pages = client.iter_user_pages(page_size=20)
+        self.assertEqual(len(next(pages)), 20)
+        # La page suivante peut déjà avoir été téléchargée en arrière-plan
+        self.backend.set_profile("listUsers", error_rate=1.0, error_status=500)
+        self.assertLessEqual(sum(len(page) for page in pages), 20)
+
+class CacheRefreshTests(FakeBackendTestCase):
+
+    def test_refresh_sees_update_made_in_snapshot_second(self):
+        # Les dates en base sont à la seconde : une modification juste après
+        # l'instantané ne doit pas échapper à l'actualisation différentielle
+        client = self.client(cache_ttl=60)
+        other = self.client()
+        for role in ("ADMIN", "EDITEUR", "ADMIN", "EDITEUR", "ADMIN"):
+            client.list_users(refresh=True)
+            self.assertTrue(other.update_user(2, role=role))
+            users = {user.id: user for user in client.list_users(refresh=True)}
+            self.assertEqual(users[2].role, role)
+
+class BatchTimeoutTests(FakeBackendTestCase):
+
+    def test_read_timeout_grows_with_hashed_passwords(self):
+        self.backend.set_profile("batchUsers", latency=0.5)
+        client = self.client(read_timeout=0.1)
+        operations = [{"action": "add", "username": f"lot{index}", "password": "motdepasse"} for index in range(4)]
+        results = client.batch(operations)
+        self.assertTrue(all(result["success"] for result in results))
+
+    def test_lost_batch_response_is_reported_as_unknown(self):
+        import json
+        import os
+        import time
+        # Réponse perdue après validation du lot par le serveur
+        self.backend.set_profile("batchUsers", latency=1.0)
+        client = self.client(read_timeout=0.1)
+        directory = self.temporary_directory()
+        path = os.path.join(directory, "users.csv")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("username,password\nlot1,motdepasse\nlot2,motdepasse\n")
+        log_path = os.path.join(directory, "results.jsonl")
+        from bulk_users import import_users
+        stats = import_users(client, path, log_path, workers=1, resume=False, batch_size=2)
+        self.assertEqual(stats, {"success": 0, "failed": 0, "unknown": 2})
+        with open(log_path, encoding="utf-8") as handle:
+            self.assertEqual([entry["outcome"] for entry in map(json.loads, handle)], ["unknown", "unknown"])
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and len(self.backend.users) < self.users + 3:
+            time.sleep(0.05)
+        usernames = {user["username"] for user in self.backend.users.values()}
+        self.assertTrue({"lot1", "lot2"} <= usernames)
+
+class ImportTests(FakeBackendTestCase):
+
+    def test_invalid_lines_are_logged_and_import_continues(self):
+        import json
+        import os
+        from bulk_users import import_users
+        directory = self.temporary_directory()
+        path = os.path.join(directory, "users.jsonl")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write('{"username": "alice", "password": "secret1"}\n')
+            handle.write('{"username": "bob", "password": \n')
+            handle.write('["pas", "un", "objet"]\n')
+            handle.write('{"username": 12, "password": "secret3"}\n')
+            handle.write('{"username": "carol", "password": "secret4"}\n')
+        log_path = os.path.join(directory, "results.jsonl")
+        stats = import_users(self.client(), path, log_path, workers=2, resume=False)
+        self.assertEqual(stats, {"success": 2, "failed": 3, "unknown": 0})
+        with open(log_path, encoding="utf-8") as handle:
+            entries = {entry["row"]: entry for entry in map(json.loads, handle)}
+        self.assertEqual(sorted(entries), [1, 2, 3, 4, 5])
+        self.assertIn("JSON invalide", entries[2]["error"])
+        self.assertEqual(entries[3]["error"], "Objet JSON attendu")
+        self.assertEqual(entries[4]["error"], "Colonne username: texte attendu")
+        with open(f"{log_path}.checkpoint", encoding="utf-8") as handle:
+            self.assertEqual(json.load(handle)["row"], 5)
+
+    def test_non_text_value_fails_only_its_row_in_a_batch(self):
+        import json
+        import os
+        from bulk_users import import_users
+        directory = self.temporary_directory()
+        path = os.path.join(directory, "users.jsonl")
+        with open(path, "w", encoding="utf-8") as handle:
+            for username in ('"ok1"', "12", '"ok2"'):
+                handle.write(f'{{"username": {username}, "password": "secret"}}\n')
+        log_path = os.path.join(directory, "results.jsonl")
+        stats = import_users(self.client(), path, log_path, workers=1, resume=False, batch_size=10)
+        self.assertEqual(stats, {"success": 2, "failed": 1, "unknown": 0})
+        with open(log_path, encoding="utf-8") as handle:
+            errors = {entry["row"]: entry.get("error") for entry in map(json.loads, handle)}
+        self.assertEqual(errors, {1: None, 2: "Colonne username: texte attendu", 3: None})
+
+    def test_resume_after_blank_line_replays_nothing(self):
+        import json
+        import os
+        from bulk_users import import_users
+        directory = self.temporary_directory()
+        path = os.path.join(directory, "users.jsonl")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write('{"username": "alice", "password": "secret1"}\n\n')
+            for name in ("bob", "carol", "dave", "erin"):
+                handle.write(f'{{"username": "{name}", "password": "secret"}}\n')
+        log_path = os.path.join(directory, "results.jsonl")
+        self.assertEqual(import_users(self.client(), path, log_path, workers=2),
+                         {"success": 5, "failed": 0, "unknown": 0})
+        with open(f"{log_path}.checkpoint", encoding="utf-8") as handle:
+            self.assertEqual(json.load(handle)["row"], 5)
+
+        self.backend.reset_calls()
+        self.assertEqual(import_users(self.client(), path, log_path, workers=2),
+                         {"success": 0, "failed": 0, "unknown": 0})
+        self.assertEqual(self.backend.calls["addUser"], 0)
+
+class ExportTests(FakeBackendTestCase):
+
+    def export(self, path: str) -> int:
+        import user_cli
+        return user_cli.main(["--url", self.backend.url, "--token", self.backend.soap_token, "--no-session",
+                              "export", path])
+
+    def test_export_writes_every_user(self):
+        import csv
+        import os
+        path = os.path.join(self.temporary_directory(), "users.csv")
+        self.assertEqual(self.export(path), 0)
+        with open(path, newline="", encoding="utf-8") as handle:
+            self.assertEqual(len(list(csv.DictReader(handle))), self.users + 1)
+
+    def test_failed_export_keeps_previous_file(self):
+        import os
+        directory = self.temporary_directory()
+        path = os.path.join(directory, "users.csv")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("export précédent\n")
+        self.backend.set_profile("listUsers", error_rate=1.0, error_status=500)
+        self.assertEqual(self.export(path), 1)
+        with open(path, encoding="utf-8") as handle:
+            self.assertEqual(handle.read(), "export précédent\n")
+        self.assertEqual(os.listdir(directory), ["users.csv"])
+
+class ReconcileTests(FakeBackendTestCase):
+
+    users = 20
+
+    def desired(self, count: int):
+        return [{"row": index + 1, "id": None, "username": f"user{index:06d}", "role": "VISITEUR" if index % 2 == 0
+                 else "EDITEUR", "password": None} for index in range(count)]
+
+    def test_delete_refused_without_known_identity(self):
+        import os
+        import user_cli
+        path = os.path.join(self.temporary_directory(), "annuaire.csv")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("username,role\nuser000000,VISITEUR\n")
+        status = user_cli.main(["--url", self.backend.url, "--token", self.backend.soap_token, "--no-session",
+                                "reconcile", path, "--delete"])
+        self.assertEqual(status, 1)
+        self.assertEqual(self.backend.calls["batchUsers"], 0)
+        self.assertEqual(len(self.backend.users), self.users + 1)
+
+    def test_non_text_value_is_reported_as_invalid_entry(self):
+        import os
+        from reconcile import load_desired, reconcile_users
+        path = os.path.join(self.temporary_directory(), "annuaire.jsonl")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write('{"username": "user000000", "role": "VISITEUR"}\n')
+            handle.write('{"username": 12, "role": "EDITEUR"}\n')
+            handle.write('{"username": "user000001", "role": 3}\n')
+        report = reconcile_users(self.client(), load_desired(path), dry_run=True)
+        self.assertEqual(report["invalid"], 2)
+        self.assertEqual(report["unchanged"], 1)
+
+    def test_too_many_deletes_are_refused(self):
+        from reconcile import reconcile_users
+        client = self.client()
+        self.assertTrue(client.authenticate_user("admin", "admin123"))
+        with self.assertRaises(ValueError):
+            reconcile_users(client, self.desired(5), delete=True, max_deletes=10)
+        self.assertEqual(self.backend.calls["batchUsers"], 0)
+
+        report = reconcile_users(client, self.desired(5), delete=True, max_deletes=15)
+        self.assertEqual(report["results"]["delete"]["success"], 15)
+        usernames = sorted(user["username"] for user in self.backend.users.values())
+        self.assertEqual(usernames, ["admin"] + [f"user{index:06d}" for index in range(5)])
+
+class LimiterTests(unittest.TestCase):
+
+    def release(self, limiter, latency: float, operation: str):
+        limiter.release(limiter.acquire(), latency, operation=operation)
+
+    def test_slow_operation_is_not_mistaken_for_overload(self):
+        from soap_limiter import AdaptiveLimiter
+        limiter = AdaptiveLimiter(initial_limit=4, max_limit=4)
+        for _ in range(200):
+            self.release(limiter, 0.005, "deleteUser")
+            self.release(limiter, 0.5, "listUsers")
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.decreases, 0)
+
+    def test_baseline_follows_lasting_slowdown(self):
+        from soap_limiter import AdaptiveLimiter
+        limiter = AdaptiveLimiter(initial_limit=4, max_limit=4, baseline_window=50)
+        for _ in range(50):
+            self.release(limiter, 0.01, "updateUser")
+        for _ in range(200):
+            self.release(limiter, 0.05, "updateUser")
+        self.assertEqual(limiter.snapshot()["latencies"]["updateUser"]["baseline"], 0.05)
+        # Plus de baisse une fois la référence rattrapée
+        decreases = limiter.decreases
+        for _ in range(50):
+            self.release(limiter, 0.05, "updateUser")
+        self.assertEqual(limiter.decreases, decreases)
+
+class ArticleXmlTests(unittest.TestCase):
+
+    def test_only_boolean_fields_are_converted(self):
+        from article_client import parse_xml_page
+        body = parse_xml_page(b"<response><success>true</success><data><id>3</id><title>true</title>"
+                              b"<content>false</content></data></response>")
+        self.assertIs(body["success"], True)
+        self.assertEqual(body["data"], [{"id": 3, "title": "true", "content": "false"}])
+
+class ArticleSyncTests(FakeBackendTestCase):
+
+    def setUp(self):
+        self.backend = FakeBackend(articles=50, seed=1).start()
+        self.addCleanup(self.backend.stop)
+
+    def test_article_edited_during_sync_does_not_hide_others(self):
+        from datetime import timedelta
+        from article_client import ArticleClient
+        # Articles plus anciens que la modification : elle change forcément l'ordre de la collecte
+        for article in self.backend.articles.values():
+            article["updatedAt"] -= timedelta(hours=1)
+        with ArticleClient(self.backend.url, workers=4, page_size=10, backoff_factor=0) as client:
+            seen = set()
+            for article in client.iter_articles(updated_since="1970-01-01T00:00:00.000Z"):
+                if not seen:
+                    # Modifié pendant la collecte : passe en fin de liste
+                    self.backend.touch_article(article["id"], title="Article modifié")
+                seen.add(article["id"])
+        self.assertEqual(seen, set(self.backend.articles))
+
+    def test_full_sync_refetches_articles_skipped_by_a_deletion(self):
+        from article_client import ArticleClient
+        with ArticleClient(self.backend.url, workers=1, page_size=10, backoff_factor=0) as client:
+            fields = {}
+            seen = set()
+            for article in client.iter_snapshot(fields=fields):
+                if len(seen) == 10:
+                    # Première page de la liste complète déjà reçue : les pages suivantes reculent d'un rang
+                    self.backend.delete_article(41)
+                seen.add(article["id"])
+        self.assertEqual(seen, set(self.backend.articles) | {41})
+        self.assertGreaterEqual(self.backend.calls["article"], 1)
+        self.assertEqual(len(fields["articleIds"]), 50)
+        self.assertIn("serverTime", fields)
+
+    def test_incremental_sync_sees_edit_made_in_watermark_second(self):
+        import os
+        from article_client import ArticleClient
+        from article_index import ArticleIndex
+        directory = self.temporary_directory()
+        with ArticleIndex(os.path.join(directory, "articles.db")) as index, \
+                ArticleClient(self.backend.url, page_size=20, backoff_factor=0) as client:
+            self.assertEqual(index.sync(client)["total"], 50)
+            self.backend.touch_article(7, title="Titre modifié")
+            self.assertGreaterEqual(index.sync(client)["received"], 1)
+            self.assertEqual([hit.id for hit in index.search("modifié")], [7])
+
+if __name__ == "__main__":
+    unittest.main()
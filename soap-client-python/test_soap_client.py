@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 """
 Script de test pour vérifier la connectivité SOAP
+
+L'URL du serveur est lue dans --url ou la variable SOAP_URL ; avec --fake,
+le test s'exécute contre le serveur de substitution en mémoire
+(fake_backend.py), sans Node ni base de données.
 """
 
+import argparse
+import os
 import requests
 import sys
 
-def test_soap_connectivity():
+def test_soap_connectivity(base_url: str = "http://localhost:3000"):
     """Test de la connectivité SOAP"""
     print("🧪 Test de connectivité SOAP...")
     print("=" * 50)
@@ -14,7 +20,7 @@ def test_soap_connectivity():
     # Test 1: Vérifier que le serveur répond
     print("1️⃣ Test de connectivité du serveur...")
     try:
-        response = requests.get("http://localhost:3000/api/health", timeout=5)
+        response = requests.get(f"{base_url}/api/health", timeout=5)
         if response.status_code == 200:
             print("✅ Serveur accessible")
             print(f"   Statut: {response.json().get('status')}")
@@ -29,7 +35,7 @@ def test_soap_connectivity():
     print("\n2️⃣ Test de l'endpoint SOAP...")
     try:
         # Requête SOAP simple pour récupérer le WSDL
-        response = requests.get("http://localhost:3000/soap", timeout=5)
+        response = requests.get(f"{base_url}/soap", timeout=5)
         if response.status_code == 200:
             print("✅ Endpoint SOAP accessible")
             if "WSDL" in response.text or "definitions" in response.text:
@@ -61,7 +67,7 @@ def test_soap_connectivity():
             'Content-Type': 'text/xml; charset=utf-8',
             'SOAPAction': 'authenticateUser'
         }
-        response = requests.post("http://localhost:3000/soap", data=soap_request, headers=headers, timeout=10)
+        response = requests.post(f"{base_url}/soap", data=soap_request, headers=headers, timeout=10)
         
         if response.status_code == 200:
             print("✅ Requête SOAP envoyée avec succès")
@@ -87,17 +93,29 @@ def test_soap_connectivity():
 
 def main():
     """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Test de connectivité SOAP")
+    parser.add_argument("--url", default=os.environ.get("SOAP_URL", "http://localhost:3000"),
+                        help="URL du serveur backend (défaut: $SOAP_URL ou http://localhost:3000)")
+    parser.add_argument("--fake", action="store_true",
+                        help="Tester contre le serveur de substitution en mémoire (fake_backend.py)")
+    args = parser.parse_args()
+    
     print("🚀 Test de connectivité SOAP - News Chronicle Online")
     print("=" * 60)
     
-    success = test_soap_connectivity()
+    if args.fake:
+        from fake_backend import FakeBackend
+        with FakeBackend() as backend:
+            success = test_soap_connectivity(backend.url)
+    else:
+        success = test_soap_connectivity(args.url)
     
     if success:
         print("\n✅ L'application Python peut maintenant être utilisée !")
         sys.exit(0)
     else:
         print("\n❌ Des problèmes de connectivité ont été détectés.")
-        print("   Vérifiez que le serveur backend est démarré sur http://localhost:3000")
+        print(f"   Vérifiez que le serveur backend est démarré sur {args.url}")
         sys.exit(1)
 
 if __name__ == "__main__":
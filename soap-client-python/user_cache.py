@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Cache local des listes d'utilisateurs (listUsers)
+News Chronicle Online - Client SOAP
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Hashable, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from soap_user_manager import User
+
+class CachedUserList:
+    """Instantané d'une liste d'utilisateurs
+
+    `server_time` est l'horodatage renvoyé par le serveur lors du dernier
+    chargement : il sert de point de départ à une actualisation différentielle.
+    """
+
+    __slots__ = ("users", "server_time", "expires_at")
+
+    def __init__(self, users: Iterable["User"], server_time: Optional[str], expires_at: float):
+        self.users: Dict[int, "User"] = {user.id: user for user in users}
+        self.server_time = server_time
+        self.expires_at = expires_at
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def apply_changes(self, changed: Iterable["User"], current_ids: Optional[Iterable[int]]):
+        """Fusionne les utilisateurs modifiés et retire ceux qui n'existent plus"""
+        if current_ids is not None:
+            current_ids = set(current_ids)
+            for user_id in [user_id for user_id in self.users if user_id not in current_ids]:
+                del self.users[user_id]
+        for user in changed:
+            self.users[user.id] = user
+
+    def to_list(self) -> List["User"]:
+        return list(self.users.values())
+
+class UserListCache:
+    """Cache LRU à durée de vie (TTL) des réponses listUsers
+
+    Les entrées expirées ne sont pas supprimées : elles restent disponibles
+    pour une actualisation différentielle (updatedSince) avant d'être
+    remplacées. Au-delà de `max_entries`, l'entrée la moins récemment
+    utilisée est évincée.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 8):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CachedUserList]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CachedUserList]:
+        """Renvoie l'entrée (fraîche ou expirée) associée à la clé"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, users: Iterable["User"], server_time: Optional[str]) -> CachedUserList:
+        """Enregistre une liste complète d'utilisateurs"""
+        entry = CachedUserList(users, server_time, time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def touch(self, entry: CachedUserList, server_time: Optional[str]):
+        """Prolonge une entrée après une actualisation différentielle"""
+        entry.server_time = server_time
+        entry.expires_at = time.monotonic() + self.ttl
+
+    def invalidate(self):
+        """Marque toutes les entrées comme expirées (après une modification)"""
+        with self._lock:
+            for entry in self._entries.values():
+                entry.expires_at = 0.0
+
+    def clear(self):
+        """Vide complètement le cache"""
+        with self._lock:
+            self._entries.clear()
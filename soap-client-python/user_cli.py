@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Commandes ponctuelles (non interactives) du gestionnaire d'utilisateurs
+News Chronicle Online - Client SOAP
+
+Chaque commande exécute une seule opération puis se termine avec un code
+de sortie exploitable par les scripts (0 succès, 1 échec, 2 usage). Les
+identifiants sont lus dans les options ou les variables d'environnement
+SOAP_URL, SOAP_TOKEN, SOAP_USERNAME et SOAP_PASSWORD ; SOAP_TRANSPORT
+(`soap` ou `rest`) choisit le transport des opérations utilisateurs.
+
+`login` ouvre une session enregistrée (voir session_store.py) : les
+commandes suivantes réutilisent ses tokens sans nouvelle authentification
+tant qu'ils sont valides.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+ROLES = ("VISITEUR", "EDITEUR", "ADMIN")
+
+def build_parser() -> argparse.ArgumentParser:
+    """Construit l'analyseur des sous-commandes"""
+    parser = argparse.ArgumentParser(prog="soap_user_manager.py",
+                                     description="Gestion des utilisateurs via SOAP (sans argument: mode interactif)")
+    parser.add_argument("--url", default=os.environ.get("SOAP_URL", "http://localhost:3000"),
+                        help="URL du serveur backend (défaut: $SOAP_URL ou http://localhost:3000)")
+    parser.add_argument("--token", default=os.environ.get("SOAP_TOKEN"),
+                        help="Token SOAP (défaut: $SOAP_TOKEN, sinon celui de la session)")
+    parser.add_argument("--session-file", help="Fichier de session (défaut: $SOAP_SESSION_FILE "
+                                               "ou ~/.newschronicle/soap_session.json)")
+    parser.add_argument("--no-session", action="store_true", help="Ne pas lire ni enregistrer de session")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Adapter le nombre de requêtes en vol à la charge du serveur (au plus --workers)")
+    parser.add_argument("--max-rate", type=float, help="Débit maximal (requêtes par seconde)")
+    parser.add_argument("--transport", choices=("soap", "rest"), default=os.environ.get("SOAP_TRANSPORT", "soap"),
+                        help="Échange des opérations utilisateurs : enveloppes SOAP ou JSON sur /api/users "
+                             "(défaut: $SOAP_TRANSPORT ou soap)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    login_parser = subparsers.add_parser("login", help="S'authentifier et enregistrer la session")
+    login_parser.add_argument("--username", default=os.environ.get("SOAP_USERNAME"),
+                              help="Nom d'utilisateur (défaut: $SOAP_USERNAME)")
+    login_parser.add_argument("--password", default=os.environ.get("SOAP_PASSWORD"),
+                              help="Mot de passe (défaut: $SOAP_PASSWORD, sinon saisi ou lu sur l'entrée standard)")
+    login_parser.add_argument("--generate-token", metavar="DESCRIPTION",
+                              help="Générer un token SOAP (compte ADMIN) et l'enregistrer dans la session")
+
+    subparsers.add_parser("logout", help="Supprimer la session enregistrée")
+
+    list_parser = subparsers.add_parser("list", help="Lister les utilisateurs")
+    list_parser.add_argument("--role", choices=ROLES, help="Filtrer par rôle")
+    list_parser.add_argument("--prefix", help="Filtrer par début de nom d'utilisateur")
+    list_parser.add_argument("--created-after", help="Filtrer par date de création (ISO 8601)")
+    list_parser.add_argument("--json", action="store_true", help="Une ligne JSON par utilisateur")
+
+    add_parser = subparsers.add_parser("add", help="Ajouter un utilisateur")
+    add_parser.add_argument("username")
+    add_parser.add_argument("--role", choices=ROLES, default="VISITEUR")
+    add_parser.add_argument("--password", help="Mot de passe (défaut: saisi ou lu sur l'entrée standard)")
+
+    update_parser = subparsers.add_parser("update", help="Modifier un utilisateur")
+    update_parser.add_argument("user_id", type=int)
+    update_parser.add_argument("--username", help="Nouveau nom d'utilisateur")
+    update_parser.add_argument("--password", help="Nouveau mot de passe")
+    update_parser.add_argument("--role", choices=ROLES, help="Nouveau rôle")
+
+    delete_parser = subparsers.add_parser("delete", help="Supprimer un utilisateur")
+    delete_parser.add_argument("user_id", type=int)
+
+    whoami_parser = subparsers.add_parser("whoami", help="Vérifier les identifiants et/ou le token SOAP")
+    whoami_parser.add_argument("--username", default=os.environ.get("SOAP_USERNAME"),
+                               help="Nom d'utilisateur (défaut: $SOAP_USERNAME)")
+    whoami_parser.add_argument("--password", default=os.environ.get("SOAP_PASSWORD"),
+                               help="Mot de passe (défaut: $SOAP_PASSWORD)")
+
+    import_parser = subparsers.add_parser("import", help="Importer des utilisateurs depuis un fichier CSV/JSONL")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--workers", type=int, default=8, help="Nombre de requêtes en parallèle")
+    import_parser.add_argument("--log", help="Journal des résultats (défaut: <fichier>.results.jsonl)")
+    import_parser.add_argument("--no-resume", action="store_true", help="Ignorer le point de reprise existant")
+    import_parser.add_argument("--batch-size", type=int, default=1,
+                               help="Lignes envoyées par appel batchUsers (1 = un appel par ligne)")
+
+    export_parser = subparsers.add_parser("export", help="Exporter les utilisateurs vers un fichier CSV/JSONL")
+    export_parser.add_argument("file")
+
+    reconcile_parser = subparsers.add_parser("reconcile",
+                                             help="Aligner les utilisateurs sur un état souhaité (fichier CSV/JSONL)")
+    reconcile_parser.add_argument("file")
+    reconcile_parser.add_argument("--dry-run", action="store_true", help="Afficher le plan sans rien modifier")
+    reconcile_parser.add_argument("--delete", action="store_true",
+                                  help="Supprimer les comptes absents du fichier (sinon seulement signalés)")
+    reconcile_parser.add_argument("--max-deletes", type=int, default=100,
+                                  help="Refuser la réconciliation au-delà de N suppressions (défaut: 100)")
+    reconcile_parser.add_argument("--workers", type=int, default=4, help="Lots envoyés en parallèle")
+    reconcile_parser.add_argument("--batch-size", type=int, default=500,
+                                  help="Opérations par appel batchUsers (1000 au maximum)")
+    return parser
+
+def _error(message: str) -> int:
+    print(f"❌ {message}", file=sys.stderr)
+    return 1
+
+def _read_password() -> str:
+    """Mot de passe saisi au terminal, ou première ligne de l'entrée standard"""
+    if sys.stdin.isatty():
+        import getpass
+        return getpass.getpass("Mot de passe: ").strip()
+    return sys.stdin.readline().strip()
+
+def _command_list(client, args) -> int:
+    fields = {}
+    users = client.iter_users(role=args.role, username_prefix=args.prefix,
+                              created_after=args.created_after, fields=fields)
+    count = 0
+    write = sys.stdout.write
+    if not args.json:
+        user_col = "Nom d'utilisateur"
+        write(f"{'ID':<5} {user_col:<20} {'Rôle':<15} {'Créé le':<24}\n")
+    for user in users:
+        count += 1
+        if args.json:
+            write(json.dumps({"id": user.id, "username": user.username, "role": user.role,
+                              "created_at": user.created_at}, ensure_ascii=False) + "\n")
+        else:
+            write(f"{user.id:<5} {user.username:<20} {user.role:<15} {user.created_at or '':<24}\n")
+    if fields.get("success") != "true":
+        return _error(fields.get("message") or "Erreur inconnue")
+    if not args.json:
+        print(f"{count} utilisateur(s)", file=sys.stderr)
+    return 0
+
+def _report(result, success_message: str) -> int:
+    if result.get("success") == "true":
+        print(f"✅ {success_message}")
+        return 0
+    return _error(result.get("message") or "Erreur inconnue")
+
+def _command_add(client, args) -> int:
+    password = args.password or _read_password()
+    if not password:
+        return _error("Mot de passe requis")
+    result = client.execute("addUser", {"username": args.username, "password": password, "role": args.role})
+    return _report(result, f"Utilisateur créé, ID: {result.get('userId')}")
+
+def _command_update(client, args) -> int:
+    changes = {"username": args.username, "password": args.password, "role": args.role}
+    changes = {key: value for key, value in changes.items() if value}
+    if not changes:
+        return _error("Rien à modifier (--username, --password ou --role)")
+    result = client.execute("updateUser", {"userId": args.user_id, **changes})
+    return _report(result, f"Utilisateur {args.user_id} mis à jour")
+
+def _command_delete(client, args) -> int:
+    result = client.execute("deleteUser", {"userId": args.user_id})
+    return _report(result, f"Utilisateur {args.user_id} supprimé")
+
+def _command_login(client, args) -> int:
+    if client.session_store is None:
+        return _error("Sessions désactivées (--no-session)")
+    if not args.username:
+        return _error("Nom d'utilisateur requis (--username ou variable SOAP_USERNAME)")
+    password = args.password or _read_password()
+    if not password:
+        return _error("Mot de passe requis")
+    if not client.authenticate_user(args.username, password):
+        return _error("Échec de l'authentification")
+    if args.generate_token and client.generate_soap_token(args.generate_token) is None:
+        return _error("Échec de la génération du token SOAP")
+    print(f"✅ Session ouverte: {args.username} (rôle {client.role})")
+    if client.soap_token:
+        print("🔑 Token SOAP enregistré dans la session")
+    return 0
+
+def _command_logout(client, args) -> int:
+    if client.clear_session():
+        print("🔒 Session supprimée")
+    else:
+        print("ℹ️  Aucune session enregistrée")
+    return 0
+
+def _format_expiry(expires_at) -> str:
+    if expires_at is None:
+        return "date inconnue"
+    from datetime import datetime
+    return datetime.fromtimestamp(expires_at).strftime("%Y-%m-%d %H:%M")
+
+def _command_whoami(client, args) -> int:
+    if not (args.username and args.password) and not client.soap_token and not client.auth_token:
+        return _error("Identifiants (--username/--password), session ou token SOAP requis")
+    status = 0
+    if client.auth_token and not (args.username and args.password):
+        print(f"🔓 Session: {client.username} (rôle {client.role}), "
+              f"expire le {_format_expiry(client.auth_expires_at)}")
+    if args.username and args.password:
+        result = client.execute("authenticateUser", {"username": args.username, "password": args.password})
+        if result.get("success") == "true":
+            print(f"👤 {args.username} — rôle {result.get('role')}")
+        else:
+            status = _error(result.get("message") or "Échec de l'authentification")
+    if client.soap_token:
+        info = client.verify_soap_token()
+        if info:
+            print(f"🔑 Token SOAP « {info.get('description')} » valide jusqu'au {info.get('expiresAt')}")
+        else:
+            status = _error("Token SOAP invalide ou expiré")
+    return status
+
+def _command_import(client, args) -> int:
+    import bulk_users
+    from soap_user_manager import MAX_BATCH_SIZE
+    stats = bulk_users.import_users(client, args.file, args.log, args.workers, resume=not args.no_resume,
+                                    batch_size=max(1, min(args.batch_size, MAX_BATCH_SIZE)))
+    return 1 if stats["failed"] or stats["unknown"] else 0
+
+def _command_export(client, args) -> int:
+    import bulk_users
+    bulk_users.export_users(client, args.file)
+    return 0
+
+def _command_reconcile(client, args) -> int:
+    import reconcile
+    desired = reconcile.load_desired(args.file)
+    report = reconcile.reconcile_users(client, desired, dry_run=args.dry_run, delete=args.delete,
+                                       workers=args.workers, batch_size=args.batch_size,
+                                       max_deletes=args.max_deletes)
+    results = report["results"] or {}
+    return 1 if report["invalid"] or any(counts["failed"] or counts["unknown"] for counts in results.values()) else 0
+
+# Commandes utilisables sans token SOAP
+SESSION_COMMANDS = frozenset({"login", "logout", "whoami"})
+
+COMMANDS = {
+    "login": _command_login,
+    "logout": _command_logout,
+    "list": _command_list,
+    "add": _command_add,
+    "update": _command_update,
+    "delete": _command_delete,
+    "whoami": _command_whoami,
+    "import": _command_import,
+    "export": _command_export,
+    "reconcile": _command_reconcile,
+}
+
+def main(argv=None) -> int:
+    """Point d'entrée des commandes ponctuelles"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    from soap_user_manager import SoapClient
+    from session_store import SessionStore
+    pool_size = args.workers if args.command in ("import", "reconcile") else 1
+    store = None if args.no_session else SessionStore(args.session_file)
+    limiter = None
+    if args.adaptive or args.max_rate:
+        from soap_limiter import AdaptiveLimiter
+        # Sans --adaptive, la limite reste fixée à la taille du pool
+        limiter = AdaptiveLimiter(initial_limit=min(4, pool_size) if args.adaptive else pool_size,
+                                  min_limit=1 if args.adaptive else pool_size, max_limit=pool_size,
+                                  rate=args.max_rate)
+    with SoapClient(args.url, pool_size=pool_size, verbose=False, session_store=store, limiter=limiter,
+                    transport=args.transport) as client:
+        client.soap_token = args.token
+        if args.command != "logout":
+            client.restore_session()
+        if args.command not in SESSION_COMMANDS and client.transport.missing_credentials():
+            if args.transport == "rest":
+                parser.error("Session ADMIN requise pour le transport REST (commande login)")
+            parser.error("Token SOAP requis (--token, variable SOAP_TOKEN ou commande login)")
+        # Identifiants de l'environnement : nouvelle authentification si la session expire
+        if os.environ.get("SOAP_USERNAME") and os.environ.get("SOAP_PASSWORD"):
+            client.set_credentials(os.environ["SOAP_USERNAME"], os.environ["SOAP_PASSWORD"])
+        try:
+            return COMMANDS[args.command](client, args)
+        except (OSError, ValueError) as e:
+            return _error(str(e))
+        finally:
+            if args.adaptive:
+                state = limiter.snapshot()
+                print(f"🎚️  Limite finale: {state['limit']} requête(s) en vol "
+                      f"({state['increases']} hausse(s), {state['decreases']} baisse(s))", file=sys.stderr)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Représentation en colonnes d'un annuaire d'utilisateurs
+News Chronicle Online - Client SOAP
+"""
+
+import sys
+from array import array
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from soap_user_manager import User
+
+# Valeur stockée lorsqu'un utilisateur n'a pas de date de création
+MISSING_TIMESTAMP = -1
+
+def iso_to_epoch(created_at: Optional[str]) -> int:
+    """Convertit une date ISO 8601 (ex: 2024-01-01T10:00:00.000Z) en secondes epoch"""
+    if not created_at:
+        return MISSING_TIMESTAMP
+    return int(datetime.fromisoformat(created_at.replace('Z', '+00:00')).timestamp())
+
+def epoch_to_iso(timestamp: int) -> Optional[str]:
+    """Convertit des secondes epoch en date ISO 8601 au format du serveur"""
+    if timestamp == MISSING_TIMESTAMP:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+class UserTable:
+    """Annuaire d'utilisateurs stocké par colonnes
+
+    Les identifiants et dates de création (secondes epoch) sont rangés dans
+    des `array('q')` compacts, les rôles sont des chaînes internées partagées.
+    Les filtres et tris opèrent sur les colonnes sans créer d'objets User.
+    """
+
+    __slots__ = ("ids", "usernames", "roles", "created_at", "_role_index")
+
+    def __init__(self):
+        self.ids = array('q')
+        self.usernames: List[str] = []
+        self.roles: List[str] = []
+        self.created_at = array('q')
+        self._role_index: Optional[Dict[str, List[int]]] = None
+
+    @classmethod
+    def from_users(cls, users: Iterable[User]) -> "UserTable":
+        """Construit la table à partir d'un itérable de User (ex: client.iter_users())"""
+        table = cls()
+        for user in users:
+            table.append(user)
+        return table
+
+    def append(self, user: User):
+        """Ajoute un utilisateur à la fin de la table"""
+        self.ids.append(user.id)
+        self.usernames.append(user.username)
+        self.roles.append(sys.intern(user.role or ""))
+        self.created_at.append(iso_to_epoch(user.created_at))
+        self._role_index = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> User:
+        return User(
+            id=self.ids[index],
+            username=self.usernames[index],
+            role=self.roles[index],
+            created_at=epoch_to_iso(self.created_at[index])
+        )
+
+    def __iter__(self) -> Iterator[User]:
+        for index in range(len(self.ids)):
+            yield self[index]
+
+    def to_users(self) -> List[User]:
+        """Convertit la table en liste de User"""
+        return list(self)
+
+    def take(self, indices: Iterable[int]) -> "UserTable":
+        """Renvoie une nouvelle table contenant les lignes demandées, dans l'ordre donné"""
+        indices = indices if isinstance(indices, Sequence) else list(indices)
+        table = UserTable()
+        ids, usernames, roles, created_at = self.ids, self.usernames, self.roles, self.created_at
+        table.ids = array('q', [ids[i] for i in indices])
+        table.usernames = [usernames[i] for i in indices]
+        table.roles = [roles[i] for i in indices]
+        table.created_at = array('q', [created_at[i] for i in indices])
+        return table
+
+    def _role_rows(self) -> Dict[str, List[int]]:
+        """Index rôle -> numéros de ligne, construit à la première requête par rôle"""
+        if self._role_index is None:
+            index: Dict[str, List[int]] = {}
+            for row, role in enumerate(self.roles):
+                index.setdefault(role, []).append(row)
+            self._role_index = index
+        return self._role_index
+
+    def _select(self, role: Optional[str], created_after: Optional[int], created_before: Optional[int],
+                predicate: Optional[Callable[[User], bool]]) -> Sequence[int]:
+        """Numéros des lignes correspondant aux filtres"""
+        rows: Sequence[int] = range(len(self.ids))
+        if role is not None:
+            rows = self._role_rows().get(role, [])
+        created_at = self.created_at
+        if created_after is not None:
+            rows = [row for row in rows if created_at[row] > created_after]
+        if created_before is not None:
+            rows = [row for row in rows if MISSING_TIMESTAMP != created_at[row] < created_before]
+        if predicate is not None:
+            rows = [row for row in rows if predicate(self[row])]
+        return rows
+
+    def filter(self, role: Optional[str] = None, created_after: Optional[int] = None,
+               created_before: Optional[int] = None,
+               predicate: Optional[Callable[[User], bool]] = None) -> "UserTable":
+        """Filtre par rôle et/ou intervalle de création (secondes epoch)
+
+        Le filtre par rôle s'appuie sur un index construit une seule fois :
+        les requêtes répétées ne parcourent que les lignes du rôle demandé.
+        `predicate` reçoit un User reconstruit : plus souple mais plus lent.
+        """
+        return self.take(self._select(role, created_after, created_before, predicate))
+
+    def count(self, role: Optional[str] = None, created_after: Optional[int] = None,
+              created_before: Optional[int] = None,
+              predicate: Optional[Callable[[User], bool]] = None) -> int:
+        """Compte les utilisateurs correspondant aux filtres, sans construire de table"""
+        return len(self._select(role, created_after, created_before, predicate))
+
+    def sort_by(self, column: str = "id", reverse: bool = False) -> "UserTable":
+        """Trie la table sur une colonne (id, username, role ou created_at)"""
+        columns = {"id": self.ids, "username": self.usernames, "role": self.roles, "created_at": self.created_at}
+        if column not in columns:
+            raise ValueError(f"Colonne inconnue: {column}")
+        values = columns[column]
+        return self.take(sorted(range(len(values)), key=values.__getitem__, reverse=reverse))
+
+    def group_by_role(self) -> Dict[str, "UserTable"]:
+        """Regroupe les utilisateurs par rôle"""
+        return {role: self.take(rows) for role, rows in self._role_rows().items()}
+
+    def count_by_role(self) -> Dict[str, int]:
+        """Compte les utilisateurs par rôle"""
+        return {role: len(rows) for role, rows in self._role_rows().items()}
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Transports des opérations utilisateurs de SoapClient (SOAP ou REST/JSON)
+News Chronicle Online - Client SOAP
+
+SoapClient expose les mêmes méthodes (`list_users`, `add_user`,
+`update_user`, `delete_user`, `batch`, `execute`...) quel que soit le
+transport ; seul l'échange avec le serveur change :
+
+- `soap` (défaut) : enveloppes XML sur /soap, authentification par token
+  SOAP ;
+- `rest` : JSON sur /api/users (routes/users.js), authentification par le
+  token JWT d'un compte ADMIN (`authenticate_user`). Pas d'enveloppe à
+  construire ni de XML à analyser.
+
+Les deux transports renvoient des réponses de même forme (dictionnaire de
+champs texte `success`, `message`, `userId`...), comme les réponses SOAP.
+Une requête envoyée restée sans réponse porte `outcome` = OUTCOME_UNKNOWN.
+"""
+
+import json
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from soap_user_manager import MUTATING_OPERATIONS, OUTCOME_UNKNOWN, SoapClient, User
+
+TRANSPORTS = ("soap", "rest")
+
+class SoapTransport:
+    """Opérations via les enveloppes SOAP de SoapClient"""
+
+    name = "soap"
+
+    def __init__(self, client: SoapClient):
+        self.client = client
+
+    def missing_credentials(self) -> Optional[str]:
+        """Message d'erreur si le transport ne peut pas être utilisé, sinon None"""
+        return None if self.client.soap_token else "Token SOAP requis pour cette opération"
+
+    def execute(self, method: str, params: Dict, timeout: Optional[Tuple[float, float]] = None) -> Dict:
+        return self.client._make_soap_request(method, params, timeout)
+
+    def stream_users(self, fields: Dict, params: Dict) -> Iterator[User]:
+        return self.client._stream_users(fields, params)
+
+class RestTransport:
+    """Opérations via l'API REST JSON /api/users (compte ADMIN)
+
+    Les filtres et la pagination de listUsers sont transmis en paramètres
+    de requête. batchUsers, sans équivalent REST, est exécuté opération par
+    opération (chacune avec le délai de lecture normal du client). Les
+    autres opérations (authenticateUser) passent par SOAP.
+    Un token JWT refusé (401) est renouvelé une fois si les identifiants
+    de l'exécution sont connus.
+    """
+
+    name = "rest"
+
+    # Paramètres de listUsers transmis dans la requête GET /api/users
+    LIST_PARAMETERS = ("role", "usernamePrefix", "createdAfter", "offset", "limit")
+
+    def __init__(self, client: SoapClient):
+        self.client = client
+        self.users_url = f"{client.base_url}/api/users"
+        self._operations = {
+            "listUsers": self._list_users,
+            "addUser": self._add_user,
+            "updateUser": self._update_user,
+            "deleteUser": self._delete_user,
+            "batchUsers": self._batch_users,
+        }
+
+    def missing_credentials(self) -> Optional[str]:
+        if self.client.auth_token:
+            return None
+        return "Authentification requise (compte ADMIN) pour le transport REST"
+
+    def _call(self, method: str, http_method: str, url: str, payload: Optional[Dict] = None,
+              query: Optional[Dict] = None) -> Dict:
+        """Requête JSON ; renvoie {"success": bool, "status": code, ...corps JSON}"""
+        client = self.client
+        trace = None
+        sent = False
+        try:
+            started = time.perf_counter()
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+            trace = client._start_trace(method, started, body or b"")
+            sent = True
+            response = self._send(method, http_method, url, body, query, trace)
+            if response.status_code == 401 and self._renew_auth_token(response.request.headers["Authorization"]):
+                response = self._send(method, http_method, url, body, query, trace)
+
+            if trace is not None:
+                trace.response_bytes = len(response.content)
+                parse_started = time.perf_counter()
+            try:
+                data = response.json()
+            except ValueError:
+                data = {}
+            if trace is not None:
+                trace.parse = time.perf_counter() - parse_started
+            result = {**data, "success": response.ok and data.get("success", True) is not False,
+                      "status": response.status_code}
+            if not result["success"]:
+                result["message"] = data.get("error") or data.get("message") or f"Erreur HTTP {response.status_code}"
+                if trace is not None:
+                    trace.error = trace.error or f"HTTP {response.status_code}"
+            if trace is not None:
+                trace.success = result["success"]
+                trace.finish()
+                client._notify("on_response", trace)
+            if client.cache is not None and method in MUTATING_OPERATIONS and result["success"]:
+                client.cache.invalidate()
+            return result
+        except Exception as e:
+            if trace is not None:
+                client._fail_trace(trace, e)
+            client._log(f"❌ Erreur lors de la requête REST {method}: {str(e)}")
+            if sent:
+                return {"success": False, "message": str(e), "outcome": OUTCOME_UNKNOWN}
+            return {"success": False, "message": str(e)}
+
+    def _send(self, method: str, http_method: str, url: str, body: Optional[bytes], query: Optional[Dict], trace):
+        client = self.client
+        headers = {"Authorization": f"Bearer {client.auth_token}", "Accept": "application/json",
+                   "Content-Type": "application/json"}
+        return client._send_with_retry(method, lambda: client._request(
+            http_method, url, trace, data=body, params=query, headers=headers), trace)
+
+    def _renew_auth_token(self, rejected_header: str) -> bool:
+        """Nouvelle authentification après un 401 ; un seul renouvellement pour les appels concurrents"""
+        client = self.client
+        with client._auth_lock:
+            if f"Bearer {client.auth_token}" != rejected_header:
+                return bool(client.auth_token)
+            return client._reauthenticate()
+
+    @staticmethod
+    def _soap_result(result: Dict, **fields) -> Dict:
+        """Réponse au format des réponses SOAP (valeurs texte)"""
+        response = {"success": "true" if result["success"] else "false", "message": result.get("message", "")}
+        if result.get("outcome"):
+            response["outcome"] = result["outcome"]
+        response.update({key: str(value) for key, value in fields.items() if value is not None})
+        return response
+
+    def _fetch_users(self, params: Dict) -> Tuple[Optional[List[Dict]], Dict]:
+        """GET /api/users ; renvoie (utilisateurs JSON ou None, champs de réponse façon SOAP)"""
+        query = {key: params[key] for key in self.LIST_PARAMETERS if params.get(key) is not None}
+        result = self._call("listUsers", "GET", self.users_url, query=query)
+        data = result.get("data") if result["success"] else None
+        if not isinstance(data, list):
+            return None, {"success": "false", "message": result.get("message") or "Réponse REST invalide"}
+        return data, {"success": "true", "message": f"{len(data)} utilisateur(s) trouvé(s)",
+                      "total": str(result.get("total", len(data)))}
+
+    def _list_users(self, params: Dict) -> Dict:
+        data, fields = self._fetch_users(params)
+        if data is None:
+            return fields
+        users = [{key: user.get(key) for key in ("id", "username", "role", "createdAt")} for user in data]
+        return {**fields, "users": json.dumps(users, ensure_ascii=False)}
+
+    def _add_user(self, params: Dict) -> Dict:
+        payload = {key: params.get(key) for key in ("username", "password", "role") if params.get(key)}
+        result = self._call("addUser", "POST", self.users_url, payload)
+        return self._soap_result(result, userId=(result.get("data") or {}).get("id"))
+
+    def _update_user(self, params: Dict) -> Dict:
+        if not params.get("userId"):
+            return {"success": "false", "message": "ID utilisateur requis"}
+        payload = {key: params.get(key) for key in ("username", "password", "role") if params.get(key)}
+        result = self._call("updateUser", "PUT", f"{self.users_url}/{params['userId']}", payload)
+        return self._soap_result(result)
+
+    def _delete_user(self, params: Dict) -> Dict:
+        if not params.get("userId"):
+            return {"success": "false", "message": "ID utilisateur requis"}
+        result = self._call("deleteUser", "DELETE", f"{self.users_url}/{params['userId']}")
+        return self._soap_result(result)
+
+    def _batch_users(self, params: Dict) -> Dict:
+        try:
+            operations = json.loads(params.get("operations") or "[]")
+        except ValueError:
+            operations = None
+        if not isinstance(operations, list):
+            return {"success": "false", "message": "Liste d'opérations invalide (tableau JSON attendu)"}
+        handlers = {"add": self._add_user, "update": self._update_user, "delete": self._delete_user}
+        results = []
+        for index, operation in enumerate(operations):
+            operation = operation if isinstance(operation, dict) else {}
+            action = operation.get("action")
+            handler = handlers.get(action)
+            if handler is None:
+                results.append({"index": index, "action": action, "success": False,
+                                "message": "Action inconnue (add, update ou delete attendu)"})
+                continue
+            outcome = handler(operation)
+            if outcome.get("success") == "true":
+                user_id = outcome.get("userId") or operation.get("userId")
+                results.append({"index": index, "action": action, "success": True,
+                                "userId": int(user_id) if user_id else None})
+            else:
+                results.append({"index": index, "action": action, "success": False,
+                                "message": outcome.get("message"),
+                                **({"outcome": outcome["outcome"]} if outcome.get("outcome") else {})})
+        succeeded = sum(1 for result in results if result["success"])
+        return {"success": "true", "message": f"{succeeded}/{len(results)} opération(s) réussie(s)",
+                "results": json.dumps(results, ensure_ascii=False)}
+
+    def execute(self, method: str, params: Dict, timeout: Optional[Tuple[float, float]] = None) -> Dict:
+        """`timeout` ne s'applique qu'aux opérations passant par SOAP (une requête REST par opération)"""
+        operation = self._operations.get(method)
+        if operation is None:
+            return self.client._make_soap_request(method, params, timeout)
+        return operation(params)
+
+    def stream_users(self, fields: Dict, params: Dict) -> Iterator[User]:
+        """Utilisateurs de GET /api/users (réponse JSON complète, pas d'actualisation différentielle)"""
+        data, response_fields = self._fetch_users(params)
+        fields.update(response_fields)
+        if data is None:
+            return
+        user_from_json = self.client._user_from_json
+        for user_data in data:
+            yield user_from_json(user_data)
+
+def create_transport(name: str, client: SoapClient):
+    """Transport `soap` ou `rest` pour ce client"""
+    if name == "soap":
+        return SoapTransport(client)
+    if name == "rest":
+        return RestTransport(client)
+    raise ValueError(f"Transport inconnu: {name} ({', '.join(TRANSPORTS)})")